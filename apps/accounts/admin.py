@@ -1,10 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from apps.core.admin import CSVImportAdminMixin
 from .models import User
 
 @admin.register(User)
-class CustomUserAdmin(UserAdmin):
+class CustomUserAdmin(CSVImportAdminMixin, UserAdmin):
+    import_kind = 'users'
     list_display = ('email', 'username', 'full_name', 'role', 'is_active', 'date_joined')
     list_filter = ('role', 'is_active', 'is_staff')
     search_fields = ('email', 'username', 'first_name', 'last_name')
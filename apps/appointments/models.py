@@ -41,6 +41,10 @@ class Appointment(models.Model):
     class Meta:
         ordering = ['date', 'time_slot']
         unique_together = ['technician', 'date', 'time_slot']
+        indexes = [
+            models.Index(fields=['user', 'date'], name='appointments_user_date_idx'),
+            models.Index(fields=['status', 'date'], name='appointments_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.service.name} - {self.date} {self.time_slot}"
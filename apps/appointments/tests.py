@@ -1,10 +1,15 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from .models import Appointment, TimeSlot, TechnicianSchedule
 from apps.accounts.models import User
 from apps.services.models import Service
+from apps.core.query_plans import full_scans
+from rest_framework.test import APIClient
+from rest_framework import status
 
 class AppointmentModelTest(TestCase):
     """Tests for the Appointment model"""
@@ -69,4 +74,105 @@ class AppointmentModelTest(TestCase):
         self.assertEqual(
             str(self.appointment), 
             f"{self.service.name} - {self.appointment.date} {self.appointment.time_slot}"
-        ) 
\ No newline at end of file
+        ) 
+
+
+class AppointmentQueryPlanTest(TestCase):
+    """Query plan regression tests for the appointment API querysets"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        cls.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        service = Service.objects.create(
+            name='Test Service',
+            description='Test Service Description',
+            price=100.00
+        )
+        today = timezone.now().date()
+        Appointment.objects.bulk_create([
+            Appointment(
+                user=cls.customer,
+                service=service,
+                technician=cls.technician,
+                date=today + timedelta(days=i // 8),
+                time_slot=f'{9 + i % 8:02d}:00',
+                status=Appointment.Status.values[i % len(Appointment.Status.values)]
+            )
+            for i in range(200)
+        ])
+    
+    def assertNoFullScan(self, queryset):
+        self.assertEqual(full_scans(queryset), [], f'Full scan in plan for:\n{queryset.query}')
+    
+    def test_appointment_querysets(self):
+        """Test the per-user and status appointment filters use indexes"""
+        today = timezone.now().date()
+        self.assertNoFullScan(Appointment.objects.filter(user=self.customer))
+        self.assertNoFullScan(Appointment.objects.filter(technician=self.technician))
+        self.assertNoFullScan(Appointment.objects.filter(status=Appointment.Status.PENDING, date__gte=today))
+
+
+class AppointmentAPIQueryCountTest(TestCase):
+    """Tests that the appointment API query count does not grow with the page size"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+    
+    def create_appointments(self, count):
+        for i in range(count):
+            number = User.objects.count()
+            customer = User.objects.create_user(
+                username=f'customer{number}',
+                email=f'customer{number}@example.com',
+                password='password123',
+                role='customer'
+            )
+            technician = User.objects.create_user(
+                username=f'technician{number}',
+                email=f'technician{number}@example.com',
+                password='password123',
+                role='technician'
+            )
+            service = Service.objects.create(
+                name=f'Service {number}',
+                description='Service description',
+                price=100.00
+            )
+            Appointment.objects.create(
+                user=customer,
+                technician=technician,
+                service=service,
+                date=timezone.now().date() + timedelta(days=1),
+                time_slot='09:00'
+            )
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+    
+    def test_appointment_list(self):
+        """Test the nested users and service are eager loaded"""
+        self.create_appointments(2)
+        small = self.count_queries('/api/appointments/appointments/')
+        self.create_appointments(6)
+        self.assertEqual(self.count_queries('/api/appointments/appointments/'), small)
@@ -5,6 +5,7 @@ from django.utils.translation import gettext_lazy as _
 from .models import Appointment, TimeSlot, TechnicianSchedule
 from .serializers import AppointmentSerializer, TimeSlotSerializer, TechnicianScheduleSerializer
 from apps.accounts.models import User
+from apps.core.prefetch import EagerLoadingMixin
 from django.utils import timezone
 from datetime import timedelta
 from django.shortcuts import get_object_or_404
@@ -34,7 +35,7 @@ class TimeSlotViewSet(viewsets.ModelViewSet):
     serializer_class = TimeSlotSerializer
     permission_classes = [permissions.IsAdminUser]
 
-class TechnicianScheduleViewSet(viewsets.ModelViewSet):
+class TechnicianScheduleViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows technician schedules to be viewed or edited.
     """
@@ -94,10 +95,10 @@ class TechnicianScheduleViewSet(viewsets.ModelViewSet):
             is_available=True
         )
         
-        serializer = self.get_serializer(schedules, many=True)
+        serializer = self.get_serializer(self.eager_load(schedules), many=True)
         return Response(serializer.data)
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows appointments to be viewed or edited.
     """
@@ -183,5 +184,5 @@ class AppointmentViewSet(viewsets.ModelViewSet):
                 date__lte=next_week
             )
             
-        serializer = self.get_serializer(appointments, many=True)
+        serializer = self.get_serializer(self.eager_load(appointments), many=True)
         return Response(serializer.data) 
\ No newline at end of file
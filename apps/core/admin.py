@@ -1,5 +1,58 @@
+import uuid
+
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils.translation import gettext_lazy as _
+from .forms import CSVImportForm
+from .imports import IMPORTERS
 from .models import Profile, FAQ, FAQInteraction, UserSettings
+from .tasks import import_csv_file
+
+class CSVImportAdminMixin:
+    """
+    Adds an "Import CSV" page to a model admin. Uploads of ``import_kind``
+    rows are imported by a Celery worker, see ``apps.core.imports``, which
+    emails the result and the rejected rows to the uploader.
+    """
+    import_kind = None
+    change_list_template = 'admin/csv_import_change_list.html'
+
+    def get_urls(self):
+        opts = self.model._meta
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name=f'{opts.app_label}_{opts.model_name}_import'
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        opts = self.model._meta
+        form = CSVImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            name = default_storage.save(f'imports/{uuid.uuid4().hex}/{upload.name}', upload)
+            transaction.on_commit(lambda: import_csv_file.delay(self.import_kind, name, request.user.id))
+            self.message_user(request, _('The file is being imported, the result will be emailed to you.'))
+            return redirect(f'admin:{opts.app_label}_{opts.model_name}_changelist')
+
+        importer = IMPORTERS[self.import_kind]
+        return TemplateResponse(request, 'admin/csv_import.html', {
+            **self.admin_site.each_context(request),
+            'opts': opts,
+            'title': _('Import %s') % opts.verbose_name_plural,
+            'form': form,
+            'columns': (*importer.columns, *importer.lookup_columns),
+            'required': importer.required,
+        })
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
@@ -9,10 +62,11 @@ class ProfileAdmin(admin.ModelAdmin):
 
 @admin.register(FAQ)
 class FAQAdmin(admin.ModelAdmin):
-    list_display = ('question', 'category', 'is_published', 'order')
+    list_display = ('question', 'category', 'is_published', 'order', 'views')
     list_filter = ('category', 'is_published')
     search_fields = ('question', 'answer')
     list_editable = ('is_published', 'order')
+    readonly_fields = ('views',)
 
 @admin.register(FAQInteraction)
 class FAQInteractionAdmin(admin.ModelAdmin):
@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 
+from .counters import faq_views
+from .pagination import KeysetPagination
 from .models import Profile, FAQ, FAQInteraction
 from .serializers import ProfileSerializer, FAQSerializer, FAQInteractionSerializer
 
@@ -33,6 +35,14 @@ class FAQViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = FAQSerializer
     permission_classes = [permissions.AllowAny]
     
+    def get_object(self):
+        # Include views that have not been flushed yet
+        return faq_views.with_pending([super().get_object()])[0]
+    
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return faq_views.with_pending(page) if page is not None else None
+    
     @action(detail=True, methods=['post'], permission_classes=[permissions.AllowAny])
     def interaction(self, request, pk=None):
         """
@@ -50,7 +60,11 @@ class FAQViewSet(viewsets.ReadOnlyModelViewSet):
         serializer = FAQInteractionSerializer(data=request.data)
         
         if serializer.is_valid():
-            serializer.save(faq=faq, user=user, ip_address=ip_address)
+            if serializer.validated_data['interaction_type'] == 'view':
+                # Views are counted through the buffer instead of a row per view
+                faq_views.increment(faq.pk)
+            else:
+                serializer.save(faq=faq, user=user, ip_address=ip_address)
             return Response({"status": "interaction recorded"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
     
@@ -69,6 +83,8 @@ class FAQInteractionViewSet(viewsets.ModelViewSet):
     API endpoint for FAQ interactions
     """
     serializer_class = FAQInteractionSerializer
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     
     def get_permissions(self):
         """
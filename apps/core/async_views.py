@@ -0,0 +1,115 @@
+"""
+Helpers for async views.
+
+Django's async ORM runs every query on one shared thread, so awaiting
+several querysets in an async view still runs them one after the other.
+``gather`` instead runs independent sync callables, e.g. a ``count()`` or a
+queryset evaluated with ``list()``, in worker threads with their own
+database connections so their queries overlap::
+
+    open_count, recent = await gather(
+        lambda: tickets.filter(status__in=Ticket.OPEN_STATUSES).count(),
+        lambda: list(tickets.order_by('-created_at')[:5]),
+    )
+
+The callables run on a pool of ``ASYNC_GATHER_CONNECTIONS`` threads shared
+by every request of the process, whether served by ASGI or by WSGI threads
+(where each request gets its own event loop), further callables wait for a
+free thread. Each thread keeps its connection open for the next callable, so
+the database's connection limit must cover that many per worker process on
+top of the request connections. On SQLite, and inside a transaction (e.g. in
+tests), other connections would not see the same rows, so the callables run
+one after the other on the request's connection instead.
+
+Templates may touch lazy relations and ``request.user``, so async views
+render with ``render_async``. Django 5.0's ``login_required`` does not
+support async views, ``async_login_required`` takes its place.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
+from django.core.signals import setting_changed
+from django.db import connection, connections
+from django.dispatch import receiver
+from django.shortcuts import render
+
+# Worker connections idle for longer are reopened instead of risking a server side timeout
+WORKER_CONNECTION_IDLE_SECONDS = 300
+
+
+def _runs_concurrently():
+    return connection.vendor != 'sqlite' and not connection.in_atomic_block
+
+
+_worker = threading.local()
+
+
+def _run_in_worker(func):
+    if time.monotonic() - getattr(_worker, 'last_used', 0) > WORKER_CONNECTION_IDLE_SECONDS:
+        connections.close_all()
+    try:
+        return func()
+    finally:
+        _worker.last_used = time.monotonic()
+        # Keep the thread's connection for the next callable unless a query failed on it
+        for conn in connections.all(initialized_only=True):
+            if conn.errors_occurred:
+                conn.close()
+
+
+# Worker threads of the process, shared by all its requests and event loops
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(getattr(settings, 'ASYNC_GATHER_CONNECTIONS', 8), 1),
+                thread_name_prefix='gather'
+            )
+        return _pool
+
+
+@receiver(setting_changed)
+def _reset_worker_pool(setting, **kwargs):
+    global _pool
+    if setting == 'ASYNC_GATHER_CONNECTIONS':
+        with _pool_lock:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = None
+
+
+async def gather(*callables):
+    """Run independent sync ORM callables concurrently and return their results in order"""
+    if not await sync_to_async(_runs_concurrently)():
+        return await sync_to_async(lambda: [func() for func in callables])()
+    pool = _worker_pool()
+    return await asyncio.gather(
+        *(sync_to_async(_run_in_worker, thread_sensitive=False, executor=pool)(func) for func in callables)
+    )
+
+
+async def render_async(request, template_name, context=None):
+    """``render`` for async views, run on the sync thread"""
+    return await sync_to_async(render)(request, template_name, context)
+
+
+def async_login_required(view):
+    """``login_required`` for async views"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,206 @@
+"""
+Benchmarks of the main pages and API endpoints.
+
+``run_benchmarks`` requests the ``ENDPOINTS`` in process through the test
+client, anonymously or as a customer or technician, and records for each:
+
+- the number of database queries,
+- the median wall time over ``repeat`` requests, after a warm-up one,
+- the peak Python memory allocated while serving one request.
+
+Results of two runs against the same dataset, e.g. one generated by
+``generate_load_dataset``, are compared with ``compare``::
+
+    results = run_benchmarks(customer, technician, repeat=5)
+    regressions = compare(baseline, results, tolerance=0.2)
+
+The ``benchmark`` management command saves and compares result files.
+"""
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from knox.models import AuthToken
+
+from apps.accounts.models import User
+from apps.kb.models import KnowledgeBaseArticle
+from apps.tickets.models import Ticket
+
+# (name, role, url name, sample object passed as the url argument, query string)
+ENDPOINTS = (
+    ('home', None, 'core:home', None, ''),
+    ('services', None, 'core:service_list', None, ''),
+    ('faq', None, 'core:faq', None, ''),
+    ('dashboard', 'customer', 'core:dashboard', None, ''),
+    ('tickets', 'customer', 'core:tickets', None, ''),
+    ('ticket detail', 'customer', 'core:ticket_detail', 'customer_ticket', ''),
+    ('profile', 'customer', 'core:profile', None, ''),
+    ('technician dashboard', 'technician', 'core:technician_dashboard', None, ''),
+    ('technician tickets', 'technician', 'core:technician_tickets', None, ''),
+    ('technician ticket detail', 'technician', 'core:technician_ticket_detail', 'technician_ticket', ''),
+    ('knowledge base', 'technician', 'core:technician_knowledge_base', None, ''),
+    ('knowledge base search', 'technician', 'core:technician_knowledge_base_search', None, 'q=printer+restart'),
+    ('article detail', 'technician', 'core:technician_article_detail', 'article', ''),
+    ('api tickets', 'technician', 'tickets:ticket-list', None, ''),
+    ('api ticket detail', 'technician', 'tickets:ticket-detail', 'technician_ticket', ''),
+    ('api comments', 'technician', 'tickets:comment-list', None, ''),
+    ('api customer tickets', 'customer', 'tickets:ticket-list', None, ''),
+    ('api invoices', 'customer', 'payments:invoice-list', None, ''),
+    ('api services', 'customer', 'services:service-list', None, ''),
+)
+
+# Differences below this many milliseconds are noise, whatever the tolerance
+TIME_NOISE_MS = 5
+
+
+class QueryCounter:
+    """
+    Counts the queries of every database connection while active, including
+    the ones async views open in worker threads.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def _install(self, sender=None, connection=None, **kwargs):
+        with self._lock:
+            if self not in connection.execute_wrappers:
+                connection.execute_wrappers.append(self)
+                self._connections.append(connection)
+
+    def __enter__(self):
+        connection_created.connect(self._install)
+        self._install(connection=connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._install)
+        for wrapped in self._connections:
+            if self in wrapped.execute_wrappers:
+                wrapped.execute_wrappers.remove(self)
+
+
+def default_users():
+    """The customer with the most tickets and the technician with the most assigned tickets"""
+    customer = User.objects.filter(role=User.Roles.CUSTOMER).annotate(
+        ticket_count=Count('created_tickets')
+    ).order_by('-ticket_count', 'id').first()
+    technician = User.objects.filter(role=User.Roles.TECHNICIAN).annotate(
+        ticket_count=Count('assigned_tickets')
+    ).order_by('-ticket_count', 'id').first()
+    return customer, technician
+
+
+def sample_objects(customer, technician):
+    """Ids of the objects the detail endpoints are requested for"""
+    return {
+        'customer_ticket': Ticket.objects.filter(created_by=customer).values_list('id', flat=True).first(),
+        'technician_ticket': Ticket.objects.filter(assigned_to=technician).values_list('id', flat=True).first(),
+        'article': KnowledgeBaseArticle.objects.filter(
+            status=KnowledgeBaseArticle.Status.PUBLISHED
+        ).order_by('-views').values_list('id', flat=True).first(),
+    }
+
+
+def benchmark_host():
+    """A host the ALLOWED_HOSTS check accepts"""
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*':
+            return host.lstrip('.')
+    return 'testserver'
+
+
+def measure(client, url, repeat=5, **extra):
+    """Return ``{status, queries, ms, peak_kib}`` for requesting ``url`` with ``client``"""
+    secure = settings.SECURE_SSL_REDIRECT
+    client.get(url, secure=secure, **extra)  # Warm caches and imports
+
+    timings = []
+    for _ in range(max(repeat, 1)):
+        with QueryCounter() as queries:
+            started = time.perf_counter()
+            response = client.get(url, secure=secure, **extra)
+            timings.append((time.perf_counter() - started) * 1000)
+
+    # Tracing slows requests down, so memory is measured separately
+    tracemalloc.start()
+    try:
+        client.get(url, secure=secure, **extra)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'queries': queries.count,
+        'ms': round(statistics.median(timings), 2),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run_benchmarks(customer, technician, repeat=5, names=None):
+    """Measure the ``ENDPOINTS`` (those in ``names`` only when given), returns ``{name: result}``"""
+    host = benchmark_host()
+    clients = {None: (Client(raise_request_exception=False, HTTP_HOST=host), {})}
+    tokens = []
+    for role, user in (('customer', customer), ('technician', technician)):
+        if user is None:
+            continue
+        client = Client(raise_request_exception=False, HTTP_HOST=host)
+        client.force_login(user)
+        token, key = AuthToken.objects.create(user)
+        tokens.append(token)
+        clients[role] = (client, {'HTTP_AUTHORIZATION': f'Token {key}'})
+    samples = sample_objects(customer, technician)
+
+    results = {}
+    try:
+        for name, role, url_name, sample, query in ENDPOINTS:
+            if names and name not in names:
+                continue
+            if role not in clients or (sample and samples[sample] is None):
+                continue
+            client, api_headers = clients[role]
+            url = reverse(url_name, args=[samples[sample]] if sample else None)
+            if query:
+                url = f'{url}?{query}'
+            extra = api_headers if url.startswith('/api/') else {}
+            results[name] = measure(client, url, repeat, **extra)
+    finally:
+        for token in tokens:
+            token.delete()
+    return results
+
+
+def compare(baseline, results, tolerance=0.2):
+    """
+    Return ``[(name, metric, before, after)]`` for the endpoints that got
+    worse than ``baseline``: any extra query, or time and memory growing by
+    more than ``tolerance``.
+    """
+    regressions = []
+    for name, after in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if after['queries'] > before['queries']:
+            regressions.append((name, 'queries', before['queries'], after['queries']))
+        if after['ms'] > before['ms'] * (1 + tolerance) and after['ms'] - before['ms'] > TIME_NOISE_MS:
+            regressions.append((name, 'ms', before['ms'], after['ms']))
+        if after['peak_kib'] > before['peak_kib'] * (1 + tolerance):
+            regressions.append((name, 'peak_kib', before['peak_kib'], after['peak_kib']))
+    return regressions
@@ -0,0 +1,122 @@
+"""
+Application cache helpers.
+
+Keys are built from a name, optional parts and the current version of every
+tag the value depends on::
+
+    overview = cached('dashboard:overview', build_overview, parts=[period], tags=['tickets'])
+
+Invalidating a tag bumps its version, which changes every key built with it,
+so stale values are simply never read again and expire on their own. Tag
+versions are always read from the shared cache tier, which keeps
+invalidation immediate across processes even with a per-process local tier.
+"""
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every key built by this module, e.g. when cached values change shape
+KEY_VERSION = 1
+
+DEFAULT_TIMEOUT = 300
+
+# Tags used across the project
+TICKETS = 'tickets'
+SERVICES = 'services'
+FAQS = 'faqs'
+KNOWLEDGE_BASE = 'kb'
+
+
+def _tag_store():
+    # Tag versions must not be served from a per-process tier
+    return getattr(cache, 'remote', cache)
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def tag_versions(tags):
+    """Return ``{tag: version}``, initialising versions for unknown tags"""
+    store = _tag_store()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = store.get_many(list(keys))
+    for key, tag in keys.items():
+        if key not in versions:
+            # Time based start values avoid reusing versions after an eviction
+            store.add(key, time.time_ns(), None)
+            versions[key] = store.get(key, 0)
+    return {tag: versions[key] for key, tag in keys.items()}
+
+
+def make_key(name, parts=(), tags=()):
+    """Build a cache key for ``name`` that changes whenever one of ``tags`` is invalidated"""
+    segments = [f'v{KEY_VERSION}', name]
+    segments.extend(str(part) for part in parts)
+    versions = tag_versions(sorted(tags))
+    segments.extend(f'{tag}.{version}' for tag, version in versions.items())
+    return ':'.join(segments)
+
+
+def cached(name, compute, parts=(), tags=(), timeout=DEFAULT_TIMEOUT):
+    """
+    Return the cached value for ``name``/``parts``, calling ``compute()`` and
+    storing its result on a miss. ``compute`` must return picklable values,
+    evaluate querysets before returning them.
+    """
+    try:
+        key = make_key(name, parts, tags)
+    except Exception as e:
+        # Without tag versions nothing can be cached safely
+        logger.warning(f"Cache unavailable for {name}: {str(e)}")
+        return compute()
+    missing = object()
+    value = cache.get(key, missing)
+    if value is missing:
+        value = compute()
+        cache.set(key, value, timeout)
+    return value
+
+
+async def cached_async(name, compute, parts=(), tags=(), timeout=DEFAULT_TIMEOUT):
+    """``cached`` for async views, ``compute`` is a coroutine function"""
+    try:
+        key = await sync_to_async(make_key)(name, parts, tags)
+    except Exception as e:
+        logger.warning(f"Cache unavailable for {name}: {str(e)}")
+        return await compute()
+    missing = object()
+    value = await cache.aget(key, missing)
+    if value is missing:
+        value = await compute()
+        await cache.aset(key, value, timeout)
+    return value
+
+
+def invalidate(*tags):
+    """Invalidate every key built with any of ``tags``"""
+    store = _tag_store()
+    for tag in tags:
+        try:
+            store.incr(_tag_key(tag))
+        except ValueError:
+            store.set(_tag_key(tag), time.time_ns(), None)
+
+
+def invalidate_on_commit(*tags):
+    """
+    Invalidate ``tags`` once the current transaction commits, so readers
+    cannot re-cache data the transaction is about to replace. Used by the
+    model signals, failures are logged rather than breaking the save.
+    """
+    def _invalidate():
+        try:
+            invalidate(*tags)
+        except Exception as e:
+            logger.error(f"Error invalidating cache tags {tags}: {str(e)}")
+    transaction.on_commit(_invalidate)
@@ -0,0 +1,134 @@
+"""
+Two-tier cache backend.
+
+A small per-process LRU (usually ``LocMemCache``) sits in front of a shared
+cache (usually ``RedisCache``). Reads hit the local tier first and fall back
+to the shared tier, values found there are copied into the local tier for at
+most ``LOCAL_TIMEOUT`` seconds. Writes and deletes go to both tiers.
+
+Entries in the local tier of other processes are not invalidated by a delete,
+so anything that must be visible everywhere immediately should be reached
+through keys that change when the data changes (see ``apps.core.cache``).
+
+Configuration::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'apps.core.cache_backends.TieredCache',
+            'OPTIONS': {
+                'LOCAL_CACHE': 'local',
+                'REMOTE_CACHE': 'redis',
+                'LOCAL_TIMEOUT': 10,
+            },
+        },
+        'local': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+        'redis': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', ...},
+    }
+"""
+import logging
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache(BaseCache):
+    """Cache backend reading through a local LRU tier into a shared tier"""
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__(params)
+        self._local_alias = options.get('LOCAL_CACHE', 'local')
+        self._remote_alias = options.get('REMOTE_CACHE', 'redis')
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 10)
+
+    @property
+    def local(self):
+        return caches[self._local_alias]
+
+    @property
+    def remote(self):
+        """The shared tier, use it directly for values that must never be stale"""
+        return caches[self._remote_alias]
+
+    def _local_expiry(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return self.local_timeout
+        return min(timeout, self.local_timeout)
+
+    def _remote_call(self, method, *args, default=None, **kwargs):
+        # An unavailable shared tier degrades to a cache miss instead of an error
+        try:
+            return getattr(self.remote, method)(*args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Shared cache '{self._remote_alias}' {method} failed: {str(e)}")
+            return default
+
+    def get(self, key, default=None, version=None):
+        missing = object()
+        value = self.local.get(key, missing, version=version)
+        if value is not missing:
+            return value
+        value = self._remote_call('get', key, missing, version=version, default=missing)
+        if value is missing:
+            return default
+        self.local.set(key, value, self.local_timeout, version=version)
+        return value
+
+    def get_many(self, keys, version=None):
+        found = self.local.get_many(keys, version=version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            remote = self._remote_call('get_many', missing, version=version, default={})
+            if remote:
+                self.local.set_many(remote, self.local_timeout, version=version)
+            found.update(remote)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._remote_call('set', key, value, timeout, version=version)
+        self.local.set(key, value, self._local_expiry(timeout), version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self._remote_call('set_many', data, timeout, version=version, default=[])
+        self.local.set_many(data, self._local_expiry(timeout), version=version)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self._remote_call('add', key, value, timeout, version=version, default=False)
+        if added:
+            self.local.set(key, value, self._local_expiry(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self.local.touch(key, self._local_expiry(timeout), version=version)
+        return self._remote_call('touch', key, timeout, version=version, default=False)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters live in the shared tier only, a local copy would drift
+        self.local.delete(key, version=version)
+        return self.remote.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(key, version=version)
+        return self._remote_call('delete', key, version=version, default=False)
+
+    def delete_many(self, keys, version=None):
+        self.local.delete_many(keys, version=version)
+        self._remote_call('delete_many', keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.local.has_key(key, version=version) or bool(
+            self._remote_call('has_key', key, version=version, default=False)
+        )
+
+    def clear(self):
+        self.local.clear()
+        self._remote_call('clear')
+
+    def close(self, **kwargs):
+        self.local.close(**kwargs)
+        self.remote.close(**kwargs)
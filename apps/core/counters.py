@@ -0,0 +1,187 @@
+"""
+Buffered counters.
+
+Hot counters such as article views are not written to the database on every
+hit. ``increment`` adds to a per-object delta in a Redis hash on the shared
+cache tier, or in an in-process buffer when there is no Redis tier, and
+``flush`` writes the pending deltas with one ``CASE`` UPDATE per batch::
+
+    article_views.increment(article.pk)
+    article_views.with_pending([article])  # article.views includes the delta
+    article_views.flush()                  # run periodically by flush_view_counters
+
+Redis deltas are taken with HGETALL and DEL in one transaction, so increments
+arriving during a flush are kept for the next one.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.core.cache import cache
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 500
+
+# In-process buffers are flushed by the process that holds them
+LOCAL_FLUSH_INTERVAL = 30
+LOCAL_MAX_PENDING = 1000
+
+
+def _redis_backend():
+    """Return the Redis cache backend of the shared tier, or None"""
+    backend = getattr(cache, 'remote', cache)
+    if not hasattr(getattr(backend, '_cache', None), 'get_client'):
+        return None
+    return backend
+
+
+class BufferedCounter:
+    """An integer model field incremented through a write buffer"""
+
+    def __init__(self, name, model, field):
+        self.name = name
+        self.model_label = model
+        self.field = field
+        self._local = Counter()
+        self._lock = threading.Lock()
+        self._last_local_flush = time.monotonic()
+
+    def __repr__(self):
+        return f'<BufferedCounter {self.name}>'
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def _redis(self):
+        backend = _redis_backend()
+        if backend is None:
+            return None, None
+        return backend._cache.get_client(write=True), backend.make_key(f'counter:{self.name}')
+
+    def _buffer(self, pk, amount):
+        # Returns True when the in-process buffer is due for a flush
+        try:
+            client, key = self._redis()
+            if client is not None:
+                client.hincrby(key, pk, amount)
+                return False
+        except Exception as e:
+            logger.warning(f"Buffering {self.name} in process, Redis unavailable: {str(e)}")
+
+        with self._lock:
+            self._local[pk] += amount
+            return (
+                len(self._local) >= LOCAL_MAX_PENDING
+                or time.monotonic() - self._last_local_flush >= LOCAL_FLUSH_INTERVAL
+            )
+
+    def increment(self, pk, amount=1):
+        """Add ``amount`` to the buffered delta of object ``pk``"""
+        if self._buffer(pk, amount):
+            self._flush_local()
+
+    def pending(self, pks):
+        """Return ``{pk: delta}`` for the objects in ``pks`` with buffered increments"""
+        pks = list(pks)
+        deltas = Counter()
+        if not pks:
+            return deltas
+        try:
+            client, key = self._redis()
+            if client is not None:
+                for pk, value in zip(pks, client.hmget(key, pks)):
+                    if value is not None:
+                        deltas[pk] += int(value)
+        except Exception as e:
+            logger.warning(f"Cannot read buffered {self.name}: {str(e)}")
+        with self._lock:
+            for pk in pks:
+                if pk in self._local:
+                    deltas[pk] += self._local[pk]
+        return deltas
+
+    def with_pending(self, objects):
+        """Add the buffered deltas to the counter field of ``objects`` and return them"""
+        objects = list(objects)
+        deltas = self.pending(obj.pk for obj in objects)
+        for obj in objects:
+            if deltas.get(obj.pk):
+                setattr(obj, self.field, (getattr(obj, self.field) or 0) + deltas[obj.pk])
+        return objects
+
+    def _take_redis(self):
+        client, key = self._redis()
+        if client is None:
+            return Counter()
+        with client.pipeline(transaction=True) as pipe:
+            pipe.hgetall(key)
+            pipe.delete(key)
+            values, _ = pipe.execute()
+        return Counter({int(pk): int(value) for pk, value in values.items() if int(value)})
+
+    def _take_local(self):
+        with self._lock:
+            deltas, self._local = self._local, Counter()
+            self._last_local_flush = time.monotonic()
+        return deltas
+
+    def _restore(self, deltas):
+        # Put deltas back after a failed write so they are retried on the next flush
+        for pk, amount in deltas.items():
+            self._buffer(pk, amount)
+
+    def _write(self, deltas, batch_size=FLUSH_BATCH_SIZE):
+        field = self.field
+        manager = self.model._base_manager
+        items = sorted(deltas.items())
+        updated = 0
+        for start in range(0, len(items), batch_size):
+            batch = items[start:start + batch_size]
+            updated += manager.filter(pk__in=[pk for pk, _ in batch]).update(**{
+                field: F(field) + Case(
+                    *[When(pk=pk, then=Value(amount)) for pk, amount in batch],
+                    default=Value(0),
+                    output_field=IntegerField(),
+                )
+            })
+        return updated
+
+    def _flush(self, deltas):
+        if not deltas:
+            return 0
+        try:
+            return self._write(deltas)
+        except Exception:
+            self._restore(deltas)
+            raise
+
+    def _flush_local(self):
+        try:
+            self._flush(self._take_local())
+        except Exception as e:
+            logger.error(f"Error flushing buffered {self.name}: {str(e)}")
+
+    def flush(self):
+        """Write every buffered delta to the database, returns the number of updated rows"""
+        deltas = self._take_local()
+        try:
+            deltas.update(self._take_redis())
+        except Exception as e:
+            logger.warning(f"Cannot take buffered {self.name} from Redis: {str(e)}")
+        return self._flush(deltas)
+
+
+article_views = BufferedCounter('kb_article_views', 'kb.KnowledgeBaseArticle', 'views')
+faq_views = BufferedCounter('faq_views', 'core.FAQ', 'views')
+
+COUNTERS = (article_views, faq_views)
+
+
+def flush_counters():
+    """Flush every buffered counter, returns ``{name: updated rows}``"""
+    return {counter.name: counter.flush() for counter in COUNTERS}
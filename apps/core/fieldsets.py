@@ -0,0 +1,55 @@
+"""
+Sparse fieldsets for API serializers.
+
+``?fields=id,title,status`` limits a response to the listed fields and
+``?expand=comments,attachments`` adds nested representations a serializer
+leaves out by default. Serializers list the optional ones on ``Meta``::
+
+    class Meta:
+        expandable_fields = {
+            'comments': (TicketCommentSerializer, {'many': True, 'read_only': True}),
+        }
+
+Expanded fields become regular nested serializers, so ``apps.core.prefetch``
+only eager loads them when they are requested.
+"""
+from rest_framework import permissions
+
+
+def parse_field_list(value):
+    """Split a comma separated query parameter into a set of names"""
+    return {name.strip() for name in (value or '').split(',') if name.strip()}
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin accepting ``fields`` and ``expand`` keyword arguments"""
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = set(expand or ())
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        for name in expand.intersection(expandable):
+            serializer_class, options = expandable[name]
+            self.fields[name] = serializer_class(**options)
+        if fields:
+            # Expanded fields are kept, asking for them implies wanting them
+            for name in set(self.fields) - set(fields) - expand:
+                self.fields.pop(name)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin passing the ``fields`` and ``expand`` query parameters of
+    read requests to serializers using ``SparseFieldsetMixin``.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        request = getattr(self, 'request', None)
+        if (
+            request is not None
+            and request.method in permissions.SAFE_METHODS
+            and issubclass(self.get_serializer_class(), SparseFieldsetMixin)
+        ):
+            kwargs.setdefault('fields', parse_field_list(request.query_params.get('fields')))
+            kwargs.setdefault('expand', parse_field_list(request.query_params.get('expand')))
+        return super().get_serializer(*args, **kwargs)
@@ -100,4 +100,15 @@ class FAQFeedbackForm(forms.Form):
     """Form for collecting feedback on FAQs"""
     faq_id = forms.IntegerField(widget=forms.HiddenInput())
     helpful = forms.BooleanField(required=False)
-    comment = forms.CharField(widget=forms.Textarea(attrs={'rows': 2}), required=False) 
\ No newline at end of file
+    comment = forms.CharField(widget=forms.Textarea(attrs={'rows': 2}), required=False) 
+
+class CSVImportForm(forms.Form):
+    """Upload of a CSV file to import from the admin"""
+    file = forms.FileField(help_text=_('UTF-8 CSV file with a header row'))
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if not upload.name.lower().endswith('.csv'):
+            raise forms.ValidationError(_('Upload a .csv file.'))
+        return upload
+
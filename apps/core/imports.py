@@ -0,0 +1,509 @@
+"""
+Bulk CSV imports.
+
+``import_csv`` loads users, services, tickets or ticket comments from a CSV
+file, e.g. one exported from another helpdesk. The file is read as a stream
+and handled in chunks: each row is validated like a model form would, its
+foreign keys resolved through in-memory maps (users by email, services by
+name) and the valid rows of the chunk inserted with ``bulk_create`` in one
+transaction::
+
+    with open('tickets.csv', newline='') as source, open('errors.csv', 'w', newline='') as errors:
+        result = import_csv('tickets', source, errors)
+
+Bulk inserts skip ``save`` and the model signals, so no notification is
+sent. What they would have written, profiles, SLA deadlines, status events
+and first responses, is built alongside the rows, and the metrics rollups
+and caches are refreshed once at the end.
+
+Rejected rows are written to the ``errors`` report: the CSV with the row
+number and errors of each of them, ready to be fixed and imported again.
+The ``import_data`` command and the admin upload run imports.
+"""
+import csv
+import io
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import DatabaseError, connection, models, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from apps.accounts.models import User
+from apps.services.models import Service
+from apps.tickets.models import SLAPolicy, Ticket, TicketComment, TicketStatusEvent
+from apps.tickets.summaries import rebuild_summaries
+from . import cache
+from .models import Profile
+from .pagination import TRUE_VALUES
+
+IMPORT_CHUNK_SIZE = 1000
+
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+class _AsIsQuerySet(models.QuerySet):
+    def _insert(self, *args, **kwargs):
+        # Raw inserts take the values from the instances, as loaddata does,
+        # instead of letting auto_now and auto_now_add stamp the time of the insert
+        kwargs['raw'] = True
+        return super()._insert(*args, **kwargs)
+
+
+def auto_timestamps(model):
+    """The attnames of the ``auto_now`` and ``auto_now_add`` fields of ``model``"""
+    return [
+        field.attname for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+    ]
+
+
+def bulk_create_as_is(model, instances, **kwargs):
+    """
+    ``bulk_create`` keeping the timestamps set on ``instances``, those left
+    unset get the current time. Only this insert is affected, the model's
+    fields are not touched, so saves running meanwhile in other threads
+    keep their automatic timestamps.
+    """
+    now = timezone.now()
+    for attname in auto_timestamps(model):
+        for instance in instances:
+            if getattr(instance, attname) is None:
+                setattr(instance, attname, now)
+    return _AsIsQuerySet(model).bulk_create(instances, **kwargs)
+
+
+class Lookups:
+    """In-memory maps of the existing rows imported rows refer to, loaded on first use"""
+
+    def __init__(self):
+        self._users = None
+        self._usernames = None
+        self._services = None
+        self.staff = set()
+
+    @property
+    def users(self):
+        """``{lowercased email: id}``, ``staff`` holding the ids of technicians and admins"""
+        if self._users is None:
+            self._users = {}
+            rows = User.objects.values_list('email', 'id', 'is_staff', 'role').iterator(chunk_size=10000)
+            for email, user_id, is_staff, role in rows:
+                self._users[email.lower()] = user_id
+                if is_staff or role in TicketComment.STAFF_ROLES:
+                    self.staff.add(user_id)
+        return self._users
+
+    @property
+    def usernames(self):
+        if self._usernames is None:
+            self._usernames = set(User.objects.values_list('username', flat=True).iterator(chunk_size=10000))
+        return self._usernames
+
+    @property
+    def services(self):
+        """``{lowercased name: id}``"""
+        if self._services is None:
+            self._services = {name.lower(): service_id for name, service_id in Service.objects.values_list('name', 'id')}
+        return self._services
+
+    def user_id(self, email, column, errors, staff=False):
+        """The id of the user with ``email``, or None after adding an error for ``column``"""
+        user_id = self.users.get(email.lower())
+        if user_id is None:
+            errors[column] = [_('No user with this email.')]
+        elif staff and user_id not in self.staff:
+            errors[column] = [_('This user is not a technician or admin.')]
+        return user_id
+
+
+class Importer:
+    """
+    Builds and inserts the rows of ``model``. ``columns`` are copied to the
+    fields of the same name and ``required`` ones cannot be empty, foreign
+    keys are set from the ``lookup_columns`` by ``resolve``. ``insert`` adds
+    the rows a chunk derives and ``finish`` refreshes what depends on them.
+    """
+    model = None
+    columns = ()
+    required = ()
+    lookup_columns = ()
+
+    def __init__(self, lookups):
+        self.lookups = lookups
+        self.now = timezone.now()
+        self.exclude = [field.name for field in self.model._meta.concrete_fields if field.is_relation]
+        self.booleans = {
+            field.name for field in self.model._meta.concrete_fields if isinstance(field, models.BooleanField)
+        }
+        self.timestamps = auto_timestamps(self.model)
+
+    @property
+    def required_columns(self):
+        return [column for column in (*self.columns, *self.lookup_columns) if column in self.required]
+
+    def prepare(self, rows):
+        """Load what the rows of a chunk refer to"""
+
+    def build(self, row):
+        """The unsaved instance of ``row``, raises ``ValidationError`` for invalid rows"""
+        values = {}
+        errors = {}
+        for column in self.columns:
+            value = (row.get(column) or '').strip()
+            if not value:
+                if column in self.required:
+                    errors[column] = [_('This field is required.')]
+                continue
+            if column in self.booleans:
+                if value.lower() not in TRUE_VALUES + FALSE_VALUES:
+                    errors[column] = [_('Use true or false.')]
+                    continue
+                value = value.lower() in TRUE_VALUES
+            values[column] = value
+        for column in self.lookup_columns:
+            if column in self.required and not (row.get(column) or '').strip():
+                errors[column] = [_('This field is required.')]
+
+        instance = self.model(**values)
+        if not errors:
+            self.resolve(instance, row, errors)
+        try:
+            instance.full_clean(exclude=self.exclude + list(errors), validate_unique=False, validate_constraints=False)
+        except ValidationError as e:
+            for field, messages in e.message_dict.items():
+                errors.setdefault(field, []).extend(messages)
+        if errors:
+            raise ValidationError(errors)
+
+        for attname in self.timestamps:
+            if getattr(instance, attname) is None:
+                setattr(instance, attname, self.now)
+        self.complete(instance)
+        return instance
+
+    def resolve(self, instance, row, errors):
+        """Set the foreign keys of ``instance`` from ``row``, adding to ``errors`` what cannot be resolved"""
+
+    def complete(self, instance):
+        """Fill in what ``save`` would on a valid instance"""
+
+    def insert(self, instances):
+        bulk_create_as_is(self.model, instances)
+
+    def finish(self):
+        pass
+
+
+class UserImporter(Importer):
+    """
+    Users get an unusable password, they set one with the password reset
+    form. Usernames default to the email, as on registration.
+    """
+    model = User
+    columns = (
+        'email', 'username', 'first_name', 'last_name', 'phone', 'role', 'specialization',
+        'email_verified', 'date_joined',
+    )
+    required = ('email',)
+
+    def resolve(self, user, row, errors):
+        user.email = User.objects.normalize_email(user.email)
+        user.username = user.username or user.email
+        if user.email and user.email.lower() in self.lookups.users:
+            errors['email'] = [_('A user with this email already exists.')]
+        if user.username in self.lookups.usernames:
+            errors['username'] = [_('A user with that username already exists.')]
+        user.set_unusable_password()
+
+    def complete(self, user):
+        # Later rows of the file are checked against this one
+        self.lookups.users[user.email.lower()] = None
+        self.lookups.usernames.add(user.username)
+
+    def insert(self, users):
+        super().insert(users)
+        # Ids are read back by email, MySQL does not return them from bulk inserts
+        ids = dict(User.objects.filter(email__in=[user.email for user in users]).values_list('email', 'id'))
+        for user in users:
+            user.id = ids[user.email]
+            self.lookups.users[user.email.lower()] = user.id
+            if user.is_staff or user.role in TicketComment.STAFF_ROLES:
+                self.lookups.staff.add(user.id)
+        # The profile signal does not run for bulk inserts
+        Profile.objects.bulk_create([Profile(user_id=user.id) for user in users])
+
+
+class ServiceImporter(Importer):
+    model = Service
+    columns = ('name', 'description', 'category', 'price', 'price_period', 'is_featured', 'is_active')
+    required = ('name', 'description')
+
+    def resolve(self, service, row, errors):
+        if service.name and service.name.lower() in self.lookups.services:
+            errors['name'] = [_('A service with this name already exists.')]
+
+    def complete(self, service):
+        self.lookups.services[service.name.lower()] = None
+
+    def insert(self, services):
+        super().insert(services)
+        names = [service.name for service in services]
+        for name, service_id in Service.objects.filter(name__in=names).values_list('name', 'id'):
+            self.lookups.services[name.lower()] = service_id
+
+    def finish(self):
+        cache.invalidate(cache.SERVICES)
+
+
+class TicketImporter(Importer):
+    """
+    ``created_by`` and ``assigned_to`` are user emails, ``service`` a
+    service name. An ``id`` column keeps the ticket numbers of the old
+    system. Tickets get a creation status event and one to their status,
+    at ``resolved_at`` for resolved and closed tickets, the rollups and the
+    summaries of their creators are rebuilt at the end.
+
+    Without ``id`` on databases that do not return the ids of bulk inserts
+    (MySQL) ids are allocated after the highest one, tickets created
+    meanwhile can make a chunk fail, so such imports are best run while
+    the site is quiet.
+    """
+    model = Ticket
+    columns = (
+        'id', 'title', 'description', 'status', 'priority', 'category', 'device_type', 'device_model',
+        'contact_method', 'created_at', 'resolved_at', 'due_date',
+    )
+    lookup_columns = ('created_by', 'assigned_to', 'service')
+    required = ('title', 'description', 'created_by')
+
+    def __init__(self, lookups):
+        super().__init__(lookups)
+        self.targets = {}
+        self.ids = set()
+        self.explicit_ids = False
+        self.first_created = None
+        self.creators = set()
+
+    def prepare(self, rows):
+        ids = [row['id'].strip() for _, row in rows if (row.get('id') or '').strip().isdigit()]
+        self.existing = set(Ticket.objects.filter(id__in=ids).values_list('id', flat=True))
+
+    def resolve(self, ticket, row, errors):
+        ticket.created_by_id = self.lookups.user_id(row['created_by'].strip(), 'created_by', errors)
+        assignee = (row.get('assigned_to') or '').strip()
+        if assignee:
+            ticket.assigned_to_id = self.lookups.user_id(assignee, 'assigned_to', errors, staff=True)
+        service = (row.get('service') or '').strip()
+        if service:
+            ticket.service_id = self.lookups.services.get(service.lower())
+            if ticket.service_id is None:
+                errors['service'] = [_('No service with this name.')]
+
+    def build(self, row):
+        ticket = super().build(row)
+        if ticket.id is not None:
+            if ticket.id in self.existing or ticket.id in self.ids:
+                raise ValidationError({'id': [_('A ticket with this id already exists.')]})
+            self.ids.add(ticket.id)
+        return ticket
+
+    def complete(self, ticket):
+        key = (ticket.priority, ticket.service_id)
+        if key not in self.targets:
+            self.targets[key] = SLAPolicy.targets_for(*key)
+        ticket.schedule_sla(self.targets[key])
+        if ticket.sla_due_at < (ticket.resolved_at or self.now):
+            # Recorded by check_sla_breaches when the deadline passed
+            ticket.sla_breached_at = ticket.sla_due_at
+
+        changed_at = ticket.created_at
+        if ticket.status != Ticket.Status.NEW and ticket.resolved_at and ticket.status not in Ticket.OPEN_STATUSES:
+            changed_at = max(ticket.resolved_at, ticket.created_at)
+        ticket.status_changed_at = ticket.updated_at = ticket.last_updated = changed_at
+        ticket.imported_events = [
+            TicketStatusEvent(
+                from_status='', to_status=Ticket.Status.NEW, changed_by_id=ticket.created_by_id,
+                created_at=ticket.created_at,
+            )
+        ]
+        if ticket.status != Ticket.Status.NEW:
+            ticket.imported_events.append(TicketStatusEvent(
+                from_status=Ticket.Status.NEW, to_status=ticket.status, changed_by_id=ticket.assigned_to_id,
+                created_at=changed_at, status_seconds=int((changed_at - ticket.created_at).total_seconds()),
+            ))
+        if self.first_created is None or ticket.created_at < self.first_created:
+            self.first_created = ticket.created_at
+
+    def insert(self, tickets):
+        if not connection.features.can_return_rows_from_bulk_insert:
+            next_id = max(Ticket.objects.aggregate(last=Max('id'))['last'] or 0, *self.ids, 0) + 1
+            for ticket in tickets:
+                if ticket.id is None:
+                    ticket.id = next_id
+                    self.ids.add(next_id)
+                    next_id += 1
+        self.explicit_ids = self.explicit_ids or any(ticket.id is not None for ticket in tickets)
+        super().insert(tickets)
+        self.creators.update(ticket.created_by_id for ticket in tickets)
+        events = []
+        for ticket in tickets:
+            for event in ticket.imported_events:
+                event.ticket_id = ticket.id
+                events.append(event)
+        TicketStatusEvent.objects.bulk_create(events)
+
+    def finish(self):
+        if self.explicit_ids:
+            # Move the id sequence past the inserted ids
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), [Ticket]):
+                    cursor.execute(sql)
+        if self.first_created is not None:
+            call_command('backfill_ticket_rollups', since=f'{self.first_created:%Y-%m-%d}', stdout=io.StringIO())
+        rebuild_summaries(self.creators)
+        cache.invalidate(cache.TICKETS)
+
+
+class CommentImporter(Importer):
+    """
+    ``ticket`` is a ticket id and ``author`` a user email. The first
+    responses of the tickets are updated as ``record_first_response`` does.
+    """
+    model = TicketComment
+    columns = ('content', 'created_at', 'is_internal')
+    lookup_columns = ('ticket', 'author')
+    required = ('content', 'ticket', 'author')
+
+    def __init__(self, lookups):
+        super().__init__(lookups)
+        self.first_created = None
+
+    def prepare(self, rows):
+        ids = [row['ticket'].strip() for _, row in rows if (row.get('ticket') or '').strip().isdigit()]
+        self.tickets = Ticket.objects.only(
+            'id', 'created_by_id', 'created_at', *Ticket.RESPONSE_FIELDS
+        ).in_bulk([int(ticket_id) for ticket_id in ids])
+        self.changed = {}
+
+    def resolve(self, comment, row, errors):
+        ticket_id = row['ticket'].strip()
+        comment.ticket_id = int(ticket_id) if ticket_id.isdigit() else None
+        if comment.ticket_id not in self.tickets:
+            errors['ticket'] = [_('No ticket with this id.')]
+        comment.author_id = self.lookups.user_id(row['author'].strip(), 'author', errors)
+
+    def complete(self, comment):
+        ticket = self.tickets[comment.ticket_id]
+        if comment.author_id == ticket.created_by_id:
+            return
+        if ticket.first_response_at is None or comment.created_at < ticket.first_response_at:
+            ticket.first_response_at = comment.created_at
+            ticket.first_response_by_id = comment.author_id
+            self.changed[ticket.id] = ticket
+        if comment.author_id in self.lookups.staff and (ticket.first_staff_response_at is None or comment.created_at < ticket.first_staff_response_at):
+            ticket.first_staff_response_at = comment.created_at
+            self.changed[ticket.id] = ticket
+
+    def insert(self, comments):
+        super().insert(comments)
+        Ticket.objects.bulk_update(self.changed.values(), Ticket.RESPONSE_FIELDS)
+        for ticket in self.changed.values():
+            if self.first_created is None or ticket.created_at < self.first_created:
+                self.first_created = ticket.created_at
+
+    def finish(self):
+        if self.first_created is not None:
+            call_command('backfill_ticket_rollups', since=f'{self.first_created:%Y-%m-%d}', stdout=io.StringIO())
+        cache.invalidate(cache.TICKETS)
+
+
+IMPORTERS = {
+    'users': UserImporter,
+    'services': ServiceImporter,
+    'tickets': TicketImporter,
+    'comments': CommentImporter,
+}
+
+
+class ImportResult:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.seconds = 0.0
+
+    @property
+    def rows(self):
+        return self.imported + self.failed
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (
+            f'{self.imported} imported, {self.failed} failed in {self.seconds:.1f}s '
+            f'({self.rows_per_second:.0f} rows/s)'
+        )
+
+
+def error_messages(error):
+    return '; '.join(
+        f'{field}: {" ".join(messages)}' if field != '__all__' else ' '.join(messages)
+        for field, messages in error.message_dict.items()
+    )
+
+
+def import_csv(kind, source, errors=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+    Import the rows of the ``source`` CSV file object as ``kind``, one of
+    ``IMPORTERS``, writing the rejected rows to the ``errors`` file object
+    when given. ``progress`` is called with the ``ImportResult`` after each
+    chunk. Raises ``ValueError`` when required columns are missing.
+    """
+    importer = IMPORTERS[kind](Lookups())
+    reader = csv.DictReader(source)
+    columns = [name.strip() for name in reader.fieldnames or ()]
+    reader.fieldnames = columns
+    missing = [column for column in importer.required_columns if column not in columns]
+    if missing:
+        raise ValueError(f'Missing columns: {", ".join(missing)}')
+
+    report = csv.writer(errors) if errors is not None else None
+    if report:
+        report.writerow(['row', 'errors', *columns])
+
+    def reject(number, row, message):
+        result.failed += 1
+        if report:
+            report.writerow([number, message, *(row.get(column) for column in columns)])
+
+    result = ImportResult()
+    started = time.perf_counter()
+    rows = enumerate(reader, start=1)
+    while chunk := list(islice(rows, chunk_size)):
+        importer.prepare(chunk)
+        valid = []
+        for number, row in chunk:
+            try:
+                valid.append((number, row, importer.build(row)))
+            except ValidationError as e:
+                reject(number, row, error_messages(e))
+        try:
+            with transaction.atomic():
+                importer.insert([instance for _, _, instance in valid])
+            result.imported += len(valid)
+        except DatabaseError as e:
+            # E.g. a row created meanwhile by the site, the whole chunk is rolled back
+            for number, row, _ in valid:
+                reject(number, row, f'Chunk not inserted: {e}')
+        result.seconds = time.perf_counter() - started
+        if progress:
+            progress(result)
+    importer.finish()
+    result.seconds = time.perf_counter() - started
+    return result
@@ -0,0 +1,76 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+from apps.core.benchmark import ENDPOINTS, compare, default_users, run_benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the query count, wall time and peak memory of the main pages and API endpoints '
+        'against the current database, and compare them with a saved baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customer', help='Email of the customer, defaults to the one with the most tickets')
+        parser.add_argument(
+            '--technician',
+            help='Email of the technician, defaults to the one with the most assigned tickets'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Measured requests per endpoint')
+        parser.add_argument(
+            '--endpoint',
+            action='append',
+            choices=[name for name, *_ in ENDPOINTS],
+            help='Only measure this endpoint (repeatable)'
+        )
+        parser.add_argument('--save', help='Write the results to this JSON file')
+        parser.add_argument('--compare', help='JSON file of an earlier run to compare the results with')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=20,
+            help='Percentage time and memory may grow before counting as a regression'
+        )
+
+    def get_user(self, email, role):
+        try:
+            return User.objects.get(email=email, role=role)
+        except User.DoesNotExist:
+            raise CommandError(f'No {role} with email {email}')
+
+    def handle(self, *args, **options):
+        customer, technician = default_users()
+        if options['customer']:
+            customer = self.get_user(options['customer'], User.Roles.CUSTOMER)
+        if options['technician']:
+            technician = self.get_user(options['technician'], User.Roles.TECHNICIAN)
+
+        results = run_benchmarks(customer, technician, options['repeat'], options['endpoint'])
+
+        self.stdout.write(f'{"endpoint":<28} {"status":>6} {"queries":>8} {"ms":>9} {"peak KiB":>9}')
+        for name, result in results.items():
+            line = (
+                f'{name:<28} {result["status"]:>6} {result["queries"]:>8} '
+                f'{result["ms"]:>9.1f} {result["peak_kib"]:>9.1f}'
+            )
+            self.stdout.write(line if result['status'] < 400 else self.style.ERROR(line))
+
+        if options['save']:
+            with open(options['save'], 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(f'Results saved to {options["save"]}')
+
+        if options['compare']:
+            try:
+                with open(options['compare']) as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Cannot read {options["compare"]}: {e}')
+            regressions = compare(baseline, results, options['tolerance'] / 100)
+            for name, metric, before, after in regressions:
+                self.stdout.write(self.style.ERROR(f'{name}: {metric} {before} -> {after}'))
+            if regressions:
+                raise CommandError(f'{len(regressions)} regressions compared to {options["compare"]}')
+            self.stdout.write(self.style.SUCCESS(f'No regressions compared to {options["compare"]}'))
@@ -0,0 +1,71 @@
+import os
+
+from django.core.exceptions import FieldError, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from apps.core.export import CONTENT_TYPES, EXPORTS, encode, export_filename, export_rows
+
+
+class Command(BaseCommand):
+    help = 'Write every matching ticket, comment, invoice, payment or refund to a CSV or JSON lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=list(EXPORTS), help='What to export')
+        parser.add_argument('--format', choices=list(CONTENT_TYPES), default='csv', help='File format')
+        parser.add_argument('--gzip', action='store_true', help='Compress the file')
+        parser.add_argument('--output', help='File to write, defaults to <export>-<timestamp>.<format> here')
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='LOOKUP=VALUE',
+            help='Only export matching rows, e.g. status=open or created_at__gte=2024-01-01 (repeatable)'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows read per query')
+
+    def get_filters(self, options):
+        filters = {}
+        for item in options['filter']:
+            lookup, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filters are LOOKUP=VALUE, got {item}')
+            filters[lookup] = value.split(',') if lookup.endswith('__in') else value
+        return filters
+
+    def handle(self, *args, **options):
+        viewset = import_string(EXPORTS[options['export']])
+        model = viewset.serializer_class.Meta.model
+        fields = viewset.export_fields
+        output = options['output'] or export_filename(options['export'], options['format'], options['gzip'])
+
+        try:
+            queryset = model.objects.filter(**self.get_filters(options))
+        except (FieldError, ValidationError) as e:
+            raise CommandError(f'Invalid filter: {e}')
+
+        exported = 0
+
+        def counted(chunks):
+            nonlocal exported
+            for rows in chunks:
+                exported += len(rows)
+                yield rows
+
+        rows = counted(export_rows(queryset, fields, viewset.keyset_ordering, options['chunk_size']))
+        # Written next to the destination first so readers never see a partial file
+        partial = f'{output}.part'
+        try:
+            with open(partial, 'wb') as file:
+                for data in encode(rows, fields, options['format'], options['gzip']):
+                    file.write(data)
+            os.replace(partial, output)
+        except (FieldError, ValidationError) as e:
+            raise CommandError(f'Invalid filter: {e}')
+        except OSError as e:
+            raise CommandError(f'Cannot write {output}: {e}')
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+        self.stdout.write(self.style.SUCCESS(f'Exported {exported} {options["export"]} to {output}'))
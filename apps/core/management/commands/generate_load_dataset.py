@@ -0,0 +1,442 @@
+import io
+import json
+import math
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.core.imports import bulk_create_as_is
+from apps.core.models import Profile
+from apps.kb.models import ArticleCategory, ArticleTag, KnowledgeBaseArticle, Tag
+from apps.payments.models import Invoice, Payment
+from apps.services.models import Service
+from apps.tickets.models import SLAPolicy, Ticket, TicketComment, TicketStatusEvent
+
+# Password of every generated user, so benchmarks can log in as any of them
+PASSWORD = 'loadtest'
+
+PRIORITY_WEIGHTS = {'low': 40, 'medium': 35, 'high': 18, 'urgent': 7}
+OPEN_STATUS_WEIGHTS = {'new': 30, 'assigned': 25, 'in_progress': 30, 'pending': 15}
+# Median hours until a ticket is resolved, resolution times are log-normal around it
+RESOLUTION_HOURS = {'low': 72, 'medium': 24, 'high': 8, 'urgent': 3}
+# Share of tickets that are never resolved and stay in the backlog
+STALE_RATE = 0.02
+REOPEN_RATE = 0.05
+CLOSED_RATE = 0.7
+STATUS_PATHS = {
+    'new': ['new'],
+    'assigned': ['new', 'assigned'],
+    'in_progress': ['new', 'assigned', 'in_progress'],
+    'pending': ['new', 'assigned', 'in_progress', 'pending'],
+    'resolved': ['new', 'assigned', 'in_progress', 'resolved'],
+}
+INTERNAL_NOTE_RATE = 0.15
+PAYMENT_METHODS = {'credit_card': 70, 'bank_transfer': 25, 'cash': 5}
+ARTICLE_STATUS_WEIGHTS = {'published': 85, 'draft': 10, 'archived': 5}
+
+FIRST_NAMES = (
+    'Adam', 'Amira', 'Ben', 'Carla', 'Dina', 'Omar', 'Eva', 'Farid', 'Grace', 'Hana',
+    'Ivan', 'Jana', 'Karim', 'Laila', 'Mona', 'Nader', 'Olga', 'Peter', 'Rania', 'Sami',
+)
+LAST_NAMES = (
+    'Ali', 'Brown', 'Hassan', 'Ibrahim', 'Jones', 'Khalil', 'Mansour', 'Nasser', 'Smith', 'Youssef',
+)
+PROBLEMS = (
+    'Cannot connect to', 'Slow performance on', 'Error message on', 'Login fails on',
+    'Screen flickering on', 'Update stuck on', 'No sound from', 'Overheating', 'Data loss on',
+)
+DEVICES = {
+    'Laptop': ('ThinkPad T14', 'Latitude 5420', 'MacBook Air'),
+    'Desktop': ('OptiPlex 7090', 'iMac 24', 'ProDesk 600'),
+    'Printer': ('LaserJet Pro', 'EcoTank L3250', 'imageCLASS'),
+    'Router': ('Archer AX50', 'RT-AX58U', 'Nighthawk'),
+    'Phone': ('Galaxy S23', 'iPhone 14', 'Pixel 7'),
+}
+WORDS = (
+    'the', 'device', 'restart', 'network', 'printer', 'error', 'update', 'driver', 'password',
+    'account', 'email', 'connection', 'screen', 'battery', 'settings', 'install', 'backup',
+    'server', 'access', 'issue', 'after', 'again', 'still', 'working', 'slow', 'crash', 'cable',
+    'wifi', 'router', 'configure', 'reset', 'license', 'software', 'firewall', 'user', 'please',
+    'check', 'replaced', 'tested', 'customer', 'reported', 'resolved', 'waiting', 'part',
+)
+TAGS = (
+    'hardware', 'software', 'network', 'security', 'printer', 'email', 'windows', 'macos',
+    'linux', 'wifi', 'vpn', 'password', 'backup', 'drivers', 'updates', 'billing', 'accounts',
+    'mobile', 'office', 'performance', 'firewall', 'router', 'storage', 'license', 'setup',
+)
+ARTICLE_CATEGORIES = ('Hardware', 'Software', 'Network', 'Security', 'Accounts', 'Billing')
+SERVICE_CATEGORIES = [category for category, _ in Service.CATEGORIES]
+
+
+def cumulative_weights(count, exponent=1.0):
+    """Zipf-like cumulative weights, a few items get most of the picks"""
+    total = 0.0
+    weights = []
+    for rank in range(1, count + 1):
+        total += 1 / rank ** exponent
+        weights.append(total)
+    return weights
+
+
+def weighted(choices):
+    """Pick a key of ``choices`` with probability proportional to its value"""
+    return random.choices(list(choices), weights=list(choices.values()))[0]
+
+
+def text(words):
+    return ' '.join(random.choices(WORDS, k=words)).capitalize() + '.'
+
+
+def spread(start, end, count):
+    """``count`` sorted random times between ``start`` and ``end``"""
+    seconds = max((end - start).total_seconds(), 0)
+    return sorted(start + timedelta(seconds=random.uniform(0, seconds)) for _ in range(count))
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate a large synthetic dataset with bulk inserts: users, tickets with their comments '
+        'and status history, knowledge base articles with tags, invoices and payments. '
+        'E.g. --users 100000 --tickets 2000000 --comments 10000000'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Number of users')
+        parser.add_argument(
+            '--technicians',
+            type=int,
+            help='Number of the users that are technicians, defaults to one in fifty'
+        )
+        parser.add_argument('--tickets', type=int, default=10000, help='Number of tickets')
+        parser.add_argument('--comments', type=int, default=50000, help='Approximate number of ticket comments')
+        parser.add_argument('--articles', type=int, default=500, help='Number of knowledge base articles')
+        parser.add_argument('--invoices', type=int, default=2000, help='Approximate number of invoices')
+        parser.add_argument('--services', type=int, default=10, help='Minimum number of active services')
+        parser.add_argument('--days', type=int, default=365, help='Days of history the tickets are spread over')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per INSERT')
+        parser.add_argument('--seed', type=int, help='Random seed, for a reproducible dataset')
+
+    def handle(self, *args, **options):
+        for name in ('users', 'tickets', 'comments', 'articles', 'invoices', 'services'):
+            if options[name] < 0:
+                raise CommandError(f'--{name} cannot be negative')
+        technicians = options['technicians']
+        if technicians is None:
+            technicians = max(options['users'] // 50, 1) if options['users'] else 0
+        if options['tickets'] and not 0 < technicians < options['users']:
+            raise CommandError('Tickets need at least one technician and one customer')
+        if options['articles'] and not technicians:
+            raise CommandError('Articles need at least one technician')
+
+        random.seed(options['seed'])
+        self.batch_size = max(options['batch_size'], 1)
+        self.now = timezone.now()
+        self.history_start = self.now - timedelta(days=max(options['days'], 1))
+        self.counts = Counter()
+        started = time.perf_counter()
+
+        technician_ids, customer_ids = self.create_users(options['users'], technicians)
+        services = self.ensure_services(options['services'])
+        if options['tickets']:
+            self.create_tickets(
+                options['tickets'], technician_ids, customer_ids, services,
+                comments_per_ticket=options['comments'] / options['tickets'],
+                invoice_rate=min(options['invoices'] / options['tickets'], 1.0),
+            )
+        if options['articles']:
+            self.create_articles(options['articles'], technician_ids)
+        self.reset_sequences()
+
+        # Derived tables bulk inserts skip: rollups, ticket summaries and the search index
+        quiet = self.stdout if options['verbosity'] > 1 else io.StringIO()
+        if options['tickets']:
+            self.stdout.write('Rebuilding ticket metrics rollups and summaries')
+            call_command('backfill_ticket_rollups', stdout=quiet)
+            call_command('rebuild_ticket_summaries', stdout=quiet)
+        if options['articles']:
+            self.stdout.write('Rebuilding knowledge base search index')
+            call_command('rebuild_kb_search_index', stdout=quiet)
+
+        summary = ', '.join(f'{count} {name}' for name, count in self.counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {summary} in {time.perf_counter() - started:.1f}s'
+        ))
+
+    def insert(self, model, rows):
+        for start in range(0, len(rows), self.batch_size):
+            bulk_create_as_is(model, rows[start:start + self.batch_size])
+        self.counts[model._meta.verbose_name_plural] += len(rows)
+
+    def reset_sequences(self):
+        # Rows are inserted with explicit ids, move the sequences past them
+        models = [User, Ticket, TicketComment, KnowledgeBaseArticle, Invoice]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def create_users(self, count, technicians):
+        first_id = next_id(User)
+        password = make_password(PASSWORD)
+        ids = list(range(first_id, first_id + count))
+        for start in range(0, count, self.batch_size):
+            users = []
+            for user_id in ids[start:start + self.batch_size]:
+                is_technician = user_id < first_id + technicians
+                users.append(User(
+                    id=user_id,
+                    username=f'load-user-{user_id}',
+                    email=f'load-user-{user_id}@example.com',
+                    password=password,
+                    first_name=random.choice(FIRST_NAMES),
+                    last_name=random.choice(LAST_NAMES),
+                    role=User.Roles.TECHNICIAN if is_technician else User.Roles.CUSTOMER,
+                    specialization=random.choice(SERVICE_CATEGORIES) if is_technician else '',
+                    email_verified=True,
+                    date_joined=self.history_start - timedelta(days=random.uniform(0, 365)),
+                ))
+            with transaction.atomic():
+                self.insert(User, users)
+                # The profile signal does not run for bulk inserts
+                self.insert(Profile, [Profile(user_id=user.id) for user in users])
+        return ids[:technicians], ids[technicians:]
+
+    def ensure_services(self, count):
+        services = list(Service.objects.filter(is_active=True))
+        for number in range(len(services), count):
+            services.append(Service.objects.create(
+                name=f'Load service {number + 1}',
+                description=text(20),
+                category=random.choice(SERVICE_CATEGORIES),
+                price=Decimal(random.randrange(20, 500)),
+            ))
+        return services
+
+    def ticket_time(self):
+        # Volume grows over the history and follows office hours
+        age = (self.now - self.history_start) * (1 - math.sqrt(random.random()))
+        day = (self.now - age).replace(hour=0, minute=0, second=0, microsecond=0)
+        hour = min(max(random.gauss(13, 3), 0), 23.99)
+        return min(max(day + timedelta(hours=hour), self.history_start), self.now)
+
+    def create_tickets(self, count, technician_ids, customer_ids, services, comments_per_ticket, invoice_rate):
+        customer_ids = random.sample(customer_ids, len(customer_ids))
+        customer_weights = cumulative_weights(len(customer_ids), 0.8)
+        technician_weights = cumulative_weights(len(technician_ids), 0.5)
+        targets = {}
+        ticket_id = next_id(Ticket)
+        comment_id = next_id(TicketComment)
+        invoice_id = next_id(Invoice)
+        report_every = max(count // 10, 1)
+        started = time.perf_counter()
+
+        for start in range(0, count, self.batch_size):
+            size = min(self.batch_size, count - start)
+            creators = random.choices(customer_ids, cum_weights=customer_weights, k=size)
+            assignees = random.choices(technician_ids, cum_weights=technician_weights, k=size)
+            tickets, comments, events, invoices, payments = [], [], [], [], []
+
+            for created_by_id, assignee_id in zip(creators, assignees):
+                ticket = self.build_ticket(ticket_id, created_by_id, assignee_id, services, targets)
+                tickets.append(ticket)
+                comment_id = self.build_comments(ticket, comment_id, comments_per_ticket, comments)
+                events.extend(ticket.generated_events)
+                if ticket.resolved_at and ticket.service_id and random.random() < invoice_rate:
+                    invoice = self.build_invoice(invoice_id, ticket, services)
+                    invoices.append(invoice)
+                    payments.extend(self.build_payments(invoice))
+                    invoice_id += 1
+                ticket_id += 1
+
+            with transaction.atomic():
+                self.insert(Ticket, tickets)
+                self.insert(TicketComment, comments)
+                self.insert(TicketStatusEvent, events)
+                self.insert(Invoice, invoices)
+                self.insert(Payment, payments)
+
+            done = start + size
+            if done % report_every < size or done == count:
+                self.stdout.write(f'  tickets: {done}/{count} ({done / (time.perf_counter() - started):.0f}/s)')
+
+    def build_ticket(self, ticket_id, created_by_id, assignee_id, services, targets):
+        created_at = self.ticket_time()
+        priority = weighted(PRIORITY_WEIGHTS)
+        service = random.choice(services) if services and random.random() < 0.8 else None
+        resolved_at = created_at + timedelta(
+            hours=random.lognormvariate(math.log(RESOLUTION_HOURS[priority]), 1)
+        )
+        if resolved_at <= self.now and random.random() >= STALE_RATE:
+            path = list(STATUS_PATHS['resolved'])
+            if random.random() < REOPEN_RATE:
+                path += ['in_progress', 'resolved']
+            times = [created_at] + spread(created_at, resolved_at, len(path) - 2) + [resolved_at]
+            closed_at = resolved_at + timedelta(hours=random.uniform(1, 72))
+            if closed_at <= self.now and random.random() < CLOSED_RATE:
+                path.append('closed')
+                times.append(closed_at)
+            end = times[-1]
+        else:
+            resolved_at = None
+            path = STATUS_PATHS[weighted(OPEN_STATUS_WEIGHTS)]
+            times = [created_at] + spread(created_at, self.now, len(path) - 1)
+            end = self.now
+
+        device_type = random.choice(list(DEVICES))
+        ticket = Ticket(
+            id=ticket_id,
+            title=f'{random.choice(PROBLEMS)} {device_type.lower()}',
+            description=text(random.randint(20, 80)),
+            created_by_id=created_by_id,
+            assigned_to_id=assignee_id if len(path) > 1 else None,
+            service_id=service.id if service else None,
+            status=path[-1],
+            priority=priority,
+            created_at=created_at,
+            updated_at=end,
+            last_updated=end,
+            resolved_at=resolved_at,
+            status_changed_at=times[-1],
+            category=service.category if service else '',
+            device_type=device_type,
+            device_model=random.choice(DEVICES[device_type]),
+            contact_method=random.choice(('email', 'phone')),
+        )
+        key = (priority, ticket.service_id)
+        if key not in targets:
+            targets[key] = SLAPolicy.targets_for(*key)
+        ticket.schedule_sla(targets[key])
+        if ticket.sla_due_at < (resolved_at or self.now):
+            # Recorded by check_sla_breaches when the deadline passed
+            ticket.sla_breached_at = ticket.sla_due_at
+
+        ticket.generated_events = [
+            TicketStatusEvent(
+                ticket_id=ticket_id,
+                from_status=path[index - 1] if index else '',
+                to_status=status,
+                changed_by_id=created_by_id if index == 0 else ticket.assigned_to_id,
+                created_at=times[index],
+                status_seconds=int((times[index] - times[index - 1]).total_seconds()) if index else None,
+            )
+            for index, status in enumerate(path)
+        ]
+        ticket.generated_end = end
+        return ticket
+
+    def build_comments(self, ticket, comment_id, mean, comments):
+        """Append the ticket's comments to ``comments`` and record its first response"""
+        count = round(random.expovariate(1 / mean)) if mean else 0
+        for created_at in spread(ticket.created_at, ticket.generated_end, count):
+            # Customers and the assigned technician take turns, unassigned tickets only have the customer
+            by_technician = ticket.assigned_to_id is not None and random.random() < 0.55
+            author_id = ticket.assigned_to_id if by_technician else ticket.created_by_id
+            comments.append(TicketComment(
+                id=comment_id,
+                ticket_id=ticket.id,
+                author_id=author_id,
+                content=text(random.randint(8, 60)),
+                created_at=created_at,
+                is_internal=by_technician and random.random() < INTERNAL_NOTE_RATE,
+            ))
+            if by_technician and ticket.first_response_at is None:
+                ticket.first_response_at = ticket.first_staff_response_at = created_at
+                ticket.first_response_by_id = author_id
+            comment_id += 1
+        return comment_id
+
+    def build_invoice(self, invoice_id, ticket, services):
+        service = next(service for service in services if service.id == ticket.service_id)
+        amount = service.price or Decimal(random.randrange(20, 500))
+        due_date = (ticket.resolved_at + timedelta(days=30)).date()
+        if due_date < self.now.date():
+            status = random.choices(('paid', 'pending', 'cancelled'), weights=(85, 10, 5))[0]
+        else:
+            status = random.choice(('paid', 'pending'))
+        return Invoice(
+            id=invoice_id,
+            user_id=ticket.created_by_id,
+            ticket_id=ticket.id,
+            service_id=service.id,
+            amount=amount,
+            status=status,
+            due_date=due_date,
+            created_at=ticket.resolved_at,
+            updated_at=ticket.resolved_at,
+        )
+
+    def build_payments(self, invoice):
+        if invoice.status != Invoice.Status.PAID:
+            return []
+        paid_until = min(invoice.created_at + timedelta(days=30), self.now)
+        times = spread(invoice.created_at, paid_until, 2)
+        method = weighted(PAYMENT_METHODS)
+        payments = []
+        if random.random() < 0.1:
+            payments.append(Payment(
+                invoice_id=invoice.id, amount=invoice.amount, method=method, status='failed',
+                transaction_id=f'LOAD-{invoice.id}-1', payment_date=times[0],
+            ))
+        payments.append(Payment(
+            invoice_id=invoice.id, amount=invoice.amount, method=method, status='success',
+            transaction_id=f'LOAD-{invoice.id}-{len(payments) + 1}', payment_date=times[1],
+        ))
+        return payments
+
+    def create_articles(self, count, technician_ids):
+        categories = [
+            ArticleCategory.objects.get_or_create(name=name, defaults={'description': f'{name} articles'})[0]
+            for name in ARTICLE_CATEGORIES
+        ]
+        tag_ids = {name: Tag.objects.get_or_create(name=name)[0].id for name in TAGS}
+        tag_weights = cumulative_weights(len(TAGS))
+        tag_counts = Counter()
+        article_id = next_id(KnowledgeBaseArticle)
+
+        for start in range(0, count, self.batch_size):
+            articles, links = [], []
+            for _ in range(min(self.batch_size, count - start)):
+                created_at = self.history_start + (self.now - self.history_start) * random.random()
+                title = f'How to fix: {random.choice(PROBLEMS).lower()} {random.choice(list(DEVICES)).lower()}'
+                tags = sorted(set(random.choices(TAGS, cum_weights=tag_weights, k=random.randint(1, 5))))
+                articles.append(KnowledgeBaseArticle(
+                    id=article_id,
+                    title=title,
+                    slug=f'load-article-{article_id}',
+                    short_description=text(12),
+                    content='\n\n'.join(text(random.randint(40, 120)) for _ in range(random.randint(2, 6))),
+                    category=random.choice(categories),
+                    tags_json=json.dumps(tags),
+                    status=weighted(ARTICLE_STATUS_WEIGHTS),
+                    is_featured=random.random() < 0.05,
+                    views=int(random.paretovariate(1.2) * 10),
+                    created_by_id=random.choice(technician_ids),
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+                links.extend(ArticleTag(article_id=article_id, tag_id=tag_ids[name]) for name in tags)
+                tag_counts.update(tags)
+                article_id += 1
+            with transaction.atomic():
+                self.insert(KnowledgeBaseArticle, articles)
+                self.insert(ArticleTag, links)
+
+        # sync_tags does not run for bulk inserts
+        for name, added in tag_counts.items():
+            Tag.objects.filter(id=tag_ids[name]).update(article_count=F('article_count') + added)
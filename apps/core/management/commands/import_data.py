@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.imports import IMPORT_CHUNK_SIZE, IMPORTERS, import_csv
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk import users, services, tickets or ticket comments from a CSV file, '
+        'writing the rejected rows to an error report'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(IMPORTERS), help='What the file holds')
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--errors', help='Error report to write, defaults to <path>.errors.csv')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='Rows validated and inserted together')
+
+    def handle(self, *args, **options):
+        importer = IMPORTERS[options['kind']]
+        errors_path = options['errors'] or f'{options["path"]}.errors.csv'
+        self.stdout.write(
+            f'Columns: {", ".join((*importer.columns, *importer.lookup_columns))} '
+            f'(required: {", ".join(importer.required)})'
+        )
+
+        def progress(result):
+            self.stdout.write(f'  {result}')
+
+        try:
+            # utf-8-sig also reads files saved by Excel
+            with open(options['path'], newline='', encoding='utf-8-sig') as source, \
+                    open(errors_path, 'w', newline='') as errors:
+                result = import_csv(
+                    options['kind'], source, errors, max(options['chunk_size'], 1),
+                    progress if options['verbosity'] > 1 else None
+                )
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            raise CommandError(str(e))
+
+        if result.failed:
+            self.stdout.write(self.style.WARNING(f'Rejected rows written to {errors_path}'))
+        else:
+            os.remove(errors_path)
+        style = self.style.SUCCESS if not result.failed else self.style.WARNING
+        self.stdout.write(style(f'{options["kind"].capitalize()}: {result}'))
@@ -0,0 +1,103 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.client import HTTPConnection, HTTPSConnection
+from importlib import import_module
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.accounts.models import User
+
+DEFAULT_PATHS = ['/dashboard/', '/technician/', '/faq/', '/technician/knowledge-base/', '/services/']
+
+
+def percentile(latencies, percent):
+    """Nearest-rank percentile of a sorted list"""
+    if not latencies:
+        return 0
+    return latencies[max(math.ceil(percent / 100 * len(latencies)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the p50/p99 latency of pages between running servers, e.g. the WSGI '
+        'and ASGI modes started against the same seeded database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            action='append',
+            required=True,
+            help='Server to load as name=base_url, e.g. wsgi=http://127.0.0.1:8000 (repeatable)'
+        )
+        parser.add_argument(
+            '--path',
+            action='append',
+            help=f'Page to request (repeatable), defaults to {", ".join(DEFAULT_PATHS)}'
+        )
+        parser.add_argument('--user', help='Email of the user the requests are authenticated as')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per page and target')
+        parser.add_argument('--concurrency', type=int, default=10, help='Requests in flight at once')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per page and target')
+
+    def session_cookie(self, email):
+        """Create a session for ``email`` in the shared session store and return its cookie header"""
+        try:
+            user = User.objects.get(email=email)
+        except User.DoesNotExist:
+            raise CommandError(f'No user with email {email}')
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+    def fetch(self, base_url, path, headers):
+        # One connection per request, like a browser opening a page
+        url = urlsplit(base_url)
+        connection_class = HTTPSConnection if url.scheme == 'https' else HTTPConnection
+        connection = connection_class(url.netloc, timeout=60)
+        started = time.perf_counter()
+        try:
+            connection.request('GET', url.path.rstrip('/') + path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            return time.perf_counter() - started, response.status
+        finally:
+            connection.close()
+
+    def run(self, base_url, path, headers, count, concurrency):
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda _: self.fetch(base_url, path, headers), range(count)))
+        return sorted(latency for latency, _ in results), sum(1 for _, status in results if status >= 400)
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, _, base_url = target.partition('=')
+            if not base_url:
+                raise CommandError(f'Targets are given as name=base_url, got {target}')
+            targets.append((name, base_url))
+        paths = options['path'] or DEFAULT_PATHS
+        headers = {'Cookie': self.session_cookie(options['user'])} if options['user'] else {}
+        count = max(options['requests'], 1)
+        concurrency = max(options['concurrency'], 1)
+
+        self.stdout.write(f'{count} requests per page, {concurrency} concurrent')
+        self.stdout.write(f'{"page":<32} {"target":<8} {"p50 ms":>8} {"p99 ms":>8} {"req/s":>8} {"errors":>7}')
+        for path in paths:
+            for name, base_url in targets:
+                if options['warmup']:
+                    self.run(base_url, path, headers, options['warmup'], concurrency)
+                started = time.perf_counter()
+                latencies, errors = self.run(base_url, path, headers, count, concurrency)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{path:<32} {name:<8} {percentile(latencies, 50) * 1000:>8.1f} '
+                    f'{percentile(latencies, 99) * 1000:>8.1f} {count / elapsed:>8.1f} {errors:>7}'
+                )
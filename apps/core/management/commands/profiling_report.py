@@ -0,0 +1,55 @@
+import math
+
+from django.core.management.base import BaseCommand
+
+from apps.core.profiling import LATENCY_BUCKETS, report
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'avg': 'avg_ms',
+    'p95': 'p95_ms',
+    'queries': 'avg_queries',
+    'sql': 'avg_sql_ms',
+    'n_plus_one': 'n_plus_one',
+}
+
+
+def milliseconds(value):
+    return f'>{LATENCY_BUCKETS[-1]}' if math.isinf(value) else f'{value:.0f}'
+
+
+class Command(BaseCommand):
+    help = 'Show the views with the most request time, queries and repeated (N+1) queries recently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, help='Minutes to report on, defaults to PROFILING_WINDOW_MINUTES')
+        parser.add_argument('--limit', type=int, default=10, help='Number of views and repeated queries shown')
+        parser.add_argument(
+            '--sort',
+            choices=list(SORT_KEYS),
+            default='total',
+            help='Order of the views, total request time by default'
+        )
+
+    def handle(self, *args, **options):
+        views, repeated = report(options['minutes'])
+        if not views:
+            self.stdout.write(self.style.WARNING('No requests recorded'))
+            return
+
+        views.sort(key=lambda row: -row[SORT_KEYS[options['sort']]])
+        self.stdout.write(
+            f'{"view":<40} {"requests":>8} {"avg ms":>8} {"p50":>6} {"p95":>6} {"p99":>6} '
+            f'{"queries":>8} {"sql ms":>8} {"slow":>5} {"n+1":>5}'
+        )
+        for row in views[:options['limit']]:
+            self.stdout.write(
+                f'{row["view"][:40]:<40} {row["requests"]:>8} {row["avg_ms"]:>8.1f} '
+                f'{milliseconds(row["p50_ms"]):>6} {milliseconds(row["p95_ms"]):>6} {milliseconds(row["p99_ms"]):>6} '
+                f'{row["avg_queries"]:>8.1f} {row["avg_sql_ms"]:>8.1f} {row["slow"]:>5} {row["n_plus_one"]:>5}'
+            )
+
+        if repeated:
+            self.stdout.write('\nRepeated queries (N+1 candidates):')
+            for view, fingerprint, executions in repeated[:options['limit']]:
+                self.stdout.write(f'{executions:>8}x {view}: {fingerprint[:300]}')
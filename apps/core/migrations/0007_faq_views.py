@@ -0,0 +1,18 @@
+# Generated by Django 5.0 on 2026-10-18 22:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_profile_address_profile_bio_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='faq',
+            name='views',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
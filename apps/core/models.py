@@ -39,6 +39,8 @@ class FAQ(models.Model):
     answer = models.TextField()
     order = models.IntegerField(default=0)
     is_published = models.BooleanField(default=True)
+    # Incremented through apps.core.counters.faq_views
+    views = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -0,0 +1,228 @@
+"""
+Keyset pagination for high volume API endpoints.
+
+``KeysetPagination`` pages on an ordering that ends with the primary key,
+e.g. ``('-created_at', '-id')``. The cursor holds the ordering values of the
+last (or first) row of a page and the next page filters on them::
+
+    WHERE created_at < %s OR (created_at = %s AND id < %s)
+    ORDER BY created_at DESC, id DESC LIMIT page_size + 1
+
+so every page costs the same whatever its depth, unlike ``OFFSET``. The
+total ``COUNT(*)`` is only run when asked for with ``?count=true``, and
+clients choose a page size with ``?page_size=`` up to ``API_MAX_PAGE_SIZE``.
+
+Viewsets set ``keyset_ordering``; an ``OrderingFilter`` choice from the
+request takes precedence unless it orders on a nullable field.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TRUE_VALUES = ('1', 'true', 'yes')
+
+
+def keyset_after(ordering, position):
+    """``Q`` matching the rows that come after ``position`` in ``ordering``"""
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, position):
+        name = field.lstrip('-')
+        lookup = 'lt' if field.startswith('-') else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on the view's ``keyset_ordering`` with an opt-in total count"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = _('Invalid cursor')
+
+    @property
+    def page_size(self):
+        return api_settings.PAGE_SIZE or 10
+
+    @property
+    def max_page_size(self):
+        return getattr(settings, 'API_MAX_PAGE_SIZE', 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size_value = self.get_page_size(request)
+        self.page_ordering = self.get_ordering(request, queryset, view)
+        self.count = queryset.count() if self.wants_count(request) else None
+
+        position, reverse = self.decode_cursor(request, queryset)
+        # Walk backwards by flipping the ordering, then restore the page order
+        ordering = [self._flip(field) for field in self.page_ordering] if reverse else self.page_ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(keyset_after(ordering, position))
+
+        rows = list(queryset[:self.page_size_value + 1])
+        has_more = len(rows) > self.page_size_value
+        page = rows[:self.page_size_value]
+        if reverse:
+            page.reverse()
+            self.has_previous, self.has_next = has_more, position is not None
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.page = page
+        return page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in TRUE_VALUES
+
+    def get_ordering(self, request, queryset, view):
+        """Return the page ordering, always ending with the primary key as a tie breaker"""
+        ordering = list(getattr(view, 'keyset_ordering', self.ordering))
+        for backend in getattr(view, 'filter_backends', ()):
+            if issubclass(backend, OrderingFilter):
+                requested = backend().get_ordering(request, queryset, view)
+                if (
+                    requested
+                    and request.query_params.get(backend.ordering_param)
+                    and not any(self._nullable(queryset, field) for field in requested)
+                ):
+                    ordering = list(requested)
+                break
+        if not any(field.lstrip('-') in ('pk', 'id') for field in ordering):
+            ordering.append('-id' if ordering and ordering[-1].startswith('-') else 'id')
+        return ordering
+
+    @staticmethod
+    def _nullable(queryset, field):
+        # NULLs cannot be compared in a keyset, such orderings fall back to the default
+        name = field.lstrip('-')
+        return name != 'pk' and queryset.model._meta.get_field(name).null
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def _position(self, instance):
+        return [getattr(instance, field.lstrip('-')) for field in self.page_ordering]
+
+    def encode_cursor(self, position, reverse=False):
+        # str() keeps microseconds, which DjangoJSONEncoder would round away
+        payload = json.dumps({'p': position, 'r': reverse}, default=str)
+        cursor = base64.urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, queryset):
+        """Return ``(position, reverse)``, the position converted back to field values"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.page_ordering):
+                raise ValueError
+            opts = queryset.model._meta
+            position = [
+                opts.pk.to_python(value) if field.lstrip('-') == 'pk'
+                else opts.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.page_ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.page[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        body = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            body = {'count': self.count, **body}
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {
+                    'type': 'integer',
+                    'description': f'Only included with ?{self.count_query_param}=true',
+                    'example': 123,
+                },
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'previous': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Number of results to return per page, at most {self.max_page_size}.',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Include the total number of results.',
+                'schema': {'type': 'boolean'},
+            },
+        ]
@@ -0,0 +1,74 @@
+"""
+Serializer declared eager loading.
+
+Serializers declare the relations they read through their nested
+serializers: a nested ``ModelSerializer`` follows a foreign key and a
+``many=True`` one (or a related field with ``many=True``) a reverse or
+many-to-many relation. ``eager_load`` walks those declarations, nested ones
+included, and applies the matching ``select_related`` and ``Prefetch``
+lookups, so serializing a page costs a fixed number of queries whatever its
+size. Relations read elsewhere, e.g. in a ``SerializerMethodField``, are
+declared on the serializer's ``Meta``::
+
+    class Meta:
+        select_related = ['ticket__created_by']
+        prefetch_related = ['ticket__attachments']
+
+Viewsets get this through ``EagerLoadingMixin``.
+"""
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def eager_loading(serializer, prefix=''):
+    """Return the ``(select_related, prefetch_related)`` lookups ``serializer`` needs"""
+    meta = getattr(serializer, 'Meta', None)
+    select = [prefix + lookup for lookup in getattr(meta, 'select_related', ())]
+    prefetch = [prefix + lookup for lookup in getattr(meta, 'prefetch_related', ())]
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        # Dotted sources become lookups, an empty one is the object itself
+        lookup = prefix + '__'.join(field.source_attrs)
+        nested_prefix = f'{lookup}__' if field.source_attrs else prefix
+
+        if isinstance(field, serializers.ListSerializer):
+            if isinstance(field.child, serializers.ModelSerializer):
+                # The related rows get their own eager loading inside the prefetch
+                related = field.child.Meta.model._default_manager.all()
+                prefetch.append(Prefetch(lookup, queryset=eager_load(related, field.child)))
+        elif isinstance(field, serializers.ModelSerializer):
+            if field.source_attrs:
+                select.append(lookup)
+            nested_select, nested_prefetch = eager_loading(field, nested_prefix)
+            select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+        elif isinstance(field, serializers.ManyRelatedField):
+            prefetch.append(lookup)
+
+    return select, prefetch
+
+
+def eager_load(queryset, serializer):
+    """Apply the eager loading ``serializer`` declares to ``queryset``"""
+    select, prefetch = eager_loading(serializer)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class EagerLoadingMixin:
+    """
+    Viewset mixin that eager loads what the serializer reads for every
+    queryset passing through ``filter_queryset`` (list and detail views).
+    Custom actions serializing their own querysets call ``eager_load``.
+    """
+
+    def eager_load(self, queryset):
+        return eager_load(queryset, self.get_serializer())
+
+    def filter_queryset(self, queryset):
+        return self.eager_load(super().filter_queryset(queryset))
@@ -0,0 +1,371 @@
+"""
+Request profiling.
+
+``ProfilingMiddleware`` measures every request: its wall time, number of
+queries, time spent in SQL and the queries repeated with the same
+fingerprint, the signature of an N+1 loop. For each request it
+
+- adds a ``Server-Timing`` header when ``PROFILING_SERVER_TIMING`` is set,
+- logs it with its query fingerprints when it takes longer than
+  ``PROFILING_SLOW_REQUEST_MS``,
+- adds it to the per-view statistics of the current minute: totals and a
+  latency histogram, kept for ``PROFILING_WINDOW_MINUTES``.
+
+Statistics are kept in process and pushed to the shared Redis tier every few
+seconds, from a worker thread under ASGI, so ``report`` and the ``profiling_report`` command see every
+process. Queries are attributed to requests through a context variable,
+which follows async views into their worker threads. Streaming responses are
+measured until their first byte.
+
+Code outside requests is profiled with ``profile_queries``::
+
+    with profile_queries() as profile:
+        ...
+    profile.duplicates()  # {fingerprint: executions} of the repeated queries
+"""
+import functools
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .counters import _redis_backend
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in milliseconds, slower requests go in 'inf'
+LATENCY_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PUSH_INTERVAL = 5
+SLOW_LOG_FINGERPRINTS = 5
+
+PLACEHOLDER = re.compile(r"%s|'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+VALUE_LIST = re.compile(r'\(\?(?:, \?)*\)(?:, \(\?(?:, \?)*\))*')
+WHITESPACE = re.compile(r'\s+')
+
+_current = ContextVar('request_profile', default=None)
+
+
+def _setting(name, default):
+    return getattr(settings, f'PROFILING_{name}', default)
+
+
+def _fingerprint(sql):
+    sql = WHITESPACE.sub(' ', PLACEHOLDER.sub('?', sql)).strip()
+    return VALUE_LIST.sub('(...)', sql)
+
+
+_cached_fingerprint = functools.lru_cache(maxsize=2048)(_fingerprint)
+
+
+def fingerprint(sql):
+    """``sql`` without its values, equal for the queries a line of code runs in a loop"""
+    # Long statements are mostly bulk inserts, not worth keeping in the cache
+    return _cached_fingerprint(sql) if len(sql) <= 4096 else _fingerprint(sql)
+
+
+class RequestProfile:
+    """The queries run while handling one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.counts = Counter()
+        self.seconds = Counter()
+        self._lock = threading.Lock()
+
+    def add_query(self, sql, seconds):
+        key = fingerprint(sql)
+        with self._lock:
+            self.queries += 1
+            self.sql_seconds += seconds
+            self.counts[key] += 1
+            self.seconds[key] += seconds
+
+    def duplicates(self, threshold=None):
+        """``{fingerprint: executions}`` of the queries run at least ``threshold`` times"""
+        threshold = threshold or _setting('DUPLICATE_QUERIES', 3)
+        return {key: count for key, count in self.counts.items() if count >= threshold}
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+
+def record_query(execute, sql, params, many, context):
+    """Execute wrapper adding the query to the profile of the current request"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add_query(sql, time.perf_counter() - started)
+
+
+def install(connection, **kwargs):
+    """Add ``record_query`` to a connection, also used as the ``connection_created`` receiver"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def profile_queries():
+    """Profile the queries run inside the block"""
+    for connection in connections.all():
+        install(connection)
+    profile = RequestProfile()
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+
+
+def histogram_bucket(wall_ms):
+    for bound in LATENCY_BUCKETS:
+        if wall_ms <= bound:
+            return f'le_{bound}'
+    return 'le_inf'
+
+
+class ProfileStats:
+    """
+    Per-view request statistics by minute. Each minute maps
+    ``'<view>\\t<metric>'`` to a number, metrics being ``requests``,
+    ``wall_ms``, ``queries``, ``sql_ms``, ``slow``, ``n_plus_one``, the
+    histogram buckets ``le_<ms>`` and ``dup\\t<fingerprint>`` with the
+    executions of repeated queries.
+    """
+
+    def __init__(self):
+        self._minutes = defaultdict(Counter)
+        self._pending = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._last_push = time.monotonic()
+
+    @staticmethod
+    def window():
+        return max(_setting('WINDOW_MINUTES', 60), 1)
+
+    def _key(self, backend, minute):
+        return backend.make_key(f'profiling:{minute}')
+
+    def record(self, view, wall_ms, profile, duplicates, slow):
+        """Add a request to the statistics and return whether they are due to be pushed"""
+        fields = Counter({
+            'requests': 1,
+            'wall_ms': wall_ms,
+            'queries': profile.queries,
+            'sql_ms': profile.sql_seconds * 1000,
+            histogram_bucket(wall_ms): 1,
+        })
+        if slow:
+            fields['slow'] = 1
+        if duplicates:
+            fields['n_plus_one'] = 1
+            for key, count in duplicates.items():
+                fields[f'dup\t{key}'] = count
+        values = Counter({f'{view}\t{metric}': value for metric, value in fields.items()})
+
+        minute = int(time.time() // 60)
+        with self._lock:
+            self._minutes[minute].update(values)
+            self._pending[minute].update(values)
+            for old in [old for old in self._minutes if old <= minute - self.window()]:
+                del self._minutes[old]
+            return time.monotonic() - self._last_push >= PUSH_INTERVAL
+
+    def push(self):
+        """Add the statistics recorded since the last push to the shared Redis tier"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_push = time.monotonic()
+        backend = _redis_backend()
+        if backend is None or not pending:
+            return
+        try:
+            client = backend._cache.get_client(write=True)
+            with client.pipeline(transaction=False) as pipe:
+                for minute, values in pending.items():
+                    key = self._key(backend, minute)
+                    for field, value in values.items():
+                        pipe.hincrbyfloat(key, field, value)
+                    pipe.expire(key, (self.window() + 1) * 60)
+                pipe.execute()
+        except Exception as e:
+            logger.warning(f"Cannot push request profiles to Redis: {str(e)}")
+
+    def totals(self, minutes=None):
+        """``{view: Counter(metrics)}`` over the last ``minutes``, from every process when Redis is available"""
+        minutes = min(minutes or self.window(), self.window())
+        current = int(time.time() // 60)
+        wanted = range(current - minutes + 1, current + 1)
+        merged = Counter()
+        backend = _redis_backend()
+        try:
+            if backend is None:
+                raise LookupError('no Redis tier')
+            self.push()
+            client = backend._cache.get_client()
+            with client.pipeline(transaction=False) as pipe:
+                for minute in wanted:
+                    pipe.hgetall(self._key(backend, minute))
+                for values in pipe.execute():
+                    merged.update({field.decode(): float(value) for field, value in values.items()})
+        except Exception as e:
+            if backend is not None:
+                logger.warning(f"Cannot read request profiles from Redis, using this process only: {str(e)}")
+            with self._lock:
+                for minute in wanted:
+                    merged.update(self._minutes.get(minute, {}))
+
+        views = defaultdict(Counter)
+        for field, value in merged.items():
+            view, metric = field.split('\t', 1)
+            views[view][metric] += value
+        return views
+
+    def clear(self):
+        with self._lock:
+            self._minutes.clear()
+            self._pending.clear()
+
+
+stats = ProfileStats()
+
+
+def percentile(metrics, percent):
+    """Upper bound of the histogram bucket holding the ``percent`` percentile, inf when beyond the last"""
+    rank = metrics['requests'] * percent / 100
+    seen = 0
+    for bound in LATENCY_BUCKETS:
+        seen += metrics[f'le_{bound}']
+        if seen >= rank:
+            return bound
+    return math.inf
+
+
+def report(minutes=None):
+    """
+    Return ``(views, repeated)``: a row per view with its averages and
+    latency percentiles, and ``(view, fingerprint, executions)`` for the
+    repeated queries, most executed first.
+    """
+    views = []
+    repeated = []
+    for view, metrics in stats.totals(minutes).items():
+        requests = metrics['requests']
+        if not requests:
+            continue
+        views.append({
+            'view': view,
+            'requests': int(requests),
+            'total_ms': metrics['wall_ms'],
+            'avg_ms': metrics['wall_ms'] / requests,
+            'p50_ms': percentile(metrics, 50),
+            'p95_ms': percentile(metrics, 95),
+            'p99_ms': percentile(metrics, 99),
+            'avg_queries': metrics['queries'] / requests,
+            'avg_sql_ms': metrics['sql_ms'] / requests,
+            'slow': int(metrics['slow']),
+            'n_plus_one': int(metrics['n_plus_one']),
+        })
+        repeated.extend(
+            (view, metric.split('\t', 1)[1], int(count))
+            for metric, count in metrics.items() if metric.startswith('dup\t')
+        )
+    repeated.sort(key=lambda row: -row[2])
+    return views, repeated
+
+
+class ProfilingMiddleware:
+    """
+    Measures requests, see the module docstring. Goes first in
+    ``MIDDLEWARE`` so the other middleware is measured too, and is left out
+    when ``PROFILING_ENABLED`` is false.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not _setting('ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(install, dispatch_uid='apps.core.profiling')
+
+    def start(self):
+        for connection in connections.all():
+            install(connection)
+        profile = RequestProfile()
+        return profile, _current.set(profile)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        profile, token = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        if self.finish(request, response, profile):
+            stats.push()
+        return response
+
+    async def __acall__(self, request):
+        profile, token = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        if self.finish(request, response, profile):
+            # Keep the Redis round trip off the event loop
+            await sync_to_async(stats.push, thread_sensitive=False)()
+        return response
+
+    def finish(self, request, response, profile):
+        wall_ms = profile.elapsed_ms()
+        sql_ms = profile.sql_seconds * 1000
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        duplicates = profile.duplicates()
+        slow = wall_ms >= _setting('SLOW_REQUEST_MS', 1000)
+
+        if _setting('SERVER_TIMING', False):
+            timings = [
+                f'db;dur={sql_ms:.1f};desc="{profile.queries} queries"',
+                f'app;dur={wall_ms - sql_ms:.1f}',
+                f'total;dur={wall_ms:.1f}',
+            ]
+            if duplicates:
+                timings.append(f'dup;desc="{sum(duplicates.values())} repeated queries"')
+            response['Server-Timing'] = ', '.join(timings)
+
+        if slow:
+            lines = [
+                f'  {count}x {profile.seconds[key] * 1000:.1f}ms{" repeated" if key in duplicates else ""}: {key[:500]}'
+                for key, count in profile.counts.most_common(SLOW_LOG_FINGERPRINTS)
+            ]
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({view}): {wall_ms:.0f}ms, "
+                f"{profile.queries} queries in {sql_ms:.0f}ms\n" + '\n'.join(lines)
+            )
+
+        try:
+            return stats.record(view, wall_ms, profile, duplicates, slow)
+        except Exception as e:
+            logger.error(f"Error recording request profile: {str(e)}")
+            return False
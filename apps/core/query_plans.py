@@ -0,0 +1,46 @@
+"""
+Query plan inspection.
+
+``full_scans(queryset)`` runs EXPLAIN for a queryset and returns the tables
+the database reads in full, whether row by row or by walking an entire index.
+Used by the query plan regression tests to catch hot querysets that stop
+using their indexes.
+"""
+import json
+import re
+
+from django.db import connections
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+# "ALL" reads the whole table, "index" reads the whole index
+MYSQL_FULL_ACCESS = ('ALL', 'index')
+
+
+def _mysql_full_scans(plan):
+    scans = []
+    if isinstance(plan, dict):
+        if plan.get('access_type') in MYSQL_FULL_ACCESS and 'table_name' in plan:
+            scans.append(plan['table_name'])
+        for value in plan.values():
+            scans.extend(_mysql_full_scans(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            scans.extend(_mysql_full_scans(value))
+    return scans
+
+
+def full_scans(queryset):
+    """Return the sorted names of the tables ``queryset`` scans in full"""
+    connection = connections[queryset.db]
+    tables = set(connection.introspection.table_names())
+
+    if connection.vendor == 'mysql':
+        scans = _mysql_full_scans(json.loads(queryset.explain(format='json')))
+    elif connection.vendor == 'postgresql':
+        scans = POSTGRES_SCAN.findall(queryset.explain())
+    else:
+        scans = SQLITE_SCAN.findall(queryset.explain())
+
+    # Ignore subqueries, CTEs and constant rows that show up as scans
+    return sorted({table for table in scans if table in tables})
@@ -19,9 +19,9 @@ class FAQSerializer(serializers.ModelSerializer):
         model = FAQ
         fields = [
             'id', 'category', 'category_display', 'question', 
-            'answer', 'order', 'is_published', 'created_at', 'updated_at'
+            'answer', 'order', 'is_published', 'views', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'views', 'created_at', 'updated_at']
 
 class FAQInteractionSerializer(serializers.ModelSerializer):
     """Serializer for FAQ interactions"""
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
-from .models import Profile, FAQInteraction
+from .cache import FAQS, invalidate_on_commit
+from .models import Profile, FAQ, FAQInteraction
 
 User = get_user_model()
 
@@ -30,4 +31,12 @@ def process_faq_interaction(sender, instance, created, **kwargs):
     """
     if created:
         # For future analytics or notification systems
-        pass 
\ No newline at end of file
+        pass 
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def faq_changed(sender, instance, **kwargs):
+    """
+    Invalidate the cached FAQ page when an FAQ changes
+    """
+    invalidate_on_commit(FAQS)
@@ -0,0 +1,46 @@
+import io
+import tempfile
+
+from celery import shared_task
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMessage
+
+from apps.accounts.models import User
+from .counters import flush_counters
+from .imports import import_csv
+
+@shared_task
+def flush_view_counters():
+    """
+    Write buffered article and FAQ views to the database.
+    """
+    flushed = flush_counters()
+    return ', '.join(f'{name}: {count} rows' for name, count in flushed.items())
+
+@shared_task
+def import_csv_file(kind, name, user_id):
+    """
+    Import a CSV file uploaded to the default storage, then delete it and
+    email the summary with the rejected rows to the uploader.
+    """
+    user = User.objects.get(id=user_id)
+    result = None
+    with tempfile.TemporaryFile('w+', newline='') as errors:
+        try:
+            with default_storage.open(name, 'rb') as file:
+                source = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+                result = import_csv(kind, source, errors)
+            summary = f'{kind.capitalize()}: {result}'
+        except (UnicodeDecodeError, ValueError) as e:
+            summary = f'The {kind} import failed: {e}'
+        finally:
+            default_storage.delete(name)
+
+        message = EmailMessage(f'CSV import of {kind}', summary, settings.DEFAULT_FROM_EMAIL, [user.email])
+        if result and result.failed:
+            errors.seek(0)
+            message.attach(f'{kind}-errors.csv', errors.read(), 'text/csv')
+        message.send(fail_silently=False)
+    return summary
+
@@ -1,9 +1,36 @@
-from django.test import TestCase, Client
+from django.db import connection
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import AsyncClient, TestCase, Client, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from django.core.cache import cache as default_cache, caches
+
+import csv
+import datetime
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+
+from apps.kb.models import ArticleTag, KnowledgeBaseArticle, Tag
+from apps.payments.models import Invoice, Payment
+from apps.services.models import Service
+from apps.tickets.models import Ticket, TicketComment, TicketStatusEvent, TicketSummary
+from apps.tickets.views import TicketViewSet
+from . import benchmark, cache, counters, export, imports, profiling, timeseries, views
+from . import async_views
+from .async_views import gather
 from .models import Profile, FAQ, FAQInteraction
 from .forms import ContactForm, RegistrationForm, ProfileForm
 
@@ -149,6 +176,596 @@ class CoreViewsTest(TestCase):
             self.assertEqual(response.status_code, 200)
 
 
+class AsyncViewsTest(TestCase):
+    """Tests for the async read views and their helpers"""
+    
+    def setUp(self):
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        FAQ.objects.create(category='billing', question='Question', answer='Answer', is_published=True)
+    
+    def test_gather_keeps_the_order(self):
+        """Test gather returns the callables' results in order"""
+        results = async_to_sync(gather)(
+            lambda: User.objects.count(),
+            lambda: list(FAQ.objects.values_list('category', flat=True)),
+        )
+        self.assertEqual(results, [1, ['billing']])
+    
+    @override_settings(ASYNC_GATHER_CONNECTIONS=2)
+    def test_gather_limits_worker_connections(self):
+        """Test gathers of concurrent requests share ASYNC_GATHER_CONNECTIONS worker threads"""
+        running = []
+        peak = []
+        workers = set()
+        results = {}
+        lock = threading.Lock()
+        
+        def query(value):
+            with lock:
+                running.append(value)
+                peak.append(len(running))
+                workers.add(threading.current_thread().name)
+            time.sleep(0.05)
+            with lock:
+                running.remove(value)
+            return value
+        
+        def request(offset):
+            # Like a WSGI request thread, each gets its own event loop
+            results[offset] = async_to_sync(gather)(
+                *(lambda value=value: query(value) for value in range(offset, offset + 4))
+            )
+        
+        with mock.patch.object(async_views, '_runs_concurrently', return_value=True):
+            threads = [threading.Thread(target=request, args=(offset,)) for offset in (0, 10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            request(20)
+        self.assertEqual(results, {0: [0, 1, 2, 3], 10: [10, 11, 12, 13], 20: [20, 21, 22, 23]})
+        self.assertEqual(max(peak), 2)
+        # The same threads, and their connections, serve later requests
+        self.assertEqual(len(workers), 2)
+    
+    async def test_async_views(self):
+        """Test the async views render under an async client and still require a login"""
+        client = AsyncClient()
+        response = await client.get(reverse('core:technician_dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('core:login'), response.url)
+        
+        await sync_to_async(client.force_login)(self.technician)
+        for name in (
+            'core:dashboard', 'core:technician_dashboard', 'core:faq', 'core:service_list',
+            'core:technician_knowledge_base'
+        ):
+            response = await client.get(reverse(name))
+            self.assertEqual(response.status_code, 200, name)
+
+
+class CoreCacheTest(TestCase):
+    """Tests for the tiered cache backend and the tag based cache API"""
+    
+    def setUp(self):
+        default_cache.clear()
+    
+    def test_tiered_cache_reads_through_local_tier(self):
+        """Test values are served from the shared tier and copied into the local tier"""
+        caches['redis'].set('greeting', 'hello')
+        self.assertIsNone(caches['local'].get('greeting'))
+        
+        self.assertEqual(default_cache.get('greeting'), 'hello')
+        self.assertEqual(caches['local'].get('greeting'), 'hello')
+        
+        default_cache.delete('greeting')
+        self.assertIsNone(caches['redis'].get('greeting'))
+        self.assertIsNone(default_cache.get('greeting'))
+    
+    def test_cached_values_are_invalidated_by_tag(self):
+        """Test invalidating a tag forces a recompute, other tags are unaffected"""
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return len(calls)
+        
+        self.assertEqual(cache.cached('numbers', compute, tags=[cache.FAQS]), 1)
+        self.assertEqual(cache.cached('numbers', compute, tags=[cache.FAQS]), 1)
+        
+        cache.invalidate(cache.SERVICES)
+        self.assertEqual(cache.cached('numbers', compute, tags=[cache.FAQS]), 1)
+        
+        cache.invalidate(cache.FAQS)
+        self.assertEqual(cache.cached('numbers', compute, tags=[cache.FAQS]), 2)
+    
+    def test_cached_async_values_are_invalidated_by_tag(self):
+        """Test the async variant stores the awaited value and recomputes after invalidation"""
+        calls = []
+        
+        async def compute():
+            calls.append(1)
+            return len(calls)
+        
+        cached = async_to_sync(cache.cached_async)
+        self.assertEqual(cached('async-numbers', compute, tags=[cache.FAQS]), 1)
+        self.assertEqual(cached('async-numbers', compute, tags=[cache.FAQS]), 1)
+        
+        cache.invalidate(cache.FAQS)
+        self.assertEqual(cached('async-numbers', compute, tags=[cache.FAQS]), 2)
+    
+    def test_dashboard_overview_is_cached(self):
+        """Test the dashboard overview is assembled from its queries once, then served from the cache"""
+        user = User.objects.create_user(username='owner', email='owner@example.com', password='password123')
+        Ticket.objects.create(title='Printer', description='Jammed', created_by=user, status='new')
+        
+        def overview():
+            return async_to_sync(cache.cached_async)(
+                'dashboard:overview', lambda: views._dashboard_overview('week'),
+                parts=['week'], tags=[cache.TICKETS]
+            )
+        
+        first = overview()
+        self.assertEqual(first['open_tickets_count'], 1)
+        self.assertEqual([ticket.title for ticket in first['recent_tickets']], ['Printer'])
+        with self.assertNumQueries(0):
+            self.assertEqual(overview()['chart_data'], first['chart_data'])
+    
+    def test_faq_signal_invalidates_faq_page(self):
+        """Test saving an FAQ invalidates the cached FAQ page once committed"""
+        key = cache.make_key('faq:published', tags=[cache.FAQS])
+        with self.captureOnCommitCallbacks(execute=True):
+            FAQ.objects.create(
+                category='billing',
+                question='How do I pay?',
+                answer='By card.',
+                is_published=True
+            )
+        self.assertNotEqual(cache.make_key('faq:published', tags=[cache.FAQS]), key)
+
+
+class TimeSeriesTest(TestCase):
+    """Tests for the bucketed time series helper"""
+    
+    def setUp(self):
+        created = [
+            datetime.datetime(2024, 1, 1, 9),
+            datetime.datetime(2024, 1, 1, 17),
+            datetime.datetime(2024, 1, 3, 12),
+            datetime.datetime(2024, 2, 14, 8),
+        ]
+        for i, moment in enumerate(created):
+            faq = FAQ.objects.create(category='technical', question=f'Question {i}', answer='Answer')
+            FAQ.objects.filter(pk=faq.pk).update(created_at=moment)
+    
+    def test_daily_buckets_are_filled(self):
+        """Test days without rows are reported as zero"""
+        with self.assertNumQueries(1):
+            series = timeseries.bucketed_counts(
+                FAQ.objects.all(), 'created_at', datetime.date(2024, 1, 1), datetime.date(2024, 1, 4)
+            )
+        self.assertEqual(series, [
+            (datetime.date(2024, 1, 1), 2),
+            (datetime.date(2024, 1, 2), 0),
+            (datetime.date(2024, 1, 3), 1),
+            (datetime.date(2024, 1, 4), 0),
+        ])
+    
+    def test_weekly_and_monthly_buckets(self):
+        """Test weeks start on Monday and months on the first"""
+        weeks = timeseries.bucketed_counts(
+            FAQ.objects.all(), 'created_at', datetime.date(2024, 1, 3), datetime.date(2024, 1, 10), timeseries.WEEK
+        )
+        self.assertEqual(weeks, [(datetime.date(2024, 1, 1), 3), (datetime.date(2024, 1, 8), 0)])
+        
+        months = timeseries.bucketed_counts(
+            FAQ.objects.all(), 'created_at', datetime.date(2024, 1, 15), datetime.date(2024, 3, 1), timeseries.MONTH
+        )
+        self.assertEqual(months, [
+            (datetime.date(2024, 1, 1), 3),
+            (datetime.date(2024, 2, 1), 1),
+            (datetime.date(2024, 3, 1), 0),
+        ])
+        self.assertEqual(timeseries.bucket_label(datetime.date(2024, 2, 1), timeseries.MONTH), 'February')
+
+
+class BufferedCounterTest(TestCase):
+    """Tests for the buffered view counters"""
+    
+    def setUp(self):
+        # The in-process Redis stand-in outlives test transactions
+        counters.faq_views.flush()
+        self.first = FAQ.objects.create(category='technical', question='First', answer='Answer')
+        self.second = FAQ.objects.create(category='billing', question='Second', answer='Answer')
+    
+    def test_increments_are_buffered_and_flushed_in_one_update(self):
+        """Test views stay in the buffer until a flush writes them with a single query"""
+        for _ in range(3):
+            counters.faq_views.increment(self.first.pk)
+        counters.faq_views.increment(self.second.pk)
+        
+        self.assertEqual(FAQ.objects.get(pk=self.first.pk).views, 0)
+        first, second = counters.faq_views.with_pending(FAQ.objects.order_by('pk'))
+        self.assertEqual((first.views, second.views), (3, 1))
+        
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.faq_views.flush(), 2)
+        self.assertEqual(
+            list(FAQ.objects.order_by('pk').values_list('views', flat=True)), [3, 1]
+        )
+        self.assertEqual(counters.faq_views.pending([self.first.pk, self.second.pk]), {})
+        self.assertEqual(counters.faq_views.flush(), 0)
+    
+    def test_in_process_buffer_without_redis(self):
+        """Test increments are kept in process when there is no Redis tier"""
+        with mock.patch.object(counters, '_redis_backend', return_value=None):
+            counters.faq_views.increment(self.first.pk, 2)
+            self.assertEqual(counters.faq_views.pending([self.first.pk]), {self.first.pk: 2})
+            counters.faq_views.flush()
+        self.assertEqual(FAQ.objects.get(pk=self.first.pk).views, 2)
+    
+    def test_view_interactions_are_counted(self):
+        """Test FAQ view interactions go through the buffer instead of creating rows"""
+        client = APIClient()
+        response = client.post(
+            f'/api/core/faqs/{self.first.pk}/interaction/',
+            {'faq': self.first.pk, 'interaction_type': 'view'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(FAQInteraction.objects.exists())
+        
+        response = client.get(f'/api/core/faqs/{self.first.pk}/')
+        self.assertEqual(response.json()['views'], 1)
+        
+        flushed = counters.flush_counters()
+        self.assertEqual(flushed['faq_views'], 1)
+        self.assertEqual(FAQ.objects.get(pk=self.first.pk).views, 1)
+
+
+@override_settings(PROFILING_ENABLED=True)
+class ProfilingTest(TestCase):
+    """Tests for the request profiling middleware"""
+    
+    def setUp(self):
+        profiling.stats.clear()
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+    
+    def test_fingerprint(self):
+        """Test queries differing only in their values share a fingerprint"""
+        self.assertEqual(
+            profiling.fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            profiling.fingerprint('SELECT * FROM t WHERE id IN (%s) AND name = \'it\'\'s\'  LIMIT 5'),
+        )
+        self.assertEqual(
+            profiling.fingerprint('INSERT INTO "t" ("a", "b") VALUES (%s, %s), (%s, %s)'),
+            'INSERT INTO "t" ("a", "b") VALUES (...)'
+        )
+    
+    def test_repeated_queries_are_detected(self):
+        """Test a query run in a loop is reported as repeated"""
+        for number in range(3):
+            User.objects.create_user(username=f'user{number}', email=f'user{number}@example.com', password='password123')
+        
+        with profiling.profile_queries() as profile:
+            for user in User.objects.all():
+                Profile.objects.get(user=user)
+        
+        self.assertEqual(profile.queries, 5)
+        self.assertEqual(list(profile.duplicates().values()), [4])
+    
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_requests_are_measured(self):
+        """Test requests get a Server-Timing header and end up in the report"""
+        self.client.force_login(self.technician)
+        response = self.client.get(reverse('core:technician_knowledge_base'))
+        
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total;dur=')
+        views, _ = profiling.report()
+        row = next(row for row in views if row['view'] == 'core:technician_knowledge_base')
+        self.assertGreaterEqual(row['requests'], 1)
+        self.assertGreater(row['avg_queries'], 0)
+        
+        out = io.StringIO()
+        call_command('profiling_report', stdout=out)
+        self.assertIn('core:technician_knowledge_base', out.getvalue())
+    
+    @override_settings(PROFILING_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        """Test requests above the threshold are logged with their queries"""
+        self.client.force_login(self.technician)
+        with self.assertLogs('apps.core.profiling', 'WARNING') as logs:
+            self.client.get(reverse('core:technician_tickets'))
+        self.assertIn('Slow request GET /technician/tickets/', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class KeysetPaginationTest(TestCase):
+    """Tests for the keyset pagination of the high volume API endpoints"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            is_staff=True
+        )
+        faq = FAQ.objects.create(category='technical', question='Question', answer='Answer')
+        FAQInteraction.objects.bulk_create([
+            FAQInteraction(faq=faq, interaction_type='helpful') for _ in range(25)
+        ])
+        # Rows sharing a timestamp are ordered by id
+        same_time = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+        FAQInteraction.objects.filter(id__in=FAQInteraction.objects.order_by('id').values('id')[5:15]).update(
+            created_at=same_time
+        )
+        self.expected = list(FAQInteraction.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+    
+    def test_pages_follow_the_keyset(self):
+        """Test following next links returns every row once, in order, without counting"""
+        seen = []
+        url = '/api/core/faq-interactions/?page_size=10'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url).json()
+            self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+            self.assertNotIn('count', page)
+            seen.extend(row['id'] for row in page['results'])
+            last_page = page
+            url = page['next']
+        self.assertEqual(seen, self.expected)
+        
+        previous = self.client.get(last_page['previous']).json()
+        self.assertEqual([row['id'] for row in previous['results']], self.expected[10:20])
+        self.assertIsNotNone(previous['next'])
+    
+    def test_page_size_and_count_options(self):
+        """Test the page size is capped and the total count is opt in"""
+        with self.settings(API_MAX_PAGE_SIZE=20):
+            page = self.client.get('/api/core/faq-interactions/?page_size=500&count=true').json()
+        self.assertEqual(len(page['results']), 20)
+        self.assertEqual(page['count'], 25)
+        self.assertIsNone(page['previous'])
+        
+        response = self.client.get('/api/core/faq-interactions/?cursor=bogus')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportTest(TestCase):
+    """Tests for the streaming CSV and JSON lines exports"""
+    
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123'
+        )
+        other = User.objects.create_user(username='other', email='other@example.com', password='password123')
+        same_time = datetime.datetime(2024, 1, 1, 12, 0)
+        for i in range(7):
+            Ticket.objects.create(
+                title=f'Ticket, "{i}"',
+                description='Description',
+                created_by=self.customer,
+                created_at=same_time if i % 2 else same_time + datetime.timedelta(hours=i)
+            )
+        Ticket.objects.create(title='Not mine', description='Description', created_by=other)
+        for amount, invoice_status in (('10.00', 'paid'), ('20.50', 'pending'), ('30.00', 'paid')):
+            Invoice.objects.create(
+                user=self.customer, amount=amount, status=invoice_status, due_date=datetime.date(2024, 2, 1)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.customer)
+    
+    def test_rows_are_read_in_keyset_chunks(self):
+        """Test every row is exported once, in order, one query per chunk"""
+        tickets = Ticket.objects.filter(created_by=self.customer)
+        expected = list(tickets.order_by('-created_at', '-id').values_list('id', 'title'))
+    
+        with CaptureQueriesContext(connection) as queries:
+            chunks = list(export.export_rows(tickets, ['id', 'title'], ['-created_at'], chunk_size=3))
+        self.assertEqual([len(rows) for rows in chunks], [3, 3, 1])
+        self.assertEqual([row for rows in chunks for row in rows], expected)
+        self.assertEqual(len(queries), 3)
+    
+    def test_api_export_csv(self):
+        """Test the CSV export streams the user's own tickets"""
+        with mock.patch.object(TicketViewSet, 'export_chunk_size', 2):
+            response = self.client.get('/api/tickets/tickets/export/')
+    
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="tickets-', response['Content-Disposition'])
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], list(TicketViewSet.export_fields))
+        self.assertEqual(len(rows), 8)
+        self.assertEqual({row[rows[0].index('created_by__email')] for row in rows[1:]}, {'customer@example.com'})
+        self.assertIn('Ticket, "3"', [row[1] for row in rows[1:]])
+    
+    def test_api_export_jsonl_gzip_filtered(self):
+        """Test the JSON lines export applies the viewset filters and ordering, compressed"""
+        response = self.client.get(
+            '/api/payments/invoices/export/?export_format=jsonl&compress=gzip&status=paid&ordering=amount'
+        )
+    
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        lines = gzip.decompress(b''.join(response.streaming_content)).decode().splitlines()
+        invoices = [json.loads(line) for line in lines]
+        self.assertEqual([invoice['amount'] for invoice in invoices], ['10.00', '30.00'])
+        self.assertEqual(invoices[0]['user__email'], 'customer@example.com')
+    
+        response = self.client.get('/api/payments/invoices/export/?export_format=xml')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_export_data_command(self):
+        """Test the command writes the filtered file in place of the partial one"""
+        with tempfile.TemporaryDirectory() as directory:
+            output = f'{directory}/invoices.csv'
+            call_command(
+                'export_data', 'invoices', output=output, filter=['status=paid'], chunk_size=1, stdout=io.StringIO()
+            )
+            with open(output) as file:
+                rows = list(csv.DictReader(file))
+            self.assertEqual(sorted(row['amount'] for row in rows), ['10.00', '30.00'])
+            self.assertEqual(os.listdir(directory), ['invoices.csv'])
+
+
+class ImportTest(TestCase):
+    """Tests for the bulk CSV imports"""
+    
+    USERS = (
+        'email,first_name,last_name,role\n'
+        'tech@example.com,Tina,Tech,technician\n'
+        'jane@example.com,Jane,Doe,customer\n'
+        'JANE@example.com,Jane,Again,customer\n'
+        'bad,No,Email,customer\n'
+    )
+    SERVICES = 'name,description,category,price,is_featured\nRepairs,Device repairs,hardware,25.50,yes\n'
+    TICKETS = (
+        'id,title,description,status,priority,created_by,assigned_to,service,created_at,resolved_at\n'
+        '500,Printer jam,Paper stuck,resolved,high,jane@example.com,tech@example.com,Repairs,2024-01-01 09:00,2024-01-01 15:00\n'
+        ',Slow laptop,Takes ages,new,low,jane@example.com,,,2024-01-02 10:00,\n'
+        '501,Unknown user,Text,new,low,nobody@example.com,,,,\n'
+        '502,Bad priority,Text,new,whenever,jane@example.com,jane@example.com,,,\n'
+        '500,Duplicate,Text,new,low,jane@example.com,,,,\n'
+    )
+    COMMENTS = (
+        'ticket,author,content,created_at,is_internal\n'
+        '500,jane@example.com,Any news?,2024-01-01 10:00,false\n'
+        '500,tech@example.com,On it,2024-01-01 11:00,false\n'
+        '999,tech@example.com,Lost,2024-01-01 11:00,false\n'
+    )
+    
+    def run_import(self, kind, text, chunk_size=2):
+        errors = io.StringIO()
+        result = imports.import_csv(kind, io.StringIO(text), errors, chunk_size=chunk_size)
+        return result, list(csv.DictReader(io.StringIO(errors.getvalue())))
+    
+    def test_import_pipeline(self):
+        """Test valid rows are bulk inserted with their derived rows and invalid ones reported"""
+        mail.outbox = []
+        result, errors = self.run_import('users', self.USERS)
+        self.assertEqual((result.imported, result.failed), (2, 2))
+        self.assertEqual([row['row'] for row in errors], ['3', '4'])
+        self.assertIn('email: A user with this email already exists.', errors[0]['errors'])
+        self.assertEqual(errors[1]['email'], 'bad')
+        jane = User.objects.get(email='jane@example.com')
+        self.assertEqual((jane.username, jane.has_usable_password()), ('jane@example.com', False))
+        self.assertTrue(Profile.objects.filter(user=jane).exists())
+        
+        result, errors = self.run_import('services', self.SERVICES)
+        service = Service.objects.get(name='Repairs')
+        self.assertEqual((str(service.price), service.is_featured), ('25.50', True))
+        
+        result, errors = self.run_import('tickets', self.TICKETS)
+        self.assertEqual((result.imported, result.failed), (2, 3))
+        self.assertEqual(
+            {row['row']: row['errors'] for row in errors}.keys(), {'3', '4', '5'}
+        )
+        self.assertIn('No user with this email', errors[0]['errors'])
+        self.assertIn('priority', errors[1]['errors'])
+        self.assertIn('not a technician', errors[1]['errors'])
+        self.assertIn('already exists', errors[2]['errors'])
+        
+        ticket = Ticket.objects.get(id=500)
+        self.assertEqual((ticket.service, ticket.assigned_to.email), (service, 'tech@example.com'))
+        self.assertEqual(ticket.created_at, datetime.datetime(2024, 1, 1, 9, 0))
+        self.assertEqual(ticket.status_changed_at, ticket.resolved_at)
+        self.assertEqual(ticket.sla_breached_at, ticket.sla_due_at)
+        self.assertEqual(
+            list(ticket.status_events.values_list('from_status', 'to_status', 'status_seconds')),
+            [('', 'new', None), ('new', 'resolved', 6 * 3600)]
+        )
+        self.assertEqual(Ticket.objects.get(title='Slow laptop').status_events.count(), 1)
+        self.assertEqual(
+            TicketSummary.objects.get(user=ticket.created_by).resolved_count,
+            Ticket.objects.filter(created_by=ticket.created_by, status='resolved').count()
+        )
+        # The sequence continues after the imported ids
+        self.assertGreater(Ticket.objects.create(title='New', description='New', created_by=jane).id, 500)
+        
+        result, errors = self.run_import('comments', self.COMMENTS)
+        self.assertEqual((result.imported, result.failed), (2, 1))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.first_response_at, datetime.datetime(2024, 1, 1, 11, 0))
+        self.assertEqual(ticket.first_staff_response_at, ticket.first_response_at)
+        self.assertEqual(ticket.first_response_by.email, 'tech@example.com')
+        
+        # Nothing was sent for the imported rows
+        self.assertEqual(mail.outbox, [])
+        self.assertIn('rows/s', str(result))
+    
+    def test_saves_during_an_import_keep_their_timestamps(self):
+        """Test imports keep explicit timestamps without turning off auto_now for other saves"""
+        self.run_import('users', self.USERS)
+        self.run_import('services', self.SERVICES)
+        jane = User.objects.get(email='jane@example.com')
+        stale = datetime.datetime(2020, 1, 1)
+        saved = []
+        insert = imports.TicketImporter.insert
+        
+        def insert_while_the_site_saves(importer, tickets):
+            # A ticket saved by another request while the chunk is inserted
+            ticket = Ticket(title='Live', description='Live', created_by=jane, updated_at=stale)
+            ticket.save()
+            saved.append(ticket)
+            insert(importer, tickets)
+        
+        with mock.patch.object(imports.TicketImporter, 'insert', insert_while_the_site_saves):
+            self.run_import('tickets', self.TICKETS)
+        self.assertGreater(Ticket.objects.get(pk=saved[0].pk).updated_at, stale)
+        imported = Ticket.objects.get(id=500)
+        self.assertEqual(imported.updated_at, imported.resolved_at)
+    
+    def test_missing_columns(self):
+        """Test files without the required columns are refused"""
+        with self.assertRaisesMessage(ValueError, 'Missing columns: created_by'):
+            imports.import_csv('tickets', io.StringIO('title,description\nA,B\n'))
+    
+    def test_command_and_admin_upload(self):
+        """Test the command writes the error report and admin uploads are imported in the background"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'users.csv')
+            with open(path, 'w') as file:
+                file.write(self.USERS)
+            output = io.StringIO()
+            call_command('import_data', 'users', path, stdout=output)
+            self.assertIn('2 imported, 2 failed', output.getvalue())
+            with open(f'{path}.errors.csv') as file:
+                self.assertEqual(len(list(csv.DictReader(file))), 2)
+        
+        admin = User.objects.create_superuser(username='admin', email='admin@example.com', password='password123')
+        self.client.force_login(admin)
+        url = reverse('admin:services_service_import')
+        self.assertContains(self.client.get(reverse('admin:services_service_changelist')), url)
+        upload = io.BytesIO(self.SERVICES.encode() + b'Repairs,Again,hardware,1,no\n')
+        upload.name = 'services.csv'
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            mail.outbox = []
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(url, {'file': upload})
+            self.assertRedirects(response, reverse('admin:services_service_changelist'))
+            # The upload is deleted once imported
+            self.assertEqual([name for _, _, names in os.walk(media) for name in names], [])
+        
+        self.assertTrue(Service.objects.filter(name='Repairs').exists())
+        self.assertEqual(mail.outbox[0].to, ['admin@example.com'])
+        self.assertIn('1 imported, 1 failed', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].attachments[0][0], 'services-errors.csv')
+
+
 class CoreFormsTest(TestCase):
     """Tests for core forms"""
     
@@ -272,4 +889,60 @@ class CoreAPITest(TestCase):
                 user=self.regular_user
             ).exists(),
             "FAQ interaction should be created in the database"
-        ) 
\ No newline at end of file
+        ) 
+
+
+class LoadDatasetTest(TestCase):
+    """Tests for the synthetic dataset generator and the benchmark runner"""
+    
+    def generate(self):
+        call_command(
+            'generate_load_dataset', users=30, tickets=60, comments=240, articles=12, invoices=20,
+            services=3, days=30, batch_size=25, seed=7, stdout=io.StringIO()
+        )
+    
+    def test_generated_dataset_is_consistent(self):
+        """Test generated rows carry what their signals would have written"""
+        self.generate()
+        
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Profile.objects.count(), 30)
+        self.assertEqual(Ticket.objects.count(), 60)
+        self.assertEqual(KnowledgeBaseArticle.objects.count(), 12)
+        self.assertGreater(TicketComment.objects.count(), 0)
+        self.assertGreater(Invoice.objects.count(), 0)
+        
+        for ticket in Ticket.objects.all():
+            self.assertIsNotNone(ticket.sla_due_at)
+            self.assertEqual(ticket.status_events.order_by('created_at', 'id').last().to_status, ticket.status)
+            self.assertEqual(ticket.resolved_at is not None, ticket.status not in Ticket.OPEN_STATUSES)
+            first_response = ticket.comments.exclude(author=ticket.created_by_id).order_by('created_at').first()
+            self.assertEqual(ticket.first_response_at, first_response.created_at if first_response else None)
+        self.assertFalse(TicketComment.objects.filter(created_at__gt=datetime.datetime.now()).exists())
+        
+        call_command('rebuild_ticket_summaries', check=True, stdout=io.StringIO())
+        for tag in Tag.objects.all():
+            self.assertEqual(tag.article_count, ArticleTag.objects.filter(tag=tag).count())
+        for payment in Payment.objects.filter(status='success').select_related('invoice'):
+            self.assertEqual(payment.invoice.status, Invoice.Status.PAID)
+        
+        # Sequences continue after the explicit ids
+        User.objects.create_user(username='after', email='after@example.com', password='password123')
+    
+    def test_benchmark_command(self):
+        """Test the benchmark records every endpoint and flags regressions"""
+        self.generate()
+        
+        with tempfile.NamedTemporaryFile('w+', suffix='.json') as file:
+            call_command('benchmark', repeat=1, save=file.name, stdout=io.StringIO())
+            results = json.load(file)
+        
+        self.assertEqual(set(results), {name for name, *_ in benchmark.ENDPOINTS})
+        for name in ('technician dashboard', 'technician tickets', 'api tickets', 'api invoices'):
+            self.assertEqual(results[name]['status'], 200, name)
+            self.assertGreater(results[name]['queries'], 0, name)
+            self.assertGreater(results[name]['peak_kib'], 0, name)
+        
+        worse = {'faq': dict(results['faq'], queries=results['faq']['queries'] + 1)}
+        self.assertEqual(benchmark.compare(results, worse), [('faq', 'queries', results['faq']['queries'], worse['faq']['queries'])])
+        self.assertEqual(benchmark.compare(results, results), [])
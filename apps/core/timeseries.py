@@ -0,0 +1,92 @@
+"""
+Bucketed time series for charts and reports.
+
+``bucketed_counts`` groups a queryset by day, week or month of a date field
+in a single aggregate query and fills buckets without rows with zero, so
+charts always get one value per bucket.
+"""
+import datetime
+
+from django.db.models import Count
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+
+TRUNCATE = {
+    DAY: TruncDay,
+    WEEK: TruncWeek,
+    MONTH: TruncMonth,
+}
+
+
+def bucket_start(value, interval):
+    """Return the first day of the bucket containing ``value`` (date or datetime)"""
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if interval == WEEK:
+        # Weeks start on Monday, like TruncWeek
+        return value - datetime.timedelta(days=value.weekday())
+    if interval == MONTH:
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(value, interval):
+    """Return the first day of the bucket after the one starting at ``value``"""
+    if interval == WEEK:
+        return value + datetime.timedelta(days=7)
+    if interval == MONTH:
+        return (value.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return value + datetime.timedelta(days=1)
+
+
+def bucket_starts(start, end, interval):
+    """Return the first day of every bucket from the one containing ``start`` to the one containing ``end``"""
+    buckets = []
+    current = bucket_start(start, interval)
+    while current <= end:
+        buckets.append(current)
+        current = next_bucket(current, interval)
+    return buckets
+
+
+def bucket_label(value, interval):
+    """Human readable chart label for the bucket starting at ``value``"""
+    if interval == WEEK:
+        return f"{value.strftime('%b %d')} - {(value + datetime.timedelta(days=6)).strftime('%b %d')}"
+    if interval == MONTH:
+        return value.strftime('%B')
+    return value.strftime('%b %d')
+
+
+def bucketed_counts(queryset, date_field, start, end, interval=DAY, aggregate=None):
+    """
+    Return ``[(bucket_start, value), ...]`` for every bucket between the
+    dates ``start`` and ``end`` (inclusive).
+
+    ``value`` is the number of rows whose ``date_field`` falls in the bucket,
+    or the result of ``aggregate`` (e.g. ``Sum('created_count')``) when given.
+    The filter on ``date_field`` is a plain range so it can use an index.
+    """
+    if isinstance(end, datetime.datetime):
+        end = end.date()
+    buckets = bucket_starts(start, end, interval)
+    range_start = datetime.datetime.combine(buckets[0], datetime.time.min)
+    range_end = datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min)
+
+    rows = queryset.filter(**{
+        f'{date_field}__gte': range_start,
+        f'{date_field}__lt': range_end,
+    }).annotate(
+        bucket=TRUNCATE[interval](date_field)
+    ).values('bucket').annotate(
+        value=aggregate if aggregate is not None else Count('pk')
+    ).order_by()
+
+    values = {}
+    for row in rows:
+        bucket = bucket_start(row['bucket'], interval)
+        values[bucket] = values.get(bucket, 0) + (row['value'] or 0)
+    return [(bucket, values.get(bucket, 0)) for bucket in buckets]
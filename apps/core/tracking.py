@@ -0,0 +1,66 @@
+"""
+In-memory tracking of model field changes.
+
+``TrackedFieldsMixin`` remembers the values of a model's ``tracked_fields``
+as they were loaded from the database and after every save, so detecting a
+change costs no query::
+
+    class Ticket(TrackedFieldsMixin, models.Model):
+        tracked_fields = ('status', 'assigned_to_id')
+
+    ticket.has_changed('status')
+    ticket.loaded_value('status')  # the value in the database
+
+The snapshot is only refreshed once ``save()`` returns, so ``pre_save`` and
+``post_save`` receivers see the values from before the save. Fields are
+tracked by attribute name (``assigned_to_id``), deferred fields are not
+tracked until they are loaded.
+"""
+
+
+class TrackedFieldsMixin:
+    """Model mixin tracking changes to ``tracked_fields`` without queries"""
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_tracked_fields()
+        return instance
+
+    def snapshot_tracked_fields(self, fields=None):
+        """Remember the current values of ``fields`` (by default all tracked fields) as saved"""
+        loaded = self.__dict__.setdefault('_loaded_values', {})
+        for name in self.tracked_fields if fields is None else fields:
+            if name in self.tracked_fields and name in self.__dict__:
+                loaded[name] = self.__dict__[name]
+
+    def loaded_value(self, name, default=None):
+        """Return the saved value of the tracked field ``name``"""
+        return self.__dict__.get('_loaded_values', {}).get(name, default)
+
+    def has_changed(self, name):
+        """Whether ``name`` differs from its saved value, always True for unsaved instances"""
+        if self._state.adding:
+            return True
+        loaded = self.__dict__.get('_loaded_values', {})
+        return name in loaded and loaded[name] != getattr(self, name)
+
+    def changed_fields(self):
+        """Return ``{name: saved value}`` for the tracked fields that changed"""
+        return {
+            name: value for name, value in self.__dict__.get('_loaded_values', {}).items()
+            if getattr(self, name) != value
+        }
+
+    def _attnames(self, fields):
+        return {self._meta.get_field(name).attname for name in fields}
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        self.snapshot_tracked_fields(None if update_fields is None else self._attnames(update_fields))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.snapshot_tracked_fields(None if fields is None else self._attnames(fields))
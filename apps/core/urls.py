@@ -39,6 +39,7 @@ urlpatterns = [
     path('technician/profile/', views.technician_profile, name='technician_profile'),
     path('technician/toggle-availability/', views.toggle_availability, name='toggle_availability'),
     path('technician/knowledge-base/', views.technician_knowledge_base, name='technician_knowledge_base'),
+    path('technician/knowledge-base/search/', views.technician_knowledge_base_search, name='technician_knowledge_base_search'),
     path('technician/knowledge-base/article/<int:article_id>/', views.technician_article_detail, name='technician_article_detail'),
     path('technician/knowledge-base/article/<int:article_id>/feedback/', views.technician_article_feedback, name='technician_article_feedback'),
     path('technician/knowledge-base/create/', views.technician_create_article, name='technician_create_article'),
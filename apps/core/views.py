@@ -2,29 +2,42 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, logout, authenticate, update_session_auth_hash
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.http import JsonResponse
+from django.urls import reverse
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.utils.http import urlsafe_base64_decode
 from django.utils.encoding import force_str
 from django.contrib.auth.tokens import default_token_generator
 from django.core.exceptions import ValidationError
-from django.db.models import Count
+from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
 from django.views.decorators.csrf import ensure_csrf_cookie
 from django.core.paginator import Paginator
 from django.core.mail import send_mail
+import asyncio
 import datetime
 import json
 import logging
+from asgiref.sync import sync_to_async
 from django.db import models
 
 from apps.accounts.models import User
 from apps.services.models import Service
-from apps.tickets.models import Ticket, TicketComment as Comment, TicketAttachment
+from apps.tickets.models import Ticket, TicketComment as Comment, TicketAttachment, TicketMetricsRollup
+from apps.tickets.metrics import (
+    rollup_totals, daily_rollup_counts, average_hours, average_response_hours,
+    team_metrics, TEAM_METRICS_CACHE_TIMEOUT, period_start, truncate_day,
+    status_counts as rollup_status_counts
+)
+from apps.tickets import sla
+from apps.tickets.summaries import summary_for
 from apps.kb.models import KnowledgeBaseArticle
 from apps.profiles.models import TechnicianProfile
 from .models import Profile, FAQ
+from . import cache, timeseries
+from .async_views import async_login_required, gather, render_async
+from .counters import article_views
 
 
 # Import the forms we created
@@ -36,6 +49,9 @@ from .forms import (
 
 logger = logging.getLogger(__name__)
 
+# Seconds the shared dashboard figures may be served from cache
+DASHBOARD_CACHE_TIMEOUT = 60
+
 # Helper function to check if user is a technician
 def is_technician(user):
     """Check if user has technician role"""
@@ -59,12 +75,16 @@ def home(request):
     }
     return render(request, 'home.html', context)
 
-def service_list(request):
-    services = Service.objects.all()
+async def service_list(request):
+    services = await sync_to_async(cache.cached)(
+        'services:catalog',
+        lambda: list(Service.objects.prefetch_related('features')),
+        tags=[cache.SERVICES]
+    )
     context = {
         'services': services,
     }
-    return render(request, 'services/service_list.html', context)
+    return await render_async(request, 'services/service_list.html', context)
 
 def service_detail(request, service_id):
     service = get_object_or_404(Service, id=service_id)
@@ -74,14 +94,12 @@ def service_detail(request, service_id):
     }
     return render(request, 'services/service_detail.html', context)
 
-@login_required
-def dashboard(request):
-    if not request.user.email_verified:
-        messages.warning(request, 'Please verify your email address to access all features.')
-    
-    # Get filter period from request (default to 'all')
-    filter_period = request.GET.get('period', 'all')
-    
+async def _dashboard_overview(filter_period):
+    """
+    Compute the ticket figures and charts shown on the dashboard for a period.
+    The independent queries run concurrently, the result is the same for every
+    user so the dashboard caches it per period.
+    """
     # Get current date and calculate filter dates
     today = timezone.now().date()
     start_date = None
@@ -98,31 +116,79 @@ def dashboard(request):
     
     # Apply date filter if selected
     if start_date:
-        ticket_query = ticket_query.filter(created_at__date__gte=start_date)
+        ticket_query = ticket_query.filter(created_at__gte=truncate_day(start_date))
     
-    # Calculate open tickets count
-    open_tickets_count = ticket_query.exclude(status__in=['resolved', 'closed']).count()
+    # Ticket trend data based on filter period, one grouped query per series
+    if filter_period == 'month':
+        # Last 4 weeks
+        interval, trend_start = timeseries.WEEK, today - timedelta(weeks=3)
+    elif filter_period == 'quarter':
+        # Last 3 months
+        trend_start = today.replace(day=1)
+        for _ in range(2):
+            trend_start = (trend_start - timedelta(days=1)).replace(day=1)
+        interval = timeseries.MONTH
+    else:
+        # Week and default: Last 7 days
+        interval, trend_start = timeseries.DAY, today - timedelta(days=6)
+    daily_rollups = TicketMetricsRollup.objects.filter(granularity=TicketMetricsRollup.Granularity.DAY)
+    
+    def open_tickets_count():
+        # IN on the open statuses can use the status index, NOT IN cannot
+        return ticket_query.filter(status__in=Ticket.OPEN_STATUSES).count()
+    
+    def overdue_tickets():
+        return ticket_query.filter(
+            status__in=['new', 'assigned', 'in_progress', 'pending'],
+            due_date__lt=timezone.now()
+        ).count()
+    
+    def resolved_today():
+        return rollup_totals(start=today, status='resolved')['resolved_count']
+    
+    def period_totals():
+        # Averages come from the precomputed rollups instead of per-ticket loops
+        return rollup_totals(start=start_date)
+    
+    def resolved_totals():
+        return rollup_totals(start=start_date, status='resolved')
     
-    # Calculate resolved tickets today
-    resolved_today = ticket_query.filter(
-        status='resolved',
-        resolved_at__date=today
-    ).count()
+    def first_bucket():
+        # Only the all time average needs the first day with tickets
+        if filter_period != 'all':
+            return None
+        return TicketMetricsRollup.objects.filter(
+            granularity=TicketMetricsRollup.Granularity.DAY,
+            created_count__gt=0
+        ).order_by('bucket_start').values_list('bucket_start', flat=True).first()
+    
+    def recent_tickets():
+        # Get recent tickets (last 5)
+        return list(ticket_query.order_by('-created_at')[:5])
+    
+    def created_series():
+        return timeseries.bucketed_counts(
+            daily_rollups, 'bucket_start', trend_start, today, interval, aggregate=Sum('created_count')
+        )
+    
+    def resolved_series():
+        return timeseries.bucketed_counts(
+            daily_rollups, 'bucket_start', trend_start, today, interval, aggregate=Sum('resolved_count')
+        )
+    
+    (
+        open_tickets_count, overdue_tickets, resolved_today, period_totals, resolved_totals,
+        first_bucket, recent_tickets, created_series, resolved_series, current_status_counts
+    ) = await gather(
+        open_tickets_count, overdue_tickets, resolved_today, period_totals, resolved_totals,
+        first_bucket, recent_tickets, created_series, resolved_series, rollup_status_counts
+    )
     
     # Calculate average response time (first comment after ticket creation)
-    avg_response_time_hours = 0
-    tickets_with_comments = ticket_query.filter(comments__isnull=False).distinct()
-    if tickets_with_comments.exists():
-        total_hours = 0
-        count = 0
-        for ticket in tickets_with_comments:
-            first_comment = ticket.comments.order_by('created_at').first()
-            if first_comment:
-                response_time = first_comment.created_at - ticket.created_at
-                total_hours += response_time.total_seconds() / 3600  # Convert to hours
-                count += 1
-        if count > 0:
-            avg_response_time_hours = round(total_hours / count, 1)
+    avg_response_time_hours = average_hours(
+        period_totals['first_response_seconds'],
+        period_totals['first_response_count']
+    )
     
     # Format the average response time
     if avg_response_time_hours < 1:
@@ -132,26 +198,12 @@ def dashboard(request):
     else:
         avg_response_time = f"{avg_response_time_hours}h"
     
-    # Calculate overdue tickets
-    overdue_tickets = ticket_query.filter(
-        status__in=['new', 'assigned', 'in_progress', 'pending'],
-        due_date__lt=timezone.now()
-    ).count()
-    
     # Calculate average resolution time
-    avg_resolution_time_hours = 0
-    resolved_tickets = ticket_query.filter(
-        status='resolved',
-        resolved_at__isnull=False
+    avg_resolution_time_hours = average_hours(
+        resolved_totals['resolution_seconds'],
+        resolved_totals['resolved_count']
     )
     
-    if resolved_tickets.exists():
-        total_resolution_hours = 0
-        for ticket in resolved_tickets:
-            resolution_time = ticket.resolved_at - ticket.created_at
-            total_resolution_hours += resolution_time.total_seconds() / 3600
-        avg_resolution_time_hours = round(total_resolution_hours / resolved_tickets.count(), 1)
-    
     # Format the average resolution time
     if avg_resolution_time_hours < 1:
         avg_resolution_time = f"{int(avg_resolution_time_hours * 60)}m"
@@ -164,82 +216,27 @@ def dashboard(request):
     daily_created_avg = 0
     if filter_period == 'all':
         # All time average
-        first_ticket = Ticket.objects.order_by('created_at').first()
-        if first_ticket:
-            days_since_first_ticket = (today - first_ticket.created_at.date()).days + 1
-            total_tickets = Ticket.objects.count()
+        if first_bucket:
+            days_since_first_ticket = (today - first_bucket.date()).days + 1
+            total_tickets = period_totals['created_count']
             daily_created_avg = round(total_tickets / days_since_first_ticket, 1)
     else:
         # Average over the filtered period
         if start_date:
             days_in_period = (today - start_date).days + 1
-            tickets_in_period = Ticket.objects.filter(created_at__date__gte=start_date).count()
+            tickets_in_period = period_totals['created_count']
             daily_created_avg = round(tickets_in_period / days_in_period, 1)
     
     # Calculate customer satisfaction rate (mock data for now)
     # In a real system, this would come from ticket feedback/ratings
     satisfaction_rate = "95%"
     
-    # Get recent tickets (last 5)
-    recent_tickets = ticket_query.order_by('-created_at')[:5]
-    
     # Get chart data
     chart_data = {}
     
-    # Ticket trend data based on filter period
-    trend_dates = []
-    trend_created = []
-    trend_resolved = []
-    
-    if filter_period == 'week':
-        # Last 7 days data
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            trend_dates.append(date.strftime('%b %d'))
-            trend_created.append(Ticket.objects.filter(created_at__date=date).count())
-            trend_resolved.append(Ticket.objects.filter(resolved_at__date=date).count())
-            
-    elif filter_period == 'month':
-        # Last 30 days data (grouped by weeks)
-        for i in range(4):
-            start_day = today - timedelta(days=(i+1)*7)
-            end_day = today - timedelta(days=i*7)
-            week_label = f"{start_day.strftime('%b %d')} - {end_day.strftime('%b %d')}"
-            trend_dates.append(week_label)
-            trend_created.append(Ticket.objects.filter(created_at__date__gt=start_day, created_at__date__lte=end_day).count())
-            trend_resolved.append(Ticket.objects.filter(resolved_at__date__gt=start_day, resolved_at__date__lte=end_day).count())
-        trend_dates.reverse()
-        trend_created.reverse()
-        trend_resolved.reverse()
-            
-    elif filter_period == 'quarter':
-        # Last 90 days data (grouped by months)
-        for i in range(3):
-            month_start = today.replace(day=1) - timedelta(days=i*30)
-            month_label = month_start.strftime('%B')
-            trend_dates.append(month_label)
-            month_created = Ticket.objects.filter(
-                created_at__year=month_start.year,
-                created_at__month=month_start.month
-            ).count()
-            month_resolved = Ticket.objects.filter(
-                resolved_at__year=month_start.year,
-                resolved_at__month=month_start.month,
-                status='resolved'
-            ).count()
-            trend_created.append(month_created)
-            trend_resolved.append(month_resolved)
-        trend_dates.reverse()
-        trend_created.reverse()
-        trend_resolved.reverse()
-            
-    else:
-        # Default: Last 7 days
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            trend_dates.append(date.strftime('%b %d'))
-            trend_created.append(Ticket.objects.filter(created_at__date=date).count())
-            trend_resolved.append(Ticket.objects.filter(resolved_at__date=date).count())
+    trend_dates = [timeseries.bucket_label(bucket, interval) for bucket, _ in created_series]
+    trend_created = [count for _, count in created_series]
+    trend_resolved = [count for _, count in resolved_series]
     
     chart_data['daily'] = {
         'labels': trend_dates,
@@ -253,56 +250,14 @@ def dashboard(request):
     
     for status_code, status_name in Ticket.Status.choices:
         status_labels.append(str(status_name))  # Convert proxy object to string
-        status_counts.append(Ticket.objects.filter(status=status_code).count())
+        status_counts.append(current_status_counts.get(status_code, 0))
     
     chart_data['status'] = {
         'labels': status_labels,
         'counts': status_counts
     }
     
-    # User-specific metrics for staff
-    staff_metrics = None
-    if request.user.is_staff:
-        if hasattr(request.user, 'assigned_tickets'):
-            assigned_count = request.user.assigned_tickets.count()
-            resolved_count = request.user.assigned_tickets.filter(status='resolved').count()
-            
-            # Calculate resolution rate percentage
-            resolution_rate = 0
-            if assigned_count > 0:
-                resolution_rate = int((resolved_count / assigned_count) * 100)
-            
-            # Calculate average handling time for this staff member
-            avg_handling_time_hours = 0
-            resolved_by_user = request.user.assigned_tickets.filter(
-                status='resolved', 
-                resolved_at__isnull=False
-            )
-            
-            if resolved_by_user.exists():
-                total_handling_hours = 0
-                for ticket in resolved_by_user:
-                    handling_time = ticket.resolved_at - ticket.created_at
-                    total_handling_hours += handling_time.total_seconds() / 3600
-                avg_handling_time_hours = round(total_handling_hours / resolved_by_user.count(), 1)
-            
-            # Format average handling time
-            if avg_handling_time_hours < 1:
-                avg_handling_time = f"{int(avg_handling_time_hours * 60)}m"
-            elif avg_handling_time_hours >= 24:
-                avg_handling_time = f"{int(avg_handling_time_hours / 24)}d"
-            else:
-                avg_handling_time = f"{avg_handling_time_hours}h"
-            
-            staff_metrics = {
-                'assigned_count': assigned_count,
-                'resolved_count': resolved_count,
-                'resolution_rate': resolution_rate,
-                'avg_handling_time': avg_handling_time
-            }
-    
-    context = {
-        'filter_period': filter_period,
+    return {
         'open_tickets_count': open_tickets_count,
         'resolved_today': resolved_today,
         'avg_response_time': avg_response_time,
@@ -310,48 +265,94 @@ def dashboard(request):
         'overdue_tickets': overdue_tickets,
         'recent_tickets': recent_tickets,
         'chart_data': json.dumps(chart_data),
-        'staff_metrics': staff_metrics,
         'daily_created_avg': daily_created_avg,
         'satisfaction_rate': satisfaction_rate,
     }
-    return render(request, 'dashboard.html', context)
 
-@login_required
-def profile(request):
-    # Get user tickets data
-    user_tickets = Ticket.objects.filter(created_by=request.user)
-    total_tickets = user_tickets.count()
-    resolved_tickets = user_tickets.filter(status__in=['resolved', 'closed']).count()
-    
-    # Calculate average response time based on ticket comments
-    avg_response_time_hours = 0
-    if total_tickets > 0:
-        # Get the first comment by a staff member for each ticket
-        # This import is redundant as TicketComment is already imported at the top of the file
-        # from apps.tickets.models import TicketComment
+def _dashboard_staff_metrics(user):
+    """Assignment and handling time figures for a staff member's dashboard"""
+    if hasattr(user, 'assigned_tickets'):
+        assigned_count = user.assigned_tickets.count()
+        resolved_count = user.assigned_tickets.filter(status='resolved').count()
         
-        # Get tickets with at least one comment
-        tickets_with_comments = user_tickets.filter(comments__isnull=False).distinct()
+        # Calculate resolution rate percentage
+        resolution_rate = 0
+        if assigned_count > 0:
+            resolution_rate = int((resolved_count / assigned_count) * 100)
         
-        # Calculate average time for first response
-        total_response_time = 0
-        tickets_with_response = 0
+        # Calculate average handling time for this staff member
+        handling_totals = rollup_totals(technician=user, status='resolved')
+        avg_handling_time_hours = average_hours(
+            handling_totals['resolution_seconds'],
+            handling_totals['resolved_count']
+        )
         
-        for ticket in tickets_with_comments:
-            # Get the first comment by someone other than the ticket creator
-            first_response = Comment.objects.filter(
-                ticket=ticket,
-                author__is_staff=True
-            ).exclude(author=request.user).order_by('created_at').first()
-            
-            if first_response:
-                # Calculate time difference between ticket creation and first response
-                response_time = (first_response.created_at - ticket.created_at).total_seconds() / 3600  # hours
-                total_response_time += response_time
-                tickets_with_response += 1
+        # Format average handling time
+        if avg_handling_time_hours < 1:
+            avg_handling_time = f"{int(avg_handling_time_hours * 60)}m"
+        elif avg_handling_time_hours >= 24:
+            avg_handling_time = f"{int(avg_handling_time_hours / 24)}d"
+        else:
+            avg_handling_time = f"{avg_handling_time_hours}h"
         
-        if tickets_with_response > 0:
-            avg_response_time_hours = total_response_time / tickets_with_response
+        return {
+            'assigned_count': assigned_count,
+            'resolved_count': resolved_count,
+            'resolution_rate': resolution_rate,
+            'avg_handling_time': avg_handling_time
+        }
+    return None
+
+@async_login_required
+async def dashboard(request):
+    user = await request.auser()
+    if not user.email_verified:
+        messages.warning(request, 'Please verify your email address to access all features.')
+    
+    # Get filter period from request (default to 'all')
+    filter_period = request.GET.get('period', 'all')
+    
+    # User-specific metrics for staff
+    def staff_metrics():
+        if not user.is_staff:
+            return None
+        return cache.cached(
+            'dashboard:staff_metrics',
+            lambda: _dashboard_staff_metrics(user),
+            parts=[user.id],
+            tags=[cache.TICKETS],
+            timeout=DASHBOARD_CACHE_TIMEOUT
+        )
+    
+    # Ticket figures are shared by all users and cached until tickets change,
+    # on a miss their queries run concurrently with the staff metrics
+    overview, (staff_metrics,) = await asyncio.gather(
+        cache.cached_async(
+            'dashboard:overview',
+            lambda: _dashboard_overview(filter_period),
+            parts=[filter_period],
+            tags=[cache.TICKETS],
+            timeout=DASHBOARD_CACHE_TIMEOUT
+        ),
+        gather(staff_metrics)
+    )
+    context = {
+        'filter_period': filter_period,
+        'staff_metrics': staff_metrics,
+        **overview,
+    }
+    return await render_async(request, 'dashboard.html', context)
+
+@login_required
+def profile(request):
+    # Get user tickets data, the counts come from the user's ticket summary
+    user_tickets = Ticket.objects.filter(created_by=request.user)
+    summary = summary_for(request.user)
+    total_tickets = summary.total_count
+    resolved_tickets = summary.done_count
+    
+    # Average time until a staff member first answered the user's tickets
+    avg_response_time_hours = average_response_hours(user_tickets, field='first_staff_response_at')
     
     # Format the average response time
     hours = int(avg_response_time_hours)
@@ -395,18 +396,13 @@ def profile(request):
     if total_tickets > 0:
         resolution_rate = (resolved_tickets / total_tickets) * 100
     
-    # Calculate average ticket age for open tickets
-    open_tickets = user_tickets.exclude(status__in=['resolved', 'closed'])
-    avg_ticket_age_days = 0
-    
-    if open_tickets.exists():
-        total_age = sum((timezone.now() - ticket.created_at).days for ticket in open_tickets)
-        avg_ticket_age_days = total_age / open_tickets.count()
+    # Average age of the open tickets
+    avg_ticket_age_days = summary.average_open_age().total_seconds() / 86400
     
     context = {
         'total_tickets': total_tickets,
         'resolved_tickets': resolved_tickets,
-        'open_tickets': total_tickets - resolved_tickets,
+        'open_tickets': summary.open_count,
         'avg_response_time': avg_response_time,
         'recent_activities': recent_activities,
         'resolution_rate': round(resolution_rate, 1),
@@ -968,13 +964,6 @@ def tickets(request):
     """
     Display user's support tickets and handle new ticket creation.
     """
-    # Add extensive logging
-    logger.info("=== Tickets View ===")
-    logger.info(f"User authenticated: {request.user.is_authenticated}")
-    if request.user.is_authenticated:
-        logger.info(f"User email: {request.user.email}")
-        logger.info(f"User ID: {request.user.id}")
-
     if not request.user.is_authenticated:
         messages.error(request, 'Please log in to view your tickets.')
         return redirect('core:login')
@@ -984,46 +973,20 @@ def tickets(request):
         created_by=request.user
     ).order_by('-created_at')
     
-    # Log detailed ticket information
-    logger.info(f"Total tickets found: {user_tickets.count()}")
-    for ticket in user_tickets:
-        logger.info(
-            f"Ticket #{ticket.id}: {ticket.title}\n"
-            f"  - Status: {ticket.status}\n"
-            f"  - Service: {ticket.service.name if ticket.service else 'No service'}\n"
-            f"  - Created: {ticket.created_at}\n"
-            f"  - Priority: {ticket.priority}"
-        )
-    
-    # Calculate counts for statistics cards
-    resolved_tickets_count = user_tickets.filter(status='resolved').count()
-    in_progress_tickets_count = user_tickets.filter(status='in_progress').count()
-    new_tickets_count = user_tickets.filter(status='new').count()
+    # Counts for the statistics cards, from the user's ticket summary
+    summary = summary_for(request.user)
     
     services = Service.objects.filter(is_active=True)
-    
-    # Log tickets and services for debugging
-    logger.info("=== Available Services ===")
-    for service in services:
-        logger.info(f"Service: {service.name} (ID: {service.id})")
 
     context = {
         'tickets': user_tickets,
         'services': services,
-        'resolved_tickets_count': resolved_tickets_count,
-        'in_progress_tickets_count': in_progress_tickets_count,
-        'new_tickets_count': new_tickets_count,
-        'total_tickets': user_tickets.count(),
+        'resolved_tickets_count': summary.resolved_count,
+        'in_progress_tickets_count': summary.in_progress_count,
+        'new_tickets_count': summary.new_count,
+        'total_tickets': summary.total_count,
     }
 
-    # Log the full context for debugging
-    logger.info("=== Template Context ===")
-    logger.info(f"Total tickets: {context['total_tickets']}")
-    logger.info(f"Services count: {len(context['services'])}")
-    logger.info(f"Resolved tickets: {context['resolved_tickets_count']}")
-    logger.info(f"In progress tickets: {context['in_progress_tickets_count']}")
-    logger.info(f"New tickets: {context['new_tickets_count']}")
-    
     return render(request, 'support/tickets.html', context)
 
 @login_required
@@ -1150,21 +1113,25 @@ def contact(request):
     
     return render(request, 'contact.html')
 
-def faq(request):
+async def faq(request):
     """
     Display the FAQ page with categorized questions and answers.
     """
-    technical_faqs = FAQ.objects.filter(category='technical', is_published=True)
-    billing_faqs = FAQ.objects.filter(category='billing', is_published=True)
-    services_faqs = FAQ.objects.filter(category='services', is_published=True)
+    def published_faqs():
+        faqs = {'technical': [], 'billing': [], 'services': []}
+        for faq in FAQ.objects.filter(category__in=faqs, is_published=True):
+            faqs[faq.category].append(faq)
+        return faqs
+    
+    faqs = await sync_to_async(cache.cached)('faq:published', published_faqs, tags=[cache.FAQS])
     
     context = {
-        'technical_faqs': technical_faqs,
-        'billing_faqs': billing_faqs,
-        'services_faqs': services_faqs,
+        'technical_faqs': faqs['technical'],
+        'billing_faqs': faqs['billing'],
+        'services_faqs': faqs['services'],
     }
     
-    return render(request, 'support/faq.html', context)
+    return await render_async(request, 'support/faq.html', context)
 
 def service_request(request):
     """
@@ -1398,6 +1365,7 @@ def update_ticket(request, ticket_id):
             if status and (request.user.is_staff or status != 'closed'):
                 ticket.status = status
             
+            ticket.changed_by = request.user
             ticket.save()
             
             # Handle file attachments
@@ -1436,21 +1404,22 @@ def update_ticket(request, ticket_id):
     # For GET requests, redirect to ticket detail page
     return redirect('core:ticket_detail', ticket_id=ticket_id)
 
-@login_required
-def technician_dashboard(request):
+@async_login_required
+async def technician_dashboard(request):
     """
     Display the technician dashboard with assigned tickets, SLA alerts, team performance,
-    and knowledge base articles.
+    and knowledge base articles. The independent sections are queried concurrently.
     """
+    user = await request.auser()
     # Log authentication status and role
-    logger.info(f"Technician Dashboard Access - User: {request.user.email}, "
-               f"Role: {request.user.role}, "
-               f"Is Authenticated: {request.user.is_authenticated}")
+    logger.info(f"Technician Dashboard Access - User: {user.email}, "
+               f"Role: {user.role}, "
+               f"Is Authenticated: {user.is_authenticated}")
 
     # Ensure user is a technician
-    if not is_technician(request.user) and not request.user.is_superuser:
+    if not is_technician(user) and not user.is_superuser:
         logger.warning(f"Unauthorized access attempt to technician dashboard - "
-                      f"User: {request.user.email}, Role: {request.user.role}")
+                      f"User: {user.email}, Role: {user.role}")
         messages.error(request, "Access denied. You must be a technician to view this page.")
         return redirect('core:dashboard')
     
@@ -1459,354 +1428,198 @@ def technician_dashboard(request):
     
     # Determine date range based on filter period
     now = timezone.now()
-    filter_date = None
-    
-    if filter_period == 'today':
-        filter_date = now.date()
-    elif filter_period == 'week':
-        filter_date = now - timedelta(days=7)
-    elif filter_period == 'month':
-        filter_date = now - timedelta(days=30)
-    elif filter_period == 'quarter':
-        filter_date = now - timedelta(days=90)
+    filter_date = period_start(filter_period, now)
     
     # Get tickets assigned to this technician
-    try:
-        tickets_query = Ticket.objects.filter(assigned_to=request.user)
-        
-        # Apply date filter if specified
-        if filter_date:
-            if isinstance(filter_date, datetime.date):
-                # For "today", filter by date
-                tickets_query = tickets_query.filter(created_at__date=filter_date)
-            else:
-                # For other periods, filter by range
-                tickets_query = tickets_query.filter(created_at__gte=filter_date)
-    except Exception as e:
-        logger.error(f"Error fetching tickets: {str(e)}")
-        tickets_query = Ticket.objects.none()  # Empty queryset as fallback
-    
-    # Get assigned tickets with pagination
-    paginator = Paginator(tickets_query.order_by('-created_at'), 10)
-    page_number = request.GET.get('page', 1)
-    assigned_tickets = paginator.get_page(page_number)
-    
-    # Calculate metrics
-    assigned_tickets_count = tickets_query.count()
-    resolved_today = tickets_query.filter(
-        status='resolved',
-        updated_at__date=now.date()
-    ).count()
-    
-    # Calculate average response time
-    avg_response_time_hours = 0
-    tickets_with_response = 0
-    
-    for ticket in tickets_query.filter(status__in=['in_progress', 'resolved', 'closed']):
-        # Find the first response by the technician
-        first_response = Comment.objects.filter(
-            ticket=ticket,
-            author=request.user
-        ).order_by('created_at').first()
-        
-        if first_response:
-            # Calculate time difference
-            response_time = (first_response.created_at - ticket.created_at).total_seconds() / 3600  # hours
-            avg_response_time_hours += response_time
-            tickets_with_response += 1
-    
-    if tickets_with_response > 0:
-        avg_response_time_hours = avg_response_time_hours / tickets_with_response
-        
-    # Format the average response time
-    hours = int(avg_response_time_hours)
-    minutes = int((avg_response_time_hours - hours) * 60)
-    avg_response_time = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
-    
-    # Calculate resolution rate
-    all_time_assigned = Ticket.objects.filter(assigned_to=request.user).count()
-    all_time_resolved = Ticket.objects.filter(
-        assigned_to=request.user,
-        status__in=['resolved', 'closed']
-    ).count()
-    
-    resolution_rate = 0
-    if all_time_assigned > 0:
-        resolution_rate = int((all_time_resolved / all_time_assigned) * 100)
+    tickets_query = Ticket.objects.filter(assigned_to=user)
     
-    # Get SLA alerts
-    sla_alerts = []
+    # Apply date filter if specified, as a range so the created_at index is usable
+    if filter_date:
+        tickets_query = tickets_query.filter(created_at__gte=filter_date)
     
-    # Get tickets that are at risk of breaching SLA
-    try:
-        at_risk_tickets = tickets_query.filter(status__in=['new', 'in_progress'])
-    except Exception as e:
-        logger.error(f"Error fetching at-risk tickets: {str(e)}")
-        at_risk_tickets = []
-    
-    for ticket in at_risk_tickets:
-        # Calculate SLA based on priority
-        sla_hours = 24  # Default SLA
-        if ticket.priority == 'high':
-            sla_hours = 4
-        elif ticket.priority == 'medium':
-            sla_hours = 8
-        elif ticket.priority == 'low':
-            sla_hours = 24
-        
-        # Calculate hours since creation
-        hours_since_creation = (now - ticket.created_at).total_seconds() / 3600
-        
-        # Check if SLA is breached or at risk
-        if hours_since_creation >= sla_hours:
-            sla_alerts.append({
-                'ticket_id': ticket.id,
-                'title': ticket.title,
-                'severity': 'high',
-                'message': f'SLA breached: Ticket has been open for {int(hours_since_creation)} hours (SLA: {sla_hours} hours)'
-            })
-        elif hours_since_creation >= (sla_hours * 0.75):
-            sla_alerts.append({
-                'ticket_id': ticket.id,
-                'title': ticket.title,
-                'severity': 'medium',
-                'message': f'SLA at risk: Ticket has been open for {int(hours_since_creation)} hours (SLA: {sla_hours} hours)'
-            })
-    
-    # Sort alerts by severity (high first)
-    sla_alerts.sort(key=lambda x: 0 if x['severity'] == 'high' else 1)
-    
-    # Get team performance data
-    team_performance = []
+    def ticket_counts():
+        # Get assigned tickets with pagination
+        paginator = Paginator(tickets_query.order_by('-created_at'), 10)
+        assigned_tickets = paginator.get_page(request.GET.get('page', 1))
+        assigned_tickets.object_list = list(assigned_tickets.object_list)
+        
+        try:
+            counts = tickets_query.aggregate(
+                resolved_today=Count('id', filter=models.Q(status='resolved', updated_at__gte=truncate_day(now))),
+                resolved=Count('id', filter=models.Q(status='resolved')),
+                in_progress=Count('id', filter=models.Q(status='in_progress')),
+                overdue=Count('id', filter=models.Q(status__in=['new', 'in_progress'], due_date__lt=now)),
+            )
+        except Exception as e:
+            logger.error(f"Error counting tickets: {str(e)}")
+            counts = {'resolved_today': 0, 'resolved': 0, 'in_progress': 0, 'overdue': 0}
+        
+        return {
+            'assigned_tickets': assigned_tickets,
+            'assigned_tickets_count': paginator.count,
+            'resolved_today': counts['resolved_today'],
+            'resolved_tickets_count': counts['resolved'],
+            'in_progress_tickets_count': counts['in_progress'],
+            'overdue_tickets_count': counts['overdue'],
+        }
     
-    # Get technicians (users with role='technician')
-    # Use appropriate method to get technicians based on how User model is structured
-    try:
-        technicians = User.objects.filter(role='technician')
-    except:
-        # Fallback in case role field isn't directly on the User model
-        technicians = User.objects.all().filter(is_staff=False, is_superuser=False)
-    
-    for technician in technicians:
-        # Skip if this is the current user
-        if technician.id == request.user.id:
-            continue
-            
-        assigned_count = Ticket.objects.filter(assigned_to=technician).count()
-        resolved_count = Ticket.objects.filter(
-            assigned_to=technician,
-            status__in=['resolved', 'closed']
-        ).count()
+    def performance():
+        # Calculate average response time from the denormalized first staff response
+        avg_response_time_hours = average_response_hours(
+            tickets_query.filter(status__in=['in_progress', 'resolved', 'closed']),
+            field='first_staff_response_at'
+        )
         
-        # Calculate performance score (simple metric based on resolution rate)
-        performance_score = 0
-        if assigned_count > 0:
-            performance_score = int((resolved_count / assigned_count) * 100)
-        
-        # Determine performance level
-        performance_level = 'below-average'
-        if performance_score >= 90:
-            performance_level = 'excellent'
-        elif performance_score >= 75:
-            performance_level = 'good'
-        elif performance_score >= 50:
-            performance_level = 'average'
-        
-        # Calculate average response time for technician
-        tech_avg_response_hours = 0
-        tech_tickets_with_response = 0
-        
-        for ticket in Ticket.objects.filter(assigned_to=technician):
-            first_response = Comment.objects.filter(
-                ticket=ticket,
-                author=technician
-            ).order_by('created_at').first()
-            
-            if first_response:
-                tech_response_time = (first_response.created_at - ticket.created_at).total_seconds() / 3600
-                tech_avg_response_hours += tech_response_time
-                tech_tickets_with_response += 1
-        
-        if tech_tickets_with_response > 0:
-            tech_avg_response_hours = tech_avg_response_hours / tech_tickets_with_response
-            
-        # Format the technician's average response time
-        tech_hours = int(tech_avg_response_hours)
-        tech_minutes = int((tech_avg_response_hours - tech_hours) * 60)
-        tech_avg_response = f"{tech_hours}h {tech_minutes}m" if tech_hours > 0 else f"{tech_minutes}m"
-        
-        # Add technician performance data
-        team_performance.append({
-            'name': technician.get_full_name() if hasattr(technician, 'get_full_name') else technician.username,
-            'initials': technician.get_initials() if hasattr(technician, 'get_initials') else technician.username[:2].upper(),
-            'avatar': technician.avatar.url if hasattr(technician, 'avatar') and technician.avatar and hasattr(technician.avatar, 'url') else None,
-            'assigned': assigned_count,
-            'resolved': resolved_count,
-            'avg_response': tech_avg_response,
-            'performance_score': performance_score,
-            'performance_level': performance_level
-        })
+        # Format the average response time
+        hours = int(avg_response_time_hours)
+        minutes = int((avg_response_time_hours - hours) * 60)
+        avg_response_time = f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m"
+        
+        # Calculate resolution rate
+        all_time = Ticket.objects.filter(assigned_to=user).aggregate(
+            assigned=Count('id'),
+            resolved=Count('id', filter=models.Q(status__in=['resolved', 'closed']))
+        )
+        
+        resolution_rate = 0
+        if all_time['assigned'] > 0:
+            resolution_rate = int((all_time['resolved'] / all_time['assigned']) * 100)
+        
+        return {'avg_response_time': avg_response_time, 'resolution_rate': resolution_rate}
     
-    # Sort by performance score (highest first)
-    team_performance.sort(key=lambda x: x['performance_score'], reverse=True)
+    def sla_alerts():
+        # Get SLA alerts from the precomputed deadlines, breached tickets first
+        try:
+            return {'sla_alerts': sla.sla_alerts(tickets_query, now)}
+        except Exception as e:
+            logger.error(f"Error fetching at-risk tickets: {str(e)}")
+            return {'sla_alerts': []}
+    
+    def team_performance():
+        # Get team performance data
+        team_performance = []
+        
+        for member in team_metrics(filter_period, cache_timeout=TEAM_METRICS_CACHE_TIMEOUT):
+            technician = member['technician']
+            # Skip if this is the current user
+            if technician.id == user.id:
+                continue
+            
+            # Format the technician's average response time
+            tech_hours = int(member['avg_response_hours'])
+            tech_minutes = int((member['avg_response_hours'] - tech_hours) * 60)
+            tech_avg_response = f"{tech_hours}h {tech_minutes}m" if tech_hours > 0 else f"{tech_minutes}m"
+            
+            # Add technician performance data
+            team_performance.append({
+                'name': technician.get_full_name() if hasattr(technician, 'get_full_name') else technician.username,
+                'initials': technician.get_initials() if hasattr(technician, 'get_initials') else technician.username[:2].upper(),
+                'avatar': technician.avatar.url if hasattr(technician, 'avatar') and technician.avatar and hasattr(technician.avatar, 'url') else None,
+                'assigned': member['assigned'],
+                'resolved': member['resolved'],
+                'avg_response': tech_avg_response,
+                'performance_score': member['performance_score'],
+                'performance_level': member['performance_level']
+            })
+        return {'team_performance': team_performance}
     
-    # Get recent knowledge base articles
-    # This assumes you have a KnowledgeBaseArticle model - adjust as needed
-    try:
-        from apps.kb.models import KnowledgeBaseArticle
+    def recent_kb_articles():
+        # Get recent knowledge base articles
         try:
-            recent_kb_articles = KnowledgeBaseArticle.objects.filter(
+            return {'recent_kb_articles': list(KnowledgeBaseArticle.objects.filter(
                 is_published=True
-            ).order_by('-created_at')[:5]
+            ).order_by('-created_at')[:5])}
         except Exception as e:
             logger.error(f"Error fetching knowledge base articles: {str(e)}")
-            recent_kb_articles = []
-    except ImportError as e:
-        logger.error(f"Knowledge base module not available: {str(e)}")
-        # If the KB module doesn't exist yet, use empty list
-        recent_kb_articles = []
-    
-    # Calculate additional ticket counts that are missing
-    try:
-        in_progress_tickets_count = tickets_query.filter(status='in_progress').count()
-    except Exception as e:
-        logger.error(f"Error counting in-progress tickets: {str(e)}")
-        in_progress_tickets_count = 0
-    
-    try:
-        # For overdue tickets, we need to identify tickets past their due date or SLA
-        # If there's a due_date field, we can use it
-        overdue_tickets_count = 0
-        if hasattr(Ticket, 'due_date'):
-            overdue_tickets_count = tickets_query.filter(
-                status__in=['new', 'in_progress'],
-                due_date__lt=now
-            ).count()
-        else:
-            # If no due_date field, count tickets with SLA breached
-            overdue_tickets_count = len([alert for alert in sla_alerts if alert['severity'] == 'high'])
-    except Exception as e:
-        logger.error(f"Error counting overdue tickets: {str(e)}")
-        overdue_tickets_count = 0
+            return {'recent_kb_articles': []}
     
-    # Get recent activities for the activity feed
-    try:
-        recent_activities = []
-        # Get recent comments by this technician
-        recent_comments = Comment.objects.filter(
-            author=request.user
-        ).select_related('ticket').order_by('-created_at')[:5]
-        
-        for comment in recent_comments:
-            recent_activities.append({
-                'description': f"You commented on ticket #{comment.ticket.id}: {comment.ticket.title}",
-                'timestamp': comment.created_at
-            })
-        
-        # Get recent ticket assignments
-        recent_assignments = tickets_query.filter(
-            assigned_to=request.user
-        ).order_by('-updated_at')[:5]
-        
-        for ticket in recent_assignments:
-            recent_activities.append({
-                'description': f"Ticket #{ticket.id} assigned to you: {ticket.title}",
-                'timestamp': ticket.updated_at
-            })
-        
-        # Sort activities by timestamp
-        recent_activities.sort(key=lambda x: x['timestamp'], reverse=True)
-        recent_activities = recent_activities[:5]  # Limit to 5 most recent
-    except Exception as e:
-        logger.error(f"Error preparing activity feed: {str(e)}")
-        recent_activities = []
+    def recent_activities():
+        # Get recent activities for the activity feed
+        try:
+            recent_activities = []
+            # Get recent comments by this technician
+            recent_comments = Comment.objects.filter(
+                author=user
+            ).select_related('ticket').order_by('-created_at')[:5]
+            
+            for comment in recent_comments:
+                recent_activities.append({
+                    'description': f"You commented on ticket #{comment.ticket.id}: {comment.ticket.title}",
+                    'timestamp': comment.created_at
+                })
+            
+            # Get recent ticket assignments
+            recent_assignments = tickets_query.order_by('-updated_at')[:5]
+            
+            for ticket in recent_assignments:
+                recent_activities.append({
+                    'description': f"Ticket #{ticket.id} assigned to you: {ticket.title}",
+                    'timestamp': ticket.updated_at
+                })
+            
+            # Sort activities by timestamp
+            recent_activities.sort(key=lambda x: x['timestamp'], reverse=True)
+            recent_activities = recent_activities[:5]  # Limit to 5 most recent
+        except Exception as e:
+            logger.error(f"Error preparing activity feed: {str(e)}")
+            recent_activities = []
         
-    # Make sure resolved_tickets_count is defined
-    if 'resolved_tickets_count' not in locals():
+        # Get recent tickets for the dashboard
+        return {
+            'recent_activities': recent_activities,
+            'recent_tickets': list(tickets_query.order_by('-created_at')[:5]),
+        }
+    
+    def chart_data():
+        # Prepare performance chart data
         try:
-            resolved_tickets_count = tickets_query.filter(status='resolved').count()
+            # Get data for the last 7 days, one grouped query per series
+            week_start = now.date() - timedelta(days=6)
+            created_series = timeseries.bucketed_counts(
+                Ticket.objects.all(), 'created_at', week_start, now.date()
+            )
+            resolved_series = timeseries.bucketed_counts(
+                Ticket.objects.filter(status='resolved'), 'resolved_at', week_start, now.date()
+            )
+            chart_dates = [timeseries.bucket_label(day, timeseries.DAY) for day, _ in created_series]
+            created_data = [count for _, count in created_series]
+            resolved_data = [count for _, count in resolved_series]
+            
+            # Prepare chart data for the template
+            chart_data = {
+                'labels': chart_dates,
+                'datasets': [
+                    {
+                        'label': 'Created Tickets',
+                        'data': created_data,
+                        'backgroundColor': 'rgba(78, 115, 223, 0.2)',
+                        'borderColor': 'rgba(78, 115, 223, 1)',
+                    },
+                    {
+                        'label': 'Resolved Tickets',
+                        'data': resolved_data,
+                        'backgroundColor': 'rgba(28, 200, 138, 0.2)',
+                        'borderColor': 'rgba(28, 200, 138, 1)',
+                    }
+                ]
+            }
         except Exception as e:
-            logger.error(f"Error counting resolved tickets: {str(e)}")
-            resolved_tickets_count = 0
+            logger.error(f"Error generating chart data: {str(e)}")
+            chart_data = {
+                'labels': [],
+                'datasets': []
+            }
+        return {'chart_data': json.dumps(chart_data)}  # Convert to JSON for JavaScript
     
-    # Prepare performance chart data
-    try:
-        # Get data for the last 7 days
-        chart_dates = []
-        created_data = []
-        resolved_data = []
-        
-        # Calculate the last 7 days
-        for i in range(6, -1, -1):
-            date = now.date() - timedelta(days=i)
-            date_str = date.strftime('%b %d')
-            chart_dates.append(date_str)
-            
-            # Count tickets created on this date
-            created_count = Ticket.objects.filter(
-                created_at__date=date
-            ).count()
-            created_data.append(created_count)
-            
-            # Count tickets resolved on this date
-            resolved_count = Ticket.objects.filter(
-                status='resolved',
-                resolved_at__date=date
-            ).count()
-            resolved_data.append(resolved_count)
-        
-        # Prepare chart data for the template
-        chart_data = {
-            'labels': chart_dates,
-            'datasets': [
-                {
-                    'label': 'Created Tickets',
-                    'data': created_data,
-                    'backgroundColor': 'rgba(78, 115, 223, 0.2)',
-                    'borderColor': 'rgba(78, 115, 223, 1)',
-                },
-                {
-                    'label': 'Resolved Tickets',
-                    'data': resolved_data,
-                    'backgroundColor': 'rgba(28, 200, 138, 0.2)',
-                    'borderColor': 'rgba(28, 200, 138, 1)',
-                }
-            ]
-        }
-    except Exception as e:
-        logger.error(f"Error generating chart data: {str(e)}")
-        chart_data = {
-            'labels': [],
-            'datasets': []
-        }
-        
-    # Get recent tickets for the dashboard
-    try:
-        recent_tickets = tickets_query.order_by('-created_at')[:5]
-    except Exception as e:
-        logger.error(f"Error fetching recent tickets: {str(e)}")
-        recent_tickets = []
-        
     # Prepare context
-    context = {
-        'filter_period': filter_period,
-        'assigned_tickets': assigned_tickets,
-        'assigned_tickets_count': assigned_tickets_count,
-        'resolved_tickets_count': resolved_tickets_count,
-        'in_progress_tickets_count': in_progress_tickets_count,
-        'overdue_tickets_count': overdue_tickets_count,
-        'resolved_today': resolved_today,
-        'avg_response_time': avg_response_time,
-        'resolution_rate': resolution_rate,
-        'sla_alerts': sla_alerts,
-        'team_performance': team_performance,
-        'recent_kb_articles': recent_kb_articles,
-        'recent_activities': recent_activities,
-        'recent_tickets': recent_tickets,
-        'chart_data': json.dumps(chart_data),  # Convert to JSON for JavaScript
-    }
+    context = {'filter_period': filter_period}
+    for section in await gather(
+        ticket_counts, performance, sla_alerts, team_performance,
+        recent_kb_articles, recent_activities, chart_data
+    ):
+        context.update(section)
     
-    return render(request, 'technician/dashboard.html', context)
+    return await render_async(request, 'technician/dashboard.html', context)
 
 @login_required
 def technician_tickets(request):
@@ -1947,6 +1760,7 @@ def technician_update_ticket(request, ticket_id):
             ticket.priority = priority
         
         ticket.updated_at = timezone.now()
+        ticket.changed_by = request.user
         ticket.save()
         
         if notify_user and status != ticket.status:
@@ -1996,6 +1810,7 @@ def technician_resolve_ticket(request, ticket_id):
         ticket.status = 'resolved'
         ticket.resolution = resolution
         ticket.resolved_at = timezone.now()
+        ticket.changed_by = request.user
         ticket.save()
         
         # Create resolution comment
@@ -2043,6 +1858,7 @@ def technician_close_ticket(request, ticket_id):
             return redirect('core:technician_ticket_detail', ticket_id=ticket_id)
         
         ticket.status = 'closed'
+        ticket.changed_by = request.user
         ticket.save()
 
         # Add closure note if provided
@@ -2159,6 +1975,7 @@ def technician_assign_ticket(request, ticket_id):
     if request.method == 'POST':
         ticket.assigned_to = request.user
         ticket.status = 'in_progress'
+        ticket.changed_by = request.user
         ticket.save()
         messages.success(request, 'Ticket assigned to you successfully.')
     
@@ -2275,6 +2092,7 @@ def technician_add_comment(request, ticket_id):
         # Update ticket status if it's new
         if ticket.status == 'new':
             ticket.status = 'in_progress'
+            ticket.changed_by = request.user
             ticket.save()
             messages.info(request, 'Ticket status updated to In Progress.')
         
@@ -2398,76 +2216,73 @@ def view_user_profile(request, user_id, ticket_id=None):
     
     return render(request, "technician/user_profile.html", context)
 
-def technician_knowledge_base(request):
+async def technician_knowledge_base(request):
     """
     Display the knowledge base articles for technicians with filtering and search capabilities.
     """
+    user = await request.auser()
     # Get filter parameters
     category_id = request.GET.get('category')
     tag = request.GET.get('tag')
     search = request.GET.get('search')
-    sort_by = request.GET.get('sort', 'latest')
+    # Searches are ranked by relevance unless another order is requested
+    sort_by = request.GET.get('sort', 'relevance' if search else 'latest')
     
     # Assuming we have a KnowledgeBaseArticle model
     try:
         from apps.kb.models import KnowledgeBaseArticle, ArticleCategory, Tag
+        from apps.kb.search import search_articles
         
-        # Base queryset
-        articles_query = KnowledgeBaseArticle.objects.all()
-        
-        # Apply filters
-        if category_id:
-            articles_query = articles_query.filter(category_id=category_id)
-        
-        if tag:
-            articles_query = articles_query.filter(tags_json__icontains=tag)
+        def article_page():
+            # Base queryset
+            articles_query = KnowledgeBaseArticle.objects.all()
             
-        if search:
-            articles_query = articles_query.filter(
-                models.Q(title__icontains=search) | 
-                models.Q(content__icontains=search) |
-                models.Q(short_description__icontains=search)
-            )
-        
-        # Apply sorting
-        if sort_by == 'latest':
-            articles_query = articles_query.order_by('-updated_at')
-        elif sort_by == 'oldest':
-            articles_query = articles_query.order_by('created_at')
-        elif sort_by == 'views':
-            articles_query = articles_query.order_by('-views')
-        elif sort_by == 'a-z':
-            articles_query = articles_query.order_by('title')
-        
-        # Get all categories
-        categories = ArticleCategory.objects.all()
-        
-        # Get popular tags - Fix the query to not use a reverse relationship
-        # We'll count the occurrences in tags_json field
-        from django.db.models import Count
-        import json
-        
-        # First get all tags
-        all_tags = Tag.objects.all()
-        
-        # Create a dictionary to count how many articles use each tag
-        tag_counts = {}
-        for tag in all_tags:
-            tag_counts[tag.name] = KnowledgeBaseArticle.objects.filter(tags_json__icontains=tag.name).count()
-        
-        # Sort tags by count and get top 10
-        sorted_tags = sorted(all_tags, key=lambda t: tag_counts.get(t.name, 0), reverse=True)
-        popular_tags = sorted_tags[:10]
-        
-        # Get featured articles
-        featured_articles = KnowledgeBaseArticle.objects.filter(
-            is_featured=True
-        ).order_by('-updated_at')[:4]
-        
-        # Paginate results
-        paginator = Paginator(articles_query, 12)  # Show 12 articles per page
-        page_number = request.GET.get('page', 1)
-        articles = paginator.get_page(page_number)
+            # Apply filters
+            if category_id:
+                articles_query = articles_query.filter(category_id=category_id)
+            
+            if tag:
+                # Join through the tag links instead of matching substrings of tags_json
+                articles_query = articles_query.filter(tag_objects__name=Tag.normalize(tag))
+                
+            search_results = None
+            if search:
+                # Ranked lookup in the full-text index instead of scanning article bodies
+                search_results = search_articles(search, articles=articles_query)
+                articles_query = articles_query.filter(id__in=[article.id for article in search_results])
+            
+            # Apply sorting
+            if search_results is not None and sort_by == 'relevance':
+                articles_query = search_results
+            elif sort_by == 'latest':
+                articles_query = articles_query.order_by('-updated_at')
+            elif sort_by == 'oldest':
+                articles_query = articles_query.order_by('created_at')
+            elif sort_by == 'views':
+                articles_query = articles_query.order_by('-views')
+            elif sort_by == 'a-z':
+                articles_query = articles_query.order_by('title')
+            
+            # Paginate results
+            paginator = Paginator(articles_query, 12)  # Show 12 articles per page
+            page_number = request.GET.get('page', 1)
+            articles = paginator.get_page(page_number)
+            articles.object_list = article_views.with_pending(articles.object_list)
+            return articles
+        
+        def featured_articles():
+            return article_views.with_pending(KnowledgeBaseArticle.objects.filter(
+                is_featured=True
+            ).order_by('-updated_at')[:4])
+        
+        articles, featured_articles, categories, popular_tags = await gather(
+            article_page,
+            featured_articles,
+            # Get all categories
+            lambda: list(ArticleCategory.objects.all()),
+            # Get popular tags from the maintained article counts
+            lambda: list(Tag.objects.filter(article_count__gt=0).order_by('-article_count', 'name')[:10]),
+        )
         
         context = {
             'articles': articles,
@@ -2478,7 +2293,7 @@ def technician_knowledge_base(request):
             'tag': tag,
             'search': search,
             'sort_by': sort_by,
-            'is_admin': request.user.is_staff,
+            'is_admin': user.is_staff,
         }
         
     except ImportError:
@@ -2488,10 +2303,39 @@ def technician_knowledge_base(request):
             'featured_articles': [],
             'categories': [],
             'popular_tags': [],
-            'is_admin': request.user.is_staff,
+            'is_admin': user.is_staff,
         }
     
-    return render(request, 'technician/knowledge_base.html', context)
+    return await render_async(request, 'technician/knowledge_base.html', context)
+
+@login_required
+def technician_knowledge_base_search(request):
+    """
+    Search knowledge base articles, returning ranked results with highlighted snippets as JSON.
+    """
+    from apps.kb.search import search_articles
+    
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    results = search_articles(query, limit=limit) if query else []
+    return JsonResponse({
+        'query': query,
+        'results': [
+            {
+                'id': article.id,
+                'title': article.title,
+                'short_description': article.short_description,
+                'url': reverse('core:technician_article_detail', args=[article.id]),
+                'score': article.search_score,
+                'snippet': article.search_snippet,
+            }
+            for article in results
+        ]
+    })
 
 def technician_article_detail(request, article_id):
     """
@@ -2504,31 +2348,22 @@ def technician_article_detail(request, article_id):
         article = get_object_or_404(KnowledgeBaseArticle, id=article_id)
         
         # Increment view count if not viewed by the author
+        # Views are buffered and written in batches by the flush_view_counters task
         if request.user != article.created_by:
-            article.views = models.F('views') + 1
-            article.save(update_fields=['views'])
-            article.refresh_from_db()
+            article_views.increment(article.pk)
+        article_views.with_pending([article])
         
         # Get related articles
         related_articles = article.related_articles.all()[:3]
         
-        # Get similar articles based on tags
-        similar_articles = []
-        if article.tags:
-            # Parse tags JSON if stored as a JSON string
-            tags = article.tags
-            if isinstance(tags, str):
-                try:
-                    tags = json.loads(tags)
-                except:
-                    tags = []
-            
-            # Get articles with similar tags
-            similar_query = KnowledgeBaseArticle.objects.exclude(id=article_id)
-            for tag in tags:
-                similar_query = similar_query.filter(tags__icontains=tag)
-            
-            similar_articles = similar_query.order_by('-views')[:3]
+        # Get similar articles ranked by the number of tags they share with this one
+        similar_articles = KnowledgeBaseArticle.objects.filter(
+            tag_links__tag__article_links__article=article
+        ).exclude(
+            id=article.id
+        ).annotate(
+            shared_tags=Count('id')
+        ).order_by('-shared_tags', '-views')[:3]
         
         context = {
             'article': article,
@@ -41,20 +41,14 @@ class ArticleCategoryAdmin(admin.ModelAdmin):
 class TagAdmin(admin.ModelAdmin):
     list_display = ['name', 'article_count']
     search_fields = ['name']
-    
-    def article_count(self, obj):
-        # Count articles that contain this tag
-        from django.db.models import Q
-        return KnowledgeBaseArticle.objects.filter(tags_json__icontains=obj.name).count()
-    
-    article_count.short_description = 'Articles'
+    readonly_fields = ['article_count']
 
 @admin.register(KnowledgeBaseArticle)
 class KnowledgeBaseArticleAdmin(admin.ModelAdmin):
     list_display = ['title', 'category', 'status', 'visibility', 'is_featured', 'views', 'rating', 'created_by', 'updated_at']
     list_filter = ['status', 'visibility', 'is_featured', 'category', 'created_at']
     search_fields = ['title', 'short_description', 'content', 'tags_json']
-    readonly_fields = ['views', 'rating', 'rating_count', 'created_at', 'updated_at', 'slug']
+    readonly_fields = ['views', 'rating', 'rating_count', 'helpful_count', 'created_at', 'updated_at', 'slug']
     fieldsets = (
         (None, {
             'fields': ('title', 'slug', 'short_description', 'content')
@@ -66,7 +60,7 @@ class KnowledgeBaseArticleAdmin(admin.ModelAdmin):
             'fields': ('status', 'visibility', 'is_featured')
         }),
         ('Statistics', {
-            'fields': ('views', 'rating', 'rating_count')
+            'fields': ('views', 'rating', 'rating_count', 'helpful_count')
         }),
         ('Metadata', {
             'fields': ('created_by', 'updated_by', 'created_at', 'updated_at')
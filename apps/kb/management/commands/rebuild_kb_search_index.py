@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from apps.kb.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the knowledge base full-text search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=200,
+            help='Number of articles loaded per query'
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_search_index(batch_size=max(options['batch_size'], 1))
+        self.stdout.write(self.style.SUCCESS(f'Successfully indexed {count} articles'))
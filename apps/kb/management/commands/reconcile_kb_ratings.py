@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Max, Q
+
+from apps.kb.models import ArticleFeedback, KnowledgeBaseArticle
+
+
+class Command(BaseCommand):
+    help = 'Recompute the knowledge base feedback counters and ratings from the feedback rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of articles processed per batch'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        last_id = KnowledgeBaseArticle.objects.aggregate(last=Max('id'))['last']
+        if not last_id:
+            self.stdout.write(self.style.WARNING('No articles found, nothing to reconcile'))
+            return
+
+        repaired = 0
+        for batch_start in range(1, last_id + 1, batch_size):
+            counts = {
+                row['article_id']: (row['helpful'], row['total'])
+                for row in ArticleFeedback.objects.filter(
+                    article_id__gte=batch_start,
+                    article_id__lt=batch_start + batch_size
+                ).values('article_id').annotate(
+                    total=Count('id'),
+                    helpful=Count('id', filter=Q(is_helpful=True))
+                ).order_by()
+            }
+
+            drifted = []
+            articles = KnowledgeBaseArticle.objects.filter(
+                id__gte=batch_start,
+                id__lt=batch_start + batch_size
+            ).only(
+                'id', 'helpful_count', 'rating_count', 'rating'
+            )
+            for article in articles:
+                helpful, total = counts.get(article.id, (0, 0))
+                rating = KnowledgeBaseArticle.rating_for(helpful, total)
+                if (article.helpful_count, article.rating_count, article.rating) != (helpful, total, rating):
+                    article.helpful_count = helpful
+                    article.rating_count = total
+                    article.rating = rating
+                    drifted.append(article)
+
+            # bulk_update skips save() so updated_at and the search index are untouched
+            KnowledgeBaseArticle.objects.bulk_update(drifted, ['helpful_count', 'rating_count', 'rating'])
+            repaired += len(drifted)
+            if drifted:
+                self.stdout.write(f'  articles {batch_start}-{batch_start + batch_size - 1}: {len(drifted)} repaired')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully reconciled ratings, {repaired} articles repaired'))
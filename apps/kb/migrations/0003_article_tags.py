@@ -0,0 +1,52 @@
+# Generated by Django 5.0 on 2026-10-18 22:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kb', '0002_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArticleTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='article_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-article_count', 'name'], name='kb_tag_popular_idx'),
+        ),
+        migrations.AddField(
+            model_name='articletag',
+            name='article',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='kb.knowledgebasearticle'),
+        ),
+        migrations.AddField(
+            model_name='articletag',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='article_links', to='kb.tag'),
+        ),
+        migrations.AddField(
+            model_name='knowledgebasearticle',
+            name='tag_objects',
+            field=models.ManyToManyField(blank=True, related_name='articles', through='kb.ArticleTag', to='kb.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='articletag',
+            index=models.Index(fields=['tag', 'article'], name='kb_articletag_tag_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='articletag',
+            unique_together={('article', 'tag')},
+        ),
+    ]
@@ -0,0 +1,50 @@
+import json
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def populate_article_tags(apps, schema_editor):
+    """Create tag links from each article's tags_json and compute the tag counts"""
+    KnowledgeBaseArticle = apps.get_model('kb', 'KnowledgeBaseArticle')
+    Tag = apps.get_model('kb', 'Tag')
+    ArticleTag = apps.get_model('kb', 'ArticleTag')
+
+    tag_ids = dict(Tag.objects.values_list('name', 'id'))
+    links = []
+    articles = KnowledgeBaseArticle.objects.values_list('id', 'tags_json').order_by('id')
+    for article_id, tags_json in articles.iterator(chunk_size=500):
+        try:
+            names = json.loads(tags_json or '[]')
+        except ValueError:
+            continue
+        if not isinstance(names, list):
+            continue
+        for name in {str(name).lower().strip()[:50] for name in names if str(name).strip()}:
+            if name not in tag_ids:
+                tag_ids[name] = Tag.objects.create(name=name).id
+            links.append(ArticleTag(article_id=article_id, tag_id=tag_ids[name]))
+        if len(links) >= 1000:
+            ArticleTag.objects.bulk_create(links, ignore_conflicts=True)
+            links = []
+    ArticleTag.objects.bulk_create(links, ignore_conflicts=True)
+
+    counts = ArticleTag.objects.values('tag_id').annotate(total=Count('id')).order_by()
+    for row in counts:
+        Tag.objects.filter(id=row['tag_id']).update(article_count=row['total'])
+
+
+def clear_article_tags(apps, schema_editor):
+    apps.get_model('kb', 'ArticleTag').objects.all().delete()
+    apps.get_model('kb', 'Tag').objects.update(article_count=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kb', '0003_article_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_article_tags, clear_article_tags),
+    ]
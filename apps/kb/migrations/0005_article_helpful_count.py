@@ -0,0 +1,37 @@
+# Generated by Django 5.0 on 2026-10-18 22:51
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def populate_feedback_counters(apps, schema_editor):
+    """Compute the helpful and total feedback counters from the existing feedback"""
+    KnowledgeBaseArticle = apps.get_model('kb', 'KnowledgeBaseArticle')
+    ArticleFeedback = apps.get_model('kb', 'ArticleFeedback')
+
+    counts = ArticleFeedback.objects.values('article_id').annotate(
+        total=Count('id'),
+        helpful=Count('id', filter=Q(is_helpful=True))
+    ).order_by()
+    for row in counts:
+        KnowledgeBaseArticle.objects.filter(id=row['article_id']).update(
+            helpful_count=row['helpful'],
+            rating_count=row['total'],
+            rating=row['helpful'] * 5 / row['total']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kb', '0004_populate_article_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='knowledgebasearticle',
+            name='helpful_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_feedback_counters, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
 from django.conf import settings
 from django.utils.text import slugify
 import json
@@ -31,12 +33,22 @@ class ArticleCategory(models.Model):
 class Tag(models.Model):
     """Model for knowledge base article tags"""
     name = models.CharField(max_length=50, unique=True)
+    # Denormalized number of articles using the tag, maintained by KnowledgeBaseArticle.sync_tags
+    article_count = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return self.name
     
+    @staticmethod
+    def normalize(name):
+        """Canonical form of a tag name"""
+        return str(name).lower().strip()[:50]
+    
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['-article_count', 'name'], name='kb_tag_popular_idx'),
+        ]
 
 
 class KnowledgeBaseArticle(models.Model):
@@ -57,13 +69,16 @@ class KnowledgeBaseArticle(models.Model):
     short_description = models.CharField(max_length=255)
     content = models.TextField()
     category = models.ForeignKey(ArticleCategory, on_delete=models.SET_NULL, null=True, related_name='articles')
-    tags_json = models.TextField(default='[]', blank=True)  # Store tags as JSON
+    tags_json = models.TextField(default='[]', blank=True)  # Store tags as JSON, normalized into tag_objects
+    tag_objects = models.ManyToManyField(Tag, through='ArticleTag', related_name='articles', blank=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.DRAFT)
     visibility = models.CharField(max_length=20, choices=Visibility.choices, default=Visibility.PUBLIC)
     is_featured = models.BooleanField(default=False)
     views = models.PositiveIntegerField(default=0)
+    # Share of helpful feedback scaled to RATING_SCALE, derived from the counters below
     rating = models.FloatField(default=0)
-    rating_count = models.PositiveIntegerField(default=0)
+    rating_count = models.PositiveIntegerField(default=0)  # Total feedback
+    helpful_count = models.PositiveIntegerField(default=0)
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -80,6 +95,31 @@ class KnowledgeBaseArticle(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     related_articles = models.ManyToManyField('self', symmetrical=False, blank=True)
     
+    RATING_SCALE = 5
+    
+    @classmethod
+    def rating_for(cls, helpful_count, rating_count):
+        """Rating for the given feedback counters"""
+        return helpful_count * cls.RATING_SCALE / rating_count if rating_count else 0
+    
+    @classmethod
+    def adjust_feedback(cls, article_id, is_helpful, delta=1):
+        """
+        Add ``delta`` feedback to an article's counters in a single UPDATE, so
+        concurrent submissions cannot overwrite each other.
+        """
+        helpful_delta = delta if is_helpful else 0
+        total = F('rating_count') + delta
+        return cls.objects.filter(pk=article_id).update(
+            # Listed first so it reads the counters before they change, MySQL assigns in order
+            rating=Coalesce(
+                Cast(F('helpful_count') + helpful_delta, FloatField()) * cls.RATING_SCALE / NullIf(total, 0),
+                Value(0.0)
+            ),
+            helpful_count=F('helpful_count') + helpful_delta,
+            rating_count=total,
+        )
+    
     def __str__(self):
         return self.title
     
@@ -95,32 +135,59 @@ class KnowledgeBaseArticle(models.Model):
             self.slug = slug
         
         # Update tag objects if tags have changed
-        if self.pk:
-            old_instance = KnowledgeBaseArticle.objects.get(pk=self.pk)
-            if old_instance.tags_json != self.tags_json:
-                self.update_tags()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'tags_json' not in update_fields:
+            tags_changed = False
+        elif self.pk:
+            old_tags_json = KnowledgeBaseArticle.objects.filter(pk=self.pk).values_list('tags_json', flat=True).first()
+            tags_changed = old_tags_json != self.tags_json
         else:
             # For new articles
-            self.update_tags()
+            tags_changed = True
         
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if tags_changed:
+                self.sync_tags()
     
-    def update_tags(self):
-        """Update tag objects based on tags_json field"""
-        try:
-            tags = json.loads(self.tags_json)
-            for tag_name in tags:
-                Tag.objects.get_or_create(name=tag_name.lower().strip())
-        except json.JSONDecodeError:
-            pass  # Invalid JSON
+    def sync_tags(self):
+        """
+        Bring the tag links and the tags' article counts in line with tags_json.
+        Must run inside the transaction that saved the article.
+        """
+        names = {Tag.normalize(name) for name in self.tags if str(name).strip()}
+        
+        existing = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - set(existing)
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            existing = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        wanted = set(existing.values())
+        
+        current = set(ArticleTag.objects.filter(article=self).values_list('tag_id', flat=True))
+        added = wanted - current
+        removed = current - wanted
+        
+        if removed:
+            ArticleTag.objects.filter(article=self, tag_id__in=removed).delete()
+            Tag.objects.filter(id__in=removed).update(article_count=models.F('article_count') - 1)
+        if added:
+            ArticleTag.objects.bulk_create([ArticleTag(article=self, tag_id=tag_id) for tag_id in added])
+            Tag.objects.filter(id__in=added).update(article_count=models.F('article_count') + 1)
     
     @property
     def tags(self):
         """Return list of tags from JSON field"""
         try:
-            return json.loads(self.tags_json)
-        except:
+            tags = json.loads(self.tags_json)
+        except (TypeError, ValueError):
             return []
+        return tags if isinstance(tags, list) else []
+    
+    @tags.setter
+    def tags(self, value):
+        """Set tags from a list of names or a JSON encoded list"""
+        self.tags_json = value if isinstance(value, str) else json.dumps(list(value))
     
     class Meta:
         verbose_name = "Knowledge Base Article"
@@ -128,6 +195,21 @@ class KnowledgeBaseArticle(models.Model):
         ordering = ['-updated_at']
 
 
+class ArticleTag(models.Model):
+    """Link between an article and one of its tags"""
+    article = models.ForeignKey(KnowledgeBaseArticle, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='article_links')
+    
+    def __str__(self):
+        return f"{self.article.title} - {self.tag.name}"
+    
+    class Meta:
+        unique_together = ['article', 'tag']
+        indexes = [
+            models.Index(fields=['tag', 'article'], name='kb_articletag_tag_idx'),
+        ]
+
+
 class ArticleAttachment(models.Model):
     """Model for article attachments"""
     article = models.ForeignKey(KnowledgeBaseArticle, on_delete=models.CASCADE, related_name='attachments')
@@ -203,29 +285,37 @@ class ArticleFeedback(models.Model):
     ip_address = models.GenericIPAddressField(blank=True, null=True)
     
     def save(self, *args, **kwargs):
-        # Update article rating when feedback is saved
-        is_new = self.pk is None
-        super().save(*args, **kwargs)
-        
-        if is_new and self.article:
-            # Get total helpful feedback
-            helpful_count = ArticleFeedback.objects.filter(
-                article=self.article,
-                is_helpful=True
-            ).count()
-            
-            # Get total feedback
-            total_count = ArticleFeedback.objects.filter(article=self.article).count()
-            
-            # Calculate rating (percentage of helpful feedback)
-            if total_count > 0:
-                rating = (helpful_count / total_count) * 5  # Scale to 5
-                self.article.rating = rating
-                self.article.rating_count = total_count
-                self.article.save(update_fields=['rating', 'rating_count'])
+        # Update the article's feedback counters when new feedback is saved
+        is_new = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if is_new:
+                KnowledgeBaseArticle.adjust_feedback(self.article_id, self.is_helpful)
     
     def __str__(self):
         return f"Feedback on {self.article.title} - {'Helpful' if self.is_helpful else 'Not Helpful'}"
     
     class Meta:
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-created_at'] 
+
+class SearchDocument(models.Model):
+    """Per-article statistics for the knowledge base search index (see apps.kb.search)"""
+    article = models.OneToOneField(KnowledgeBaseArticle, on_delete=models.CASCADE, related_name='search_document')
+    length = models.PositiveIntegerField(default=0)  # Weighted number of indexed terms
+    indexed_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Search document for {self.article.title}"
+
+
+class SearchPosting(models.Model):
+    """Weighted frequency of a stemmed term in an article (see apps.kb.search)"""
+    term = models.CharField(max_length=64)
+    article = models.ForeignKey(KnowledgeBaseArticle, on_delete=models.CASCADE, related_name='search_postings')
+    frequency = models.PositiveIntegerField()
+    
+    def __str__(self):
+        return f"{self.term} in {self.article.title}"
+    
+    class Meta:
+        unique_together = ['term', 'article']
@@ -0,0 +1,261 @@
+"""
+Full-text search for knowledge base articles.
+
+Articles are split into lower-cased, stemmed terms and stored in an inverted
+index (``SearchPosting`` rows per term and article, ``SearchDocument`` rows
+holding each article's length). Queries are ranked with BM25 and only touch
+the postings of the query terms, instead of scanning every article body.
+
+The index is updated from the article save signal; ``rebuild_search_index``
+rebuilds it from scratch (see the ``rebuild_kb_search_index`` command).
+"""
+import math
+import re
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import KnowledgeBaseArticle, SearchDocument, SearchPosting
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+MAX_TERM_LENGTH = 64
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by for from has have how i if in into is it its of on or
+our so that the their then there these this to was we were what when where which
+who will with you your
+""".split())
+
+# Applied in order, the first matching suffix wins
+STEM_RULES = (
+    ('ational', 'ate'),
+    ('ization', 'ize'),
+    ('fulness', 'ful'),
+    ('iveness', 'ive'),
+    ('ousness', 'ous'),
+    ('ations', 'ate'),
+    ('ation', 'ate'),
+    ('ingly', ''),
+    ('edly', ''),
+    ('ness', ''),
+    ('sses', 'ss'),
+    ('ches', 'ch'),
+    ('shes', 'sh'),
+    ('ies', 'y'),
+    ('xes', 'x'),
+    ('ing', ''),
+    ('ed', ''),
+    ('ly', ''),
+)
+
+# Field weights, a title match counts three times as much as a body match
+FIELD_WEIGHTS = (
+    ('title', 3),
+    ('short_description', 2),
+    ('tags', 2),
+    ('content', 1),
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Article fields the index is built from
+INDEXED_FIELDS = frozenset(['title', 'short_description', 'content', 'tags_json'])
+
+SNIPPET_WORDS = 30
+MAX_PREFIX_TERMS = 10
+
+
+def stem(word):
+    """Light suffix-stripping stemmer for English words, other words are returned as is"""
+    if len(word) <= 3 or not word.isascii() or not word.isalpha():
+        return word
+    for suffix, replacement in STEM_RULES:
+        if word.endswith(suffix):
+            if len(word) - len(suffix) + len(replacement) >= 3:
+                word = word[:-len(suffix)] + replacement
+            break
+    else:
+        if word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+            word = word[:-1]
+    # running -> runn -> run
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+        word = word[:-1]
+    # configure / configuring -> configur
+    if len(word) > 4 and word.endswith('e'):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Split text into lower-cased words, without stop words"""
+    return [
+        word for word in (match.group().lower() for match in TOKEN_RE.finditer(text or ''))
+        if len(word) > 1 and word not in STOP_WORDS
+    ]
+
+
+def analyze(text):
+    """Return the index terms for ``text``"""
+    return [stem(word)[:MAX_TERM_LENGTH] for word in tokenize(text)]
+
+
+def _article_terms(article):
+    terms = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        value = ' '.join(map(str, article.tags)) if field == 'tags' else getattr(article, field)
+        for term in analyze(value):
+            terms[term] += weight
+    return terms
+
+
+def index_article(article):
+    """Replace the index entries of a single article"""
+    terms = _article_terms(article)
+    with transaction.atomic():
+        SearchPosting.objects.filter(article=article).delete()
+        SearchPosting.objects.bulk_create([
+            SearchPosting(term=term, article=article, frequency=frequency)
+            for term, frequency in terms.items()
+        ])
+        SearchDocument.objects.update_or_create(
+            article=article,
+            defaults={'length': sum(terms.values())}
+        )
+
+
+def rebuild_search_index(batch_size=200):
+    """Rebuild the whole index, returns the number of indexed articles"""
+    with transaction.atomic():
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+        count = 0
+        articles = KnowledgeBaseArticle.objects.only(
+            'id', 'title', 'short_description', 'content', 'tags_json'
+        ).order_by('pk')
+        for article in articles.iterator(chunk_size=batch_size):
+            index_article(article)
+            count += 1
+    return count
+
+
+def query_terms(query):
+    """
+    Return the index terms to look up for ``query``. The last word is also
+    matched as a prefix of indexed terms, so results update while typing.
+    """
+    words = tokenize(query)
+    terms = {stem(word)[:MAX_TERM_LENGTH] for word in words}
+    if words and not query[-1:].isspace():
+        terms.update(
+            SearchPosting.objects.filter(
+                term__startswith=words[-1]
+            ).values_list('term', flat=True).distinct()[:MAX_PREFIX_TERMS]
+        )
+    return terms
+
+
+def ranked_article_ids(query, articles=None, limit=None):
+    """
+    Return ``[(article_id, score), ...]`` for the articles matching ``query``,
+    best first. ``articles`` optionally restricts the candidates to a queryset.
+    """
+    return _rank(query_terms(query), articles, limit)
+
+
+def _rank(terms, articles=None, limit=None):
+    if not terms:
+        return []
+
+    stats = SearchDocument.objects.aggregate(total=Count('id'), average_length=Avg('length'))
+    if not stats['total']:
+        return []
+    total = stats['total']
+    average_length = stats['average_length'] or 1
+
+    document_frequency = dict(
+        SearchPosting.objects.filter(term__in=terms).values('term').annotate(
+            count=Count('id')
+        ).values_list('term', 'count').order_by()
+    )
+
+    postings = SearchPosting.objects.filter(term__in=terms)
+    if articles is not None:
+        postings = postings.filter(article__in=articles.values('pk'))
+    postings = postings.values_list('article_id', 'term', 'frequency', 'article__search_document__length')
+
+    scores = Counter()
+    for article_id, term, frequency, length in postings:
+        frequency_in_corpus = document_frequency.get(term, 0)
+        idf = math.log(1 + (total - frequency_in_corpus + 0.5) / (frequency_in_corpus + 0.5))
+        norm = K1 * (1 - B + B * (length or 0) / average_length)
+        scores[article_id] += idf * frequency * (K1 + 1) / (frequency + norm)
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return ranked[:limit] if limit else ranked
+
+
+def highlight(text, terms, words=SNIPPET_WORDS):
+    """
+    Return an HTML-safe snippet of ``text`` around the densest cluster of
+    ``terms``, with the matching words wrapped in ``<mark>``.
+    """
+    matches = list(TOKEN_RE.finditer(text or ''))
+    if not matches:
+        return ''
+    hits = [
+        stem(match.group().lower())[:MAX_TERM_LENGTH] in terms
+        for match in matches
+    ]
+
+    # Sliding window with the most hits
+    best_start, best_hits, window_hits = 0, sum(hits[:words]), sum(hits[:words])
+    for start in range(1, max(len(matches) - words + 1, 1)):
+        window_hits += hits[start + words - 1] - hits[start - 1]
+        if window_hits > best_hits:
+            best_start, best_hits = start, window_hits
+    window = range(best_start, min(best_start + words, len(matches)))
+
+    parts = []
+    # Keep leading and trailing punctuation when the window covers the whole text
+    position = 0 if window[0] == 0 else matches[window[0]].start()
+    for index in window:
+        match = matches[index]
+        parts.append(escape(text[position:match.start()]))
+        word = escape(match.group())
+        parts.append(f'<mark>{word}</mark>' if hits[index] else word)
+        position = match.end()
+    if window[-1] == len(matches) - 1:
+        parts.append(escape(text[position:]))
+    snippet = ''.join(parts)
+    if window[0] > 0:
+        snippet = '&hellip;' + snippet
+    if window[-1] < len(matches) - 1:
+        snippet += '&hellip;'
+    return mark_safe(snippet)
+
+
+def search_articles(query, articles=None, limit=None):
+    """
+    Return the articles matching ``query`` best first, each with a
+    ``search_score`` and a highlighted ``search_snippet`` attribute.
+    """
+    terms = query_terms(query)
+    ranked = _rank(terms, articles, limit)
+    if not ranked:
+        return []
+    found = KnowledgeBaseArticle.objects.in_bulk([article_id for article_id, _ in ranked])
+
+    results = []
+    for article_id, score in ranked:
+        article = found.get(article_id)
+        if article is None:
+            continue
+        article.search_score = round(score, 4)
+        article.search_snippet = highlight(article.content, terms) or highlight(article.short_description, terms)
+        results.append(article)
+    return results
@@ -1,6 +1,9 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
-from .models import KnowledgeBaseArticle, ArticleRevision
+from .models import KnowledgeBaseArticle, ArticleFeedback, ArticleRevision, ArticleTag, Tag
+from apps.core.cache import KNOWLEDGE_BASE, invalidate_on_commit
+from .search import INDEXED_FIELDS, index_article
 
 @receiver(post_save, sender=KnowledgeBaseArticle)
 def create_initial_revision(sender, instance, created, **kwargs):
@@ -16,4 +19,37 @@ def create_initial_revision(sender, instance, created, **kwargs):
             tags_json=instance.tags_json,
             status=instance.status,
             created_by=instance.created_by
-        ) 
\ No newline at end of file
+        )
+
+@receiver(post_save, sender=KnowledgeBaseArticle)
+@receiver(post_delete, sender=KnowledgeBaseArticle)
+def article_changed(sender, instance, **kwargs):
+    """
+    Invalidate cached knowledge base listings when an article changes
+    """
+    invalidate_on_commit(KNOWLEDGE_BASE)
+
+@receiver(post_save, sender=KnowledgeBaseArticle)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    """
+    Re-index an article when its searchable text changes
+    """
+    if update_fields and not INDEXED_FIELDS.intersection(update_fields):
+        return
+    index_article(instance)
+
+@receiver(pre_delete, sender=KnowledgeBaseArticle)
+def release_article_tags(sender, instance, **kwargs):
+    """
+    Decrement the article counts of a deleted article's tags
+    """
+    tag_ids = list(ArticleTag.objects.filter(article=instance).values_list('tag_id', flat=True))
+    if tag_ids:
+        Tag.objects.filter(id__in=tag_ids).update(article_count=F('article_count') - 1)
+
+@receiver(post_delete, sender=ArticleFeedback)
+def release_article_feedback(sender, instance, **kwargs):
+    """
+    Remove deleted feedback from the article's rating counters
+    """
+    KnowledgeBaseArticle.adjust_feedback(instance.article_id, instance.is_helpful, delta=-1)
@@ -0,0 +1,215 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.core.management import call_command
+import io
+import json
+
+from apps.core.counters import article_views
+from .models import ArticleFeedback, KnowledgeBaseArticle, SearchDocument, SearchPosting, Tag
+from .search import analyze, highlight, search_articles, stem
+from apps.accounts.models import User
+
+class KnowledgeBaseSearchTest(TestCase):
+    """Tests for the knowledge base full-text search index"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.printer = KnowledgeBaseArticle.objects.create(
+            title='Fixing printer jams',
+            short_description='What to do when the printer stops printing',
+            content='Open the tray, remove the jammed paper and restart the printer. '
+                    'Most printers recover after a restart.',
+            tags_json=json.dumps(['hardware', 'printer']),
+            created_by=self.user
+        )
+        self.network = KnowledgeBaseArticle.objects.create(
+            title='Configuring the office network',
+            short_description='Router and Wi-Fi setup',
+            content='Configure the router, then restart every device so it picks up the new settings.',
+            created_by=self.user
+        )
+
+    def test_stemming(self):
+        """Test inflected forms share a term"""
+        self.assertEqual(stem('printing'), stem('printed'))
+        self.assertEqual(stem('printers'), stem('printer'))
+        self.assertEqual(stem('configuring'), stem('configure'))
+        self.assertEqual(analyze('The printers are jammed'), ['printer', 'jam'])
+
+    def test_articles_are_indexed_on_save(self):
+        """Test saving an article updates its postings incrementally"""
+        self.assertTrue(SearchPosting.objects.filter(article=self.printer, term='printer').exists())
+        self.assertEqual(SearchDocument.objects.count(), 2)
+
+        self.network.content = 'Nothing about routers any more'
+        self.network.save()
+        self.assertFalse(SearchPosting.objects.filter(article=self.network, term='restart').exists())
+
+    def test_search_ranks_and_highlights(self):
+        """Test results are ranked by relevance with highlighted snippets"""
+        results = search_articles('printer restart')
+
+        self.assertEqual([article.id for article in results], [self.printer.id, self.network.id])
+        self.assertGreater(results[0].search_score, results[1].search_score)
+        self.assertIn('<mark>printer</mark>', results[0].search_snippet)
+        self.assertIn('<mark>restart</mark>', results[1].search_snippet)
+
+        # The last word is matched as a prefix while typing
+        self.assertEqual([article.id for article in search_articles('rout')], [self.network.id])
+        self.assertEqual(search_articles('unrelated'), [])
+
+    def test_highlight_escapes_html(self):
+        """Test snippets are escaped before matches are marked"""
+        snippet = highlight('<b>printer</b> settings', {'printer'})
+        self.assertEqual(snippet, '&lt;b&gt;<mark>printer</mark>&lt;/b&gt; settings')
+
+    def test_rebuild_command(self):
+        """Test the rebuild command restores a cleared index"""
+        SearchPosting.objects.all().delete()
+        SearchDocument.objects.all().delete()
+
+        call_command('rebuild_kb_search_index', stdout=io.StringIO())
+
+        self.assertEqual(SearchDocument.objects.count(), 2)
+        self.assertEqual([article.id for article in search_articles('router')], [self.network.id])
+
+    def test_search_api(self):
+        """Test the JSON search endpoint"""
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:technician_knowledge_base_search'), {'q': 'printer jam'})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[0]['id'], self.printer.id)
+        self.assertIn('<mark>', results[0]['snippet'])
+
+
+class ArticleTagTest(TestCase):
+    """Tests for the normalized article tags and their counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+
+    def create_article(self, title, tags):
+        return KnowledgeBaseArticle.objects.create(
+            title=title,
+            short_description=title,
+            content=title,
+            tags_json=json.dumps(tags),
+            created_by=self.user
+        )
+
+    def assertCounts(self, expected):
+        self.assertEqual(dict(Tag.objects.filter(article_count__gt=0).values_list('name', 'article_count')), expected)
+
+    def test_tag_counts_are_maintained(self):
+        """Test adding, changing and deleting articles keeps the tag counts in line"""
+        first = self.create_article('First', ['Printer', 'hardware'])
+        self.create_article('Second', ['printer'])
+        self.assertCounts({'printer': 2, 'hardware': 1})
+
+        first.tags = ['network']
+        first.save()
+        self.assertCounts({'printer': 1, 'network': 1})
+        self.assertEqual(list(first.tag_objects.values_list('name', flat=True)), ['network'])
+
+        first.delete()
+        self.assertCounts({'printer': 1})
+
+    def test_tag_filter_and_similar_articles(self):
+        """Test tag filtering joins the links and similar articles rank by shared tags"""
+        article = self.create_article('Article', ['printer', 'hardware', 'office'])
+        one_shared = self.create_article('One shared', ['printer'])
+        two_shared = self.create_article('Two shared', ['printer', 'office'])
+        self.create_article('Unrelated', ['billing'])
+
+        tagged = KnowledgeBaseArticle.objects.filter(tag_objects__name='office')
+        self.assertEqual(set(tagged), {article, two_shared})
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('core:technician_article_detail', args=[article.id]))
+        self.assertEqual(list(response.context['similar_articles']), [two_shared, one_shared])
+        self.assertEqual(response.context['similar_articles'][0].shared_tags, 2)
+
+    def test_article_views_are_buffered(self):
+        """Test article views are counted without updating the article row"""
+        article_views.flush()
+        author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password123',
+            role='technician'
+        )
+        article = KnowledgeBaseArticle.objects.create(
+            title='Article', short_description='Article', content='Article', created_by=author
+        )
+
+        self.client.force_login(self.user)
+        self.client.get(reverse('core:technician_article_detail', args=[article.id]))
+        response = self.client.get(reverse('core:technician_article_detail', args=[article.id]))
+
+        self.assertEqual(response.context['article'].views, 2)
+        self.assertEqual(KnowledgeBaseArticle.objects.get(pk=article.pk).views, 0)
+        article_views.flush()
+        self.assertEqual(KnowledgeBaseArticle.objects.get(pk=article.pk).views, 2)
+
+
+class ArticleFeedbackTest(TestCase):
+    """Tests for the incremental article rating counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.article = KnowledgeBaseArticle.objects.create(
+            title='Article', short_description='Article', content='Article', created_by=self.user
+        )
+
+    def test_feedback_updates_counters(self):
+        """Test each submission updates the counters and rating without counting feedback"""
+        feedback = ArticleFeedback(article=self.article, user=self.user, is_helpful=True)
+        with CaptureQueriesContext(connection) as queries:
+            feedback.save()
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(statements, ['INSERT', 'UPDATE'])
+        ArticleFeedback.objects.create(article=self.article, user=self.user, is_helpful=True)
+        ArticleFeedback.objects.create(article=self.article, user=self.user, is_helpful=False)
+        ArticleFeedback.objects.create(article=self.article, user=self.user, is_helpful=True)
+
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.helpful_count, self.article.rating_count), (3, 4))
+        self.assertAlmostEqual(self.article.rating, 3.75)
+
+        feedback.delete()
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.helpful_count, self.article.rating_count), (2, 3))
+        self.assertAlmostEqual(self.article.rating, 2 * 5 / 3)
+
+    def test_reconcile_command_repairs_drift(self):
+        """Test the reconcile command recomputes drifted counters from the feedback"""
+        ArticleFeedback.objects.create(article=self.article, user=self.user, is_helpful=True)
+        ArticleFeedback.objects.create(article=self.article, user=self.user, is_helpful=False)
+        KnowledgeBaseArticle.objects.filter(pk=self.article.pk).update(helpful_count=7, rating_count=1, rating=0)
+
+        out = io.StringIO()
+        call_command('reconcile_kb_ratings', batch_size=1, stdout=out)
+
+        self.article.refresh_from_db()
+        self.assertEqual((self.article.helpful_count, self.article.rating_count), (1, 2))
+        self.assertEqual(self.article.rating, 2.5)
+        self.assertIn('1 articles repaired', out.getvalue())
@@ -47,6 +47,10 @@ class Invoice(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='payments_invoice_user_idx'),
+            models.Index(fields=['status', 'due_date'], name='payments_invoice_status_idx'),
+        ]
 
     def __str__(self):
         return f"Invoice #{self.id} - {self.user.email}"
@@ -89,6 +93,11 @@ class Payment(models.Model):
 
     class Meta:
         ordering = ['-payment_date']
+        indexes = [
+            models.Index(fields=['invoice', 'payment_date'], name='payments_payment_invoice_idx'),
+            models.Index(fields=['payment_date'], name='payments_payment_date_idx'),
+            models.Index(fields=['status', 'payment_date'], name='payments_payment_status_idx'),
+        ]
 
     def __str__(self):
         return f"Payment #{self.id} for Invoice #{self.invoice.id}"
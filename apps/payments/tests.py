@@ -1,13 +1,17 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
 from .models import Invoice, Payment, Refund
 from apps.accounts.models import User
-from apps.services.models import Service
+from apps.services.models import Service, ServiceFeature
+from apps.tickets.models import Ticket, TicketComment
 from rest_framework.test import APIClient
 from rest_framework import status
+from apps.core.query_plans import full_scans
 
 class InvoiceModelTest(TestCase):
     """Tests for the Invoice model"""
@@ -168,4 +172,121 @@ class InvoiceAPITest(TestCase):
         # Regular user should still only see their own invoice
         response = self.client.get(reverse('payments:invoice-list'))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1) 
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1) 
+
+
+class PaymentQueryPlanTest(TestCase):
+    """Query plan regression tests for the invoice and payment API querysets"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='password123'
+        )
+        service = Service.objects.create(
+            name='Test Service',
+            description='Test Service Description',
+            price=100.00
+        )
+        today = timezone.now().date()
+        # bulk_create skips the payment signals, only the plans matter here
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                user=cls.user,
+                service=service,
+                amount=Decimal('100.00'),
+                status=Invoice.Status.values[i % len(Invoice.Status.values)],
+                due_date=today + timedelta(days=i % 60 - 30)
+            )
+            for i in range(200)
+        ])
+        Payment.objects.bulk_create([
+            Payment(
+                invoice=invoice,
+                amount=Decimal('100.00'),
+                method=Payment.Method.CREDIT_CARD,
+                transaction_id=f'seed-{invoice.pk}',
+                status='success'
+            )
+            for invoice in invoices[::2]
+        ])
+    
+    def assertNoFullScan(self, queryset):
+        self.assertEqual(full_scans(queryset), [], f'Full scan in plan for:\n{queryset.query}')
+    
+    def test_invoice_querysets(self):
+        """Test the invoice list filters use indexes"""
+        self.assertNoFullScan(Invoice.objects.filter(user=self.user))
+        self.assertNoFullScan(Invoice.objects.filter(user=self.user, status=Invoice.Status.PENDING))
+        self.assertNoFullScan(Invoice.objects.filter(
+            status=Invoice.Status.PENDING,
+            due_date__lt=timezone.now().date()
+        ))
+    
+    def test_payment_querysets(self):
+        """Test the payment list filters use indexes"""
+        self.assertNoFullScan(Payment.objects.filter(invoice__user=self.user))
+        self.assertNoFullScan(Payment.objects.filter(status='success'))
+        self.assertNoFullScan(Payment.objects.filter(payment_date__gte=timezone.now() - timedelta(days=30)))
+
+
+class PaymentAPIQueryCountTest(TestCase):
+    """Tests that the invoice and payment API query counts do not grow with the page size"""
+    
+    def setUp(self):
+        self.admin_user = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='admin123',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+    
+    def create_invoices(self, count):
+        for i in range(count):
+            number = User.objects.count()
+            user = User.objects.create_user(
+                username=f'user{number}',
+                email=f'user{number}@example.com',
+                password='user123'
+            )
+            service = Service.objects.create(
+                name=f'Service {number}',
+                description='Service description',
+                price=100.00
+            )
+            service.features.add(ServiceFeature.objects.create(name=f'Feature {number}'))
+            ticket = Ticket.objects.create(title=f'Ticket {number}', description='Ticket', created_by=user)
+            TicketComment.objects.create(ticket=ticket, author=user, content='Please invoice me')
+            invoice = Invoice.objects.create(
+                user=user,
+                ticket=ticket,
+                service=service,
+                amount=Decimal('100.00'),
+                status=Invoice.Status.PENDING,
+                due_date=timezone.now().date() + timedelta(days=30)
+            )
+            Payment.objects.create(invoice=invoice, amount=Decimal('50.00'), method='cash')
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+    
+    def assertConstantQueries(self, url):
+        self.create_invoices(2)
+        small = self.count_queries(url)
+        self.create_invoices(6)
+        self.assertEqual(self.count_queries(url), small)
+    
+    def test_invoice_list(self):
+        """Test the nested user, ticket and service are eager loaded"""
+        self.assertConstantQueries('/api/payments/invoices/')
+    
+    def test_payment_list(self):
+        """Test the nested invoice and everything it nests are eager loaded"""
+        self.assertConstantQueries('/api/payments/payments/')
@@ -7,6 +7,9 @@ from django.db.models import Sum
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 
+from apps.core.export import ExportViewMixin
+from apps.core.pagination import KeysetPagination
+from apps.core.prefetch import EagerLoadingMixin
 from .models import Invoice, Payment, Refund
 from .serializers import InvoiceSerializer, PaymentSerializer, RefundSerializer
 
@@ -22,7 +25,7 @@ class IsOwnerOrStaff(permissions.BasePermission):
         # Otherwise, users can only access their own data
         return obj.user == request.user
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ExportViewMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows invoices to be viewed or edited.
     """
@@ -33,6 +36,12 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     search_fields = ['user__email', 'ticket__title', 'service__name']
     ordering_fields = ['created_at', 'due_date', 'amount']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    export_fields = (
+        'id', 'user_id', 'user__email', 'ticket_id', 'service_id', 'service__name',
+        'amount', 'status', 'due_date', 'created_at', 'updated_at',
+    )
     
     def get_queryset(self):
         """
@@ -119,10 +128,10 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         Get all overdue invoices (admin only).
         """
         today = timezone.now().date()
-        overdue_invoices = Invoice.objects.filter(
+        overdue_invoices = self.eager_load(Invoice.objects.filter(
             status=Invoice.Status.PENDING,
             due_date__lt=today
-        )
+        ))
         
         page = self.paginate_queryset(overdue_invoices)
         if page is not None:
@@ -132,7 +141,7 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(overdue_invoices, many=True)
         return Response(serializer.data)
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(ExportViewMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows payments to be viewed or edited.
     """
@@ -143,6 +152,11 @@ class PaymentViewSet(viewsets.ModelViewSet):
     search_fields = ['transaction_id', 'invoice__user__email']
     ordering_fields = ['payment_date', 'amount']
     ordering = ['-payment_date']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-payment_date', '-id')
+    export_fields = (
+        'id', 'invoice_id', 'invoice__user__email', 'amount', 'method', 'status', 'transaction_id', 'payment_date',
+    )
     
     def get_queryset(self):
         """
@@ -208,7 +222,7 @@ class PaymentViewSet(viewsets.ModelViewSet):
         
         return Response({"message": _("Payment confirmed successfully")})
 
-class RefundViewSet(viewsets.ModelViewSet):
+class RefundViewSet(ExportViewMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows refunds to be viewed or edited.
     """
@@ -219,6 +233,11 @@ class RefundViewSet(viewsets.ModelViewSet):
     search_fields = ['payment__invoice__user__email', 'reason']
     ordering_fields = ['created_at', 'processed_at', 'amount']
     ordering = ['-created_at']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    export_fields = (
+        'id', 'payment_id', 'payment__invoice_id', 'amount', 'status', 'reason', 'processed_at', 'created_at',
+    )
     
     def get_queryset(self):
         """
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from apps.core.admin import CSVImportAdminMixin
 from .models import Service, ServiceFeature
 
 # Register your models here.
@@ -9,7 +10,8 @@ class ServiceFeatureAdmin(admin.ModelAdmin):
     search_fields = ['name', 'description']
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(CSVImportAdminMixin, admin.ModelAdmin):
+    import_kind = 'services'
     list_display = ['name', 'category', 'price', 'is_featured', 'is_active']
     list_filter = ['category', 'is_featured', 'is_active']
     search_fields = ['name', 'description']
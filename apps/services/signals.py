@@ -1,6 +1,7 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Service
+from .models import Service, ServiceFeature
+from apps.core.cache import SERVICES, invalidate_on_commit
 from django.utils import timezone
 import os
 
@@ -24,5 +25,15 @@ def service_post_save(sender, instance, created, **kwargs):
     """
     Signal to handle operations after saving a service
     """
-    # Add logging or additional functionality as needed
-    pass 
\ No newline at end of file
+    invalidate_on_commit(SERVICES)
+
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=ServiceFeature)
+@receiver(post_delete, sender=ServiceFeature)
+@receiver(m2m_changed, sender=Service.features.through)
+def service_catalog_changed(sender, **kwargs):
+    """
+    Invalidate the cached service catalog when services or their features change
+    """
+    invalidate_on_commit(SERVICES)
+ 
\ No newline at end of file
@@ -4,6 +4,7 @@ from django_filters import rest_framework as filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiParameter
+from apps.core.prefetch import EagerLoadingMixin
 from .models import Service, ServiceFeature
 from .serializers import ServiceSerializer, ServiceFeatureSerializer
 
@@ -45,7 +46,7 @@ class ServiceFeatureViewSet(viewsets.ModelViewSet):
     ordering_fields = ['name']
     ordering = ['name']
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows services to be viewed or edited.
     """
@@ -1,14 +1,20 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import Ticket, TicketComment, TicketAttachment
+from apps.core.admin import CSVImportAdminMixin
+from .models import ExportJob, SLAPolicy, Ticket, TicketComment, TicketAttachment, TicketStatusEvent
 
 @admin.register(Ticket)
-class TicketAdmin(admin.ModelAdmin):
+class TicketAdmin(CSVImportAdminMixin, admin.ModelAdmin):
+    import_kind = 'tickets'
     list_display = ('id', 'title', 'status', 'priority', 'created_by', 'assigned_to', 'created_at', 'last_updated')
     list_filter = ('status', 'priority', 'created_at')
     search_fields = ('title', 'description', 'created_by__email', 'assigned_to__email')
     date_hierarchy = 'created_at'
-    readonly_fields = ('created_at', 'updated_at', 'last_updated', 'resolved_at')
+    readonly_fields = (
+        'created_at', 'updated_at', 'last_updated', 'resolved_at',
+        'first_response_at', 'first_response_by', 'first_staff_response_at',
+        'sla_due_at', 'sla_warn_at', 'sla_breached_at', 'status_changed_at'
+    )
     fieldsets = (
         (_('Basic Information'), {
             'fields': ('title', 'description', 'status', 'priority')
@@ -17,7 +23,13 @@ class TicketAdmin(admin.ModelAdmin):
             'fields': ('created_by', 'assigned_to')
         }),
         (_('Dates'), {
-            'fields': ('due_date', 'created_at', 'updated_at', 'last_updated', 'resolved_at')
+            'fields': (
+                'due_date', 'created_at', 'updated_at', 'last_updated', 'status_changed_at', 'resolved_at',
+                'first_response_at', 'first_response_by', 'first_staff_response_at'
+            )
+        }),
+        (_('SLA'), {
+            'fields': ('sla_due_at', 'sla_warn_at', 'sla_breached_at')
         }),
         (_('Device Information'), {
             'fields': ('category', 'device_type', 'device_model')
@@ -28,7 +40,8 @@ class TicketAdmin(admin.ModelAdmin):
     )
 
 @admin.register(TicketComment)
-class TicketCommentAdmin(admin.ModelAdmin):
+class TicketCommentAdmin(CSVImportAdminMixin, admin.ModelAdmin):
+    import_kind = 'comments'
     list_display = ('id', 'ticket', 'author', 'created_at', 'is_internal')
     list_filter = ('is_internal', 'created_at')
     search_fields = ('ticket__title', 'author__email', 'content')
@@ -42,3 +55,37 @@ class TicketAttachmentAdmin(admin.ModelAdmin):
     search_fields = ('ticket__title', 'uploaded_by__email', 'description')
     date_hierarchy = 'uploaded_at'
     readonly_fields = ('uploaded_at',)
+
+@admin.register(SLAPolicy)
+class SLAPolicyAdmin(admin.ModelAdmin):
+    list_display = ('priority', 'service', 'resolution_hours', 'warning_percent')
+    list_filter = ('priority', 'service')
+    list_select_related = ('service',)
+
+@admin.register(TicketStatusEvent)
+class TicketStatusEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'ticket', 'from_status', 'to_status', 'changed_by', 'created_at')
+    list_filter = ('to_status', 'created_at')
+    search_fields = ('ticket__title', 'changed_by__email')
+    date_hierarchy = 'created_at'
+    list_select_related = ('ticket', 'changed_by')
+
+    # The history is append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'export', 'export_format', 'requested_by', 'status', 'rows_written', 'total_rows', 'created_at')
+    list_filter = ('status', 'export', 'created_at')
+    search_fields = ('requested_by__email', 'query')
+    date_hierarchy = 'created_at'
+    list_select_related = ('requested_by',)
+    readonly_fields = (
+        'cursor', 'total_rows', 'rows_written', 'bytes_written', 'error', 'created_at', 'started_at',
+        'heartbeat_at', 'completed_at'
+    )
+
@@ -0,0 +1,126 @@
+"""
+Bulk ticket operations.
+
+``apply_bulk_operation`` assigns, re-statuses or closes many tickets with a
+single UPDATE in one transaction. Saving tickets one by one would run the
+save signals, and their queries, for every ticket. Instead it records an
+internal audit comment and status event per changed ticket with
+``bulk_create``, queues one
+batched notification task and sends ``tickets_bulk_updated`` once, so the
+metrics rollups and caches are refreshed for the whole batch.
+"""
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .models import Ticket, TicketComment, TicketStatusEvent
+from .tasks import send_ticket_notifications
+
+ASSIGN = 'assign'
+CHANGE_STATUS = 'change_status'
+CLOSE = 'close'
+OPERATIONS = (ASSIGN, CHANGE_STATUS, CLOSE)
+
+MAX_BULK_TICKETS = 500
+
+# Sent with ``tickets``, the changed rows as dicts of their previous values,
+# and ``updated_at``, the time of the update
+tickets_bulk_updated = Signal()
+
+PREVIOUS_VALUES = (
+    'id', 'status', 'assigned_to_id', 'created_by_id', 'created_at', 'resolved_at', 'status_changed_at'
+)
+
+
+def _audit_note(row, changes, actor, technician):
+    actor_name = actor.get_full_name() or actor.username
+    if 'assigned_to_id' in changes and row['assigned_to_id'] != changes['assigned_to_id']:
+        technician_name = technician.get_full_name() or technician.username
+        return f'{actor_name} assigned this ticket to {technician_name} in a bulk update.'
+    previous = Ticket.Status(row['status']).label
+    current = Ticket.Status(changes['status']).label
+    return f'{actor_name} changed the status from {previous} to {current} in a bulk update.'
+
+
+def _notifications(row, changes):
+    ticket_id = row['id']
+    notifications = []
+    if 'assigned_to_id' in changes and row['assigned_to_id'] != changes['assigned_to_id']:
+        notifications.append([changes['assigned_to_id'], ticket_id, 'assigned'])
+    if row['status'] != changes['status']:
+        notifications.append([row['created_by_id'], ticket_id, 'status_update'])
+        if row['assigned_to_id'] and 'assigned_to_id' not in changes:
+            notifications.append([row['assigned_to_id'], ticket_id, 'status_update'])
+    return notifications
+
+
+def apply_bulk_operation(tickets, operation, actor, technician=None, status=None):
+    """
+    Apply ``operation`` to the ``tickets`` queryset on behalf of ``actor``
+    and return the ids of the tickets that changed, tickets already in the
+    requested state are left alone.
+
+    ``technician`` is required to assign and ``status`` to change the status.
+    """
+    if operation == ASSIGN:
+        changes = {'assigned_to_id': technician.id, 'status': Ticket.Status.ASSIGNED}
+    elif operation == CLOSE:
+        changes = {'status': Ticket.Status.CLOSED}
+    elif operation == CHANGE_STATUS:
+        changes = {'status': status}
+    else:
+        raise ValueError(f'Unknown bulk operation: {operation}')
+
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            tickets.select_related(None).select_for_update().order_by('id').values(*PREVIOUS_VALUES)
+        )
+        changed = [row for row in rows if any(row[field] != value for field, value in changes.items())]
+        if not changed:
+            return []
+        ids = [row['id'] for row in changed]
+
+        values = dict(changes, updated_at=now, last_updated=now)
+        # Only tickets whose status changes enter a new one
+        values['status_changed_at'] = Case(
+            When(~Q(status=changes['status']), then=Value(now)),
+            default=F('status_changed_at')
+        )
+        if changes['status'] == Ticket.Status.RESOLVED:
+            values['resolved_at'] = Coalesce('resolved_at', Value(now))
+        Ticket.objects.filter(id__in=ids).update(**values)
+
+        TicketComment.objects.bulk_create([
+            TicketComment(
+                ticket_id=row['id'],
+                author=actor,
+                content=_audit_note(row, changes, actor, technician),
+                is_internal=True
+            )
+            for row in changed
+        ])
+        TicketStatusEvent.objects.bulk_create([
+            TicketStatusEvent(
+                ticket_id=row['id'],
+                from_status=row['status'],
+                to_status=changes['status'],
+                changed_by=actor,
+                created_at=now,
+                status_seconds=(
+                    int((now - row['status_changed_at']).total_seconds()) if row['status_changed_at'] else None
+                )
+            )
+            for row in changed if row['status'] != changes['status']
+        ])
+
+        notifications = [
+            notification for row in changed for notification in _notifications(row, changes)
+        ]
+        if notifications:
+            transaction.on_commit(lambda: send_ticket_notifications.delay(notifications))
+
+        tickets_bulk_updated.send(sender=Ticket, tickets=changed, updated_at=now)
+    return ids
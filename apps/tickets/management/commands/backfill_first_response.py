@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Max, OuterRef, Q, Subquery
+
+from apps.tickets.models import Ticket, TicketComment
+
+
+class Command(BaseCommand):
+    help = 'Backfill the denormalized first response fields on tickets from their comments'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tickets processed per batch'
+        )
+        parser.add_argument(
+            '--overwrite',
+            action='store_true',
+            help='Recompute tickets that already have a first response recorded'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(options['batch_size'], 1)
+        last_id = Ticket.objects.aggregate(last=Max('id'))['last']
+        if not last_id:
+            self.stdout.write(self.style.WARNING('No tickets found, nothing to backfill'))
+            return
+
+        responses = TicketComment.objects.filter(
+            ticket=OuterRef('pk')
+        ).exclude(
+            author=OuterRef('created_by')
+        ).order_by('created_at', 'id')
+        staff_responses = responses.filter(
+            Q(author__is_staff=True) | Q(author__role__in=TicketComment.STAFF_ROLES)
+        )
+
+        updated = 0
+        for batch_start in range(1, last_id + 1, batch_size):
+            tickets = Ticket.objects.filter(
+                id__gte=batch_start,
+                id__lt=batch_start + batch_size
+            )
+            if not options['overwrite']:
+                tickets = tickets.filter(first_response_at__isnull=True)
+
+            tickets = list(tickets.annotate(
+                response_at=Subquery(responses.values('created_at')[:1]),
+                response_by=Subquery(responses.values('author_id')[:1]),
+                staff_response_at=Subquery(staff_responses.values('created_at')[:1])
+            ).only('id', 'created_by'))
+
+            for ticket in tickets:
+                ticket.first_response_at = ticket.response_at
+                ticket.first_response_by_id = ticket.response_by
+                ticket.first_staff_response_at = ticket.staff_response_at
+
+            # bulk_update bypasses save() so last_updated and the ticket signals are untouched
+            Ticket.objects.bulk_update(
+                tickets,
+                ['first_response_at', 'first_response_by', 'first_staff_response_at']
+            )
+            updated += len(tickets)
+            self.stdout.write(f'  tickets {batch_start}-{batch_start + batch_size - 1}: {len(tickets)} updated')
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully backfilled {updated} tickets'))
+        self.stdout.write('Run backfill_ticket_rollups to refresh the response time metrics')
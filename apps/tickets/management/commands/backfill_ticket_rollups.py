@@ -0,0 +1,59 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.tickets.metrics import DAY, rebuild_rollups, truncate_day
+from apps.tickets.models import Ticket
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly and daily ticket metrics rollups from the tickets table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='First day to rebuild (YYYY-MM-DD). Defaults to the oldest ticket.'
+        )
+        parser.add_argument(
+            '--until',
+            help='Last day to rebuild (YYYY-MM-DD). Defaults to today.'
+        )
+        parser.add_argument(
+            '--days-per-batch',
+            type=int,
+            default=1,
+            help='Number of days rebuilt per batch'
+        )
+
+    def handle(self, *args, **options):
+        first_created = Ticket.objects.aggregate(first=Min('created_at'))['first']
+        if not first_created:
+            self.stdout.write(self.style.WARNING('No tickets found, nothing to backfill'))
+            return
+
+        # Rebuild up to today so buckets left behind by deleted or moved tickets are cleared
+        start = self._parse_day(options['since']) or truncate_day(first_created)
+        end = (self._parse_day(options['until']) or truncate_day(timezone.now())) + DAY
+        step = DAY * max(options['days_per_batch'], 1)
+
+        self.stdout.write(f'Rebuilding rollups from {start:%Y-%m-%d} to {end - DAY:%Y-%m-%d}')
+        batch_start = start
+        total_rows = 0
+        while batch_start < end:
+            batch_end = min(batch_start + step, end)
+            total_rows += rebuild_rollups(batch_start, batch_end)
+            self.stdout.write(f'  {batch_start:%Y-%m-%d}: done')
+            batch_start = batch_end
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt rollups ({total_rows} daily rows)')
+        )
+
+    def _parse_day(self, value):
+        if not value:
+            return None
+        try:
+            return truncate_day(datetime.datetime.strptime(value, '%Y-%m-%d'))
+        except ValueError:
+            raise CommandError(f'Invalid date "{value}", expected YYYY-MM-DD')
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tickets.summaries import compute_summaries, save_summaries, stale_summaries
+
+class Command(BaseCommand):
+    help = 'Recount the per-user ticket summaries from the tickets table and report the ones that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=int,
+            action='append',
+            dest='users',
+            help='Only rebuild the summary of this user id (repeatable)'
+        )
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report the out of date summaries, failing if there are any'
+        )
+
+    def handle(self, *args, **options):
+        computed = compute_summaries(options['users'])
+        stale = stale_summaries(computed)
+        for user_id in stale[:20]:
+            self.stdout.write(f'  Summary of user {user_id} is out of date')
+        if len(stale) > 20:
+            self.stdout.write(f'  ... and {len(stale) - 20} more')
+
+        if options['check']:
+            if stale:
+                raise CommandError(f'{len(stale)} of {len(computed)} summaries are out of date')
+            self.stdout.write(self.style.SUCCESS(f'All {len(computed)} summaries are up to date'))
+            return
+
+        save_summaries(list(computed.values()))
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {len(computed)} summaries ({len(stale)} were out of date)')
+        )
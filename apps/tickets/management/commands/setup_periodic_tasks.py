@@ -12,6 +12,16 @@ class Command(BaseCommand):
             period=IntervalSchedule.DAYS,
         )
         
+        minute_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=1,
+            period=IntervalSchedule.MINUTES,
+        )
+        
+        five_minute_schedule, _ = IntervalSchedule.objects.get_or_create(
+            every=5,
+            period=IntervalSchedule.MINUTES,
+        )
+        
         # Weekly schedule (Every Monday at 9:00 AM)
         weekly_schedule, _ = CrontabSchedule.objects.get_or_create(
             minute='0',
@@ -44,6 +54,16 @@ class Command(BaseCommand):
             }
         )
 
+        PeriodicTask.objects.get_or_create(
+            name='Check SLA Breaches',
+            task='apps.tickets.tasks.check_sla_breaches',
+            interval=five_minute_schedule,
+            defaults={
+                'enabled': True,
+                'start_time': timezone.now()
+            }
+        )
+
         PeriodicTask.objects.get_or_create(
             name='Send Weekly Ticket Summary',
             task='apps.tickets.tasks.send_weekly_ticket_summary',
@@ -53,6 +73,26 @@ class Command(BaseCommand):
             }
         )
 
+        PeriodicTask.objects.get_or_create(
+            name='Flush View Counters',
+            task='apps.core.tasks.flush_view_counters',
+            interval=minute_schedule,
+            defaults={
+                'enabled': True,
+                'start_time': timezone.now()
+            }
+        )
+
+        PeriodicTask.objects.get_or_create(
+            name='Resume Export Jobs',
+            task='apps.tickets.tasks.resume_export_jobs',
+            interval=five_minute_schedule,
+            defaults={
+                'enabled': True,
+                'start_time': timezone.now()
+            }
+        )
+
         self.stdout.write(
             self.style.SUCCESS('Successfully set up periodic tasks')
         )
@@ -0,0 +1,393 @@
+"""
+Ticket metrics rollups.
+
+Hourly rollup rows are rebuilt from the tickets table, daily rows are rebuilt
+from the hourly rows of the same day. Saving a ticket or adding a comment only
+touches the hour (and day) the ticket belongs to, so keeping the rollups
+current costs O(tickets in that hour) rather than O(all tickets). Rebuilds of
+the same day take its ``TicketMetricsRollupLock`` row first and run one after
+the other.
+
+Resolution times, reopen rates and time in status are aggregated from the
+``TicketStatusEvent`` history instead.
+"""
+import datetime
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncDay
+from django.utils import timezone
+
+from apps.core import cache
+from .models import Ticket, TicketMetricsRollup, TicketMetricsRollupLock, TicketStatusEvent
+
+Granularity = TicketMetricsRollup.Granularity
+
+DIMENSIONS = ('status', 'priority', 'service_id', 'technician_id')
+MEASURES = (
+    'created_count',
+    'resolved_count',
+    'first_response_count',
+    'first_response_seconds',
+    'resolution_seconds',
+)
+
+HOUR = datetime.timedelta(hours=1)
+DAY = datetime.timedelta(days=1)
+
+# Period filters understood by the dashboards, in days back from now
+PERIOD_DAYS = {
+    'week': 7,
+    'month': 30,
+    'quarter': 90,
+}
+
+# Minimum resolution rate (percent) for each performance level, best first
+PERFORMANCE_LEVELS = (
+    (90, 'excellent'),
+    (75, 'good'),
+    (50, 'average'),
+)
+
+TEAM_METRICS_CACHE_TIMEOUT = 60
+
+
+def truncate_hour(value):
+    """Return the start of the hour containing ``value``"""
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def truncate_day(value):
+    """Return midnight of the day containing ``value`` (date or datetime)"""
+    if not isinstance(value, datetime.datetime):
+        return datetime.datetime.combine(value, datetime.time.min)
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _collect_hourly(start, end):
+    """
+    Aggregate ticket measures for [start, end) keyed by (hour, dimensions).
+    """
+    rows = defaultdict(lambda: dict.fromkeys(MEASURES, 0))
+
+    created = Ticket.objects.filter(
+        created_at__gte=start,
+        created_at__lt=end
+    ).values_list(
+        'status', 'priority', 'service_id', 'assigned_to_id',
+        'created_at', 'first_response_at'
+    )
+    for status, priority, service_id, technician_id, created_at, first_response_at in created:
+        row = rows[(truncate_hour(created_at), status, priority, service_id, technician_id)]
+        row['created_count'] += 1
+        if first_response_at:
+            row['first_response_count'] += 1
+            row['first_response_seconds'] += int((first_response_at - created_at).total_seconds())
+
+    resolved = Ticket.objects.filter(
+        resolved_at__gte=start,
+        resolved_at__lt=end
+    ).values_list(
+        'status', 'priority', 'service_id', 'assigned_to_id',
+        'created_at', 'resolved_at'
+    )
+    for status, priority, service_id, technician_id, created_at, resolved_at in resolved:
+        row = rows[(truncate_hour(resolved_at), status, priority, service_id, technician_id)]
+        row['resolved_count'] += 1
+        row['resolution_seconds'] += int((resolved_at - created_at).total_seconds())
+
+    return rows
+
+
+def lock_rollup_days(start, end):
+    """
+    Lock the rollup days overlapping [start, end) until the current
+    transaction ends, in date order so concurrent rebuilds cannot deadlock
+    """
+    days = []
+    day = truncate_day(start)
+    while day < end:
+        days.append(day)
+        day += DAY
+    TicketMetricsRollupLock.objects.bulk_create(
+        [TicketMetricsRollupLock(day=day) for day in days], ignore_conflicts=True
+    )
+    list(TicketMetricsRollupLock.objects.select_for_update().filter(day__in=days).order_by('day'))
+
+
+def rebuild_hourly_rollups(start, end):
+    """Replace the hourly rollup rows for every hour in [start, end)"""
+    with transaction.atomic():
+        # Counted once the lock is held, with READ COMMITTED (Django's default
+        # on MySQL) a rebuild waiting on another one then sees its tickets
+        lock_rollup_days(start, end)
+        rows = _collect_hourly(start, end)
+        TicketMetricsRollup.objects.filter(
+            granularity=Granularity.HOUR,
+            bucket_start__gte=start,
+            bucket_start__lt=end
+        ).delete()
+        TicketMetricsRollup.objects.bulk_create([
+            TicketMetricsRollup(
+                granularity=Granularity.HOUR,
+                bucket_start=bucket_start,
+                **dict(zip(DIMENSIONS, dimensions)),
+                **measures
+            )
+            for (bucket_start, *dimensions), measures in rows.items()
+        ])
+    return len(rows)
+
+
+def rebuild_daily_rollups(start, end):
+    """Replace the daily rollup rows for every day in [start, end) from the hourly rows"""
+    with transaction.atomic():
+        lock_rollup_days(start, end)
+        hourly = TicketMetricsRollup.objects.filter(
+            granularity=Granularity.HOUR,
+            bucket_start__gte=start,
+            bucket_start__lt=end
+        ).annotate(
+            day=TruncDay('bucket_start')
+        ).values(
+            'day', *DIMENSIONS
+        ).annotate(
+            **{f'total_{measure}': Sum(measure) for measure in MEASURES}
+        ).order_by()
+
+        daily = [
+            TicketMetricsRollup(
+                granularity=Granularity.DAY,
+                bucket_start=truncate_day(row['day']),
+                **{dimension: row[dimension] for dimension in DIMENSIONS},
+                **{measure: row[f'total_{measure}'] for measure in MEASURES}
+            )
+            for row in hourly
+        ]
+        TicketMetricsRollup.objects.filter(
+            granularity=Granularity.DAY,
+            bucket_start__gte=start,
+            bucket_start__lt=end
+        ).delete()
+        TicketMetricsRollup.objects.bulk_create(daily)
+    return len(daily)
+
+
+def rebuild_rollups(start, end):
+    """Rebuild hourly then daily rollups for whole days covering [start, end)"""
+    start = truncate_day(start)
+    end = truncate_day(end)
+    if end < start + DAY:
+        end = start + DAY
+    rebuild_hourly_rollups(start, end)
+    return rebuild_daily_rollups(start, end)
+
+
+def refresh_rollups_for(*moments):
+    """
+    Incrementally refresh the hour and day buckets containing each of
+    ``moments``. ``None`` values are ignored.
+    """
+    hours = {truncate_hour(moment) for moment in moments if moment}
+    days = sorted({truncate_day(hour) for hour in hours})
+    with transaction.atomic():
+        # All days up front, the per-bucket rebuilds below then hold them already
+        for day in days:
+            lock_rollup_days(day, day + DAY)
+        for hour in sorted(hours):
+            rebuild_hourly_rollups(hour, hour + HOUR)
+        for day in days:
+            rebuild_daily_rollups(day, day + DAY)
+
+
+def refresh_ticket_rollups(ticket, previous_resolved_at=None):
+    """Refresh the rollup buckets a single ticket contributes to"""
+    refresh_rollups_for(ticket.created_at, ticket.resolved_at, previous_resolved_at)
+
+
+def rollup_totals(start=None, end=None, granularity=Granularity.DAY, **filters):
+    """
+    Sum every measure over the rollup rows in [start, end).
+
+    Extra keyword arguments filter on the dimension columns, e.g.
+    ``status='resolved'`` or ``technician=user``.
+    """
+    rollups = TicketMetricsRollup.objects.filter(granularity=granularity, **filters)
+    if start:
+        rollups = rollups.filter(bucket_start__gte=truncate_day(start) if granularity == Granularity.DAY else start)
+    if end:
+        rollups = rollups.filter(bucket_start__lt=end)
+    totals = rollups.aggregate(**{measure: Sum(measure) for measure in MEASURES})
+    return {measure: totals[measure] or 0 for measure in MEASURES}
+
+
+def daily_rollup_counts(start, end, **filters):
+    """
+    Return ``{date: {'created': n, 'resolved': n}}`` for each day in
+    [start, end] that has rollup rows.
+    """
+    rows = TicketMetricsRollup.objects.filter(
+        granularity=Granularity.DAY,
+        bucket_start__gte=truncate_day(start),
+        bucket_start__lt=truncate_day(end) + DAY,
+        **filters
+    ).values('bucket_start').annotate(
+        created=Sum('created_count'),
+        resolved=Sum('resolved_count')
+    ).order_by()
+    return {
+        row['bucket_start'].date(): {'created': row['created'], 'resolved': row['resolved']}
+        for row in rows
+    }
+
+
+def status_counts():
+    """Return the current number of tickets in each status from the rollups"""
+    rows = TicketMetricsRollup.objects.filter(
+        granularity=Granularity.DAY
+    ).values('status').annotate(total=Sum('created_count')).order_by()
+    return {row['status']: row['total'] for row in rows}
+
+
+def response_time(field='first_response_at'):
+    """Expression for the time between ticket creation and ``field``"""
+    return ExpressionWrapper(F(field) - F('created_at'), output_field=DurationField())
+
+
+def average_response_hours(tickets, field='first_response_at'):
+    """
+    Average time to first response over ``tickets`` in hours, computed in a
+    single aggregate query. Tickets without a response are ignored.
+    """
+    average = tickets.filter(**{f'{field}__isnull': False}).aggregate(
+        average=Avg(response_time(field))
+    )['average']
+    if not average:
+        return 0
+    return average.total_seconds() / 3600
+
+
+def average_hours(seconds, count):
+    """Average a seconds total over ``count`` items, in hours rounded to 0.1"""
+    if not count:
+        return 0
+    return round(seconds / count / 3600, 1)
+
+
+def status_events(start=None, end=None):
+    """The status events recorded between ``start`` and ``end``"""
+    events = TicketStatusEvent.objects.all()
+    if start is not None:
+        events = events.filter(created_at__gte=start)
+    if end is not None:
+        events = events.filter(created_at__lt=end)
+    return events
+
+
+def time_in_status(start=None, end=None):
+    """Return ``{status: average hours}`` tickets spent in each status they left within the period"""
+    rows = status_events(start, end).filter(status_seconds__isnull=False).exclude(from_status='').values(
+        'from_status'
+    ).annotate(seconds=Sum('status_seconds'), count=Count('id')).order_by()
+    return {row['from_status']: average_hours(row['seconds'], row['count']) for row in rows}
+
+
+def reopen_rate(start=None, end=None):
+    """Percentage of the tickets resolved or closed within the period that were also reopened in it"""
+    done = (Ticket.Status.RESOLVED, Ticket.Status.CLOSED)
+    counts = status_events(start, end).aggregate(
+        done=Count('ticket', distinct=True, filter=Q(to_status__in=done)),
+        reopened=Count('ticket', distinct=True, filter=Q(from_status__in=done, to_status__in=Ticket.OPEN_STATUSES))
+    )
+    if not counts['done']:
+        return 0
+    return round(counts['reopened'] / counts['done'] * 100, 1)
+
+
+def resolution_hours(start=None, end=None):
+    """Average hours from creation to resolution over the resolutions within the period"""
+    average = status_events(start, end).filter(to_status=Ticket.Status.RESOLVED).aggregate(
+        average=Avg(ExpressionWrapper(F('created_at') - F('ticket__created_at'), output_field=DurationField()))
+    )['average']
+    if not average:
+        return 0
+    return round(average.total_seconds() / 3600, 1)
+
+
+def period_start(period, now=None):
+    """
+    Return the datetime a period filter ('today', 'week', 'month', 'quarter')
+    starts at, or ``None`` for 'all' and unknown periods.
+    """
+    now = now or timezone.now()
+    if period == 'today':
+        return truncate_day(now)
+    if period in PERIOD_DAYS:
+        return now - datetime.timedelta(days=PERIOD_DAYS[period])
+    return None
+
+
+def performance_level(score):
+    """Map a resolution rate in percent to a performance level"""
+    for minimum, level in PERFORMANCE_LEVELS:
+        if score >= minimum:
+            return level
+    return 'below-average'
+
+
+def _compute_team_metrics(since):
+    tickets = Q()
+    if since:
+        tickets &= Q(assigned_tickets__created_at__gte=since)
+    resolved = tickets & Q(assigned_tickets__status__in=[Ticket.Status.RESOLVED, Ticket.Status.CLOSED])
+    responded = tickets & Q(assigned_tickets__first_staff_response_at__isnull=False)
+
+    # One LEFT JOIN grouped by technician, technicians without tickets report zeros
+    technicians = get_user_model().objects.filter(role='technician').annotate(
+        assigned=Count('assigned_tickets', filter=tickets),
+        resolved=Count('assigned_tickets', filter=resolved),
+        avg_response=Avg(
+            ExpressionWrapper(
+                F('assigned_tickets__first_staff_response_at') - F('assigned_tickets__created_at'),
+                output_field=DurationField()
+            ),
+            filter=responded
+        )
+    ).order_by('id')
+
+    metrics = []
+    for technician in technicians:
+        score = int(technician.resolved / technician.assigned * 100) if technician.assigned else 0
+        metrics.append({
+            'technician': technician,
+            'assigned': technician.assigned,
+            'resolved': technician.resolved,
+            'avg_response_hours': technician.avg_response.total_seconds() / 3600 if technician.avg_response else 0,
+            'performance_score': score,
+            'performance_level': performance_level(score),
+        })
+    metrics.sort(key=lambda row: row['performance_score'], reverse=True)
+    return metrics
+
+
+def team_metrics(period='all', cache_timeout=None):
+    """
+    Assigned, resolved, average first staff response and performance level
+    for every technician, best performers first.
+
+    Tickets are limited to those created within ``period`` (see
+    ``period_start``). When ``cache_timeout`` is given the result is cached
+    per period for at most that many seconds, or until tickets change.
+    """
+    if not cache_timeout:
+        return _compute_team_metrics(period_start(period))
+
+    return cache.cached(
+        'tickets:team_metrics',
+        lambda: _compute_team_metrics(period_start(period)),
+        parts=[period],
+        tags=[cache.TICKETS],
+        timeout=cache_timeout
+    )
@@ -0,0 +1,38 @@
+# Generated by Django 5.0 on 2026-10-18 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_servicefeature_alter_service_options_and_more'),
+        ('tickets', '0003_ticket_contact_method_ticket_preferred_contact_time_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketMetricsRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('status', models.CharField(choices=[('new', 'New'), ('assigned', 'Assigned'), ('in_progress', 'In Progress'), ('pending', 'Pending'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], max_length=20)),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('resolved_count', models.PositiveIntegerField(default=0)),
+                ('first_response_count', models.PositiveIntegerField(default=0)),
+                ('first_response_seconds', models.BigIntegerField(default=0)),
+                ('resolution_seconds', models.BigIntegerField(default=0)),
+                ('service', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='services.service')),
+                ('technician', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['granularity', 'bucket_start'],
+                'indexes': [models.Index(fields=['granularity', 'bucket_start'], name='tickets_rollup_bucket_idx')],
+            },
+        ),
+    ]
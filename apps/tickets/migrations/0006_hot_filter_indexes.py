@@ -0,0 +1,40 @@
+# Generated by Django 5.0 on 2026-10-18 22:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_servicefeature_alter_service_options_and_more'),
+        ('tickets', '0005_ticket_first_response'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'status'], name='tickets_assignee_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', 'status'], name='tickets_creator_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'due_date'], name='tickets_status_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['resolved_at'], name='tickets_resolved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketcomment',
+            index=models.Index(fields=['ticket', 'created_at'], name='tickets_comment_ticket_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketcomment',
+            index=models.Index(fields=['author', 'created_at'], name='tickets_comment_author_idx'),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.0 on 2026-10-18 23:14
+
+from datetime import timedelta
+
+import django.core.validators
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+# SLAPolicy.DEFAULT_RESOLUTION_HOURS and DEFAULT_WARNING_PERCENT, there are no policies yet
+RESOLUTION_HOURS = {'urgent': 2, 'high': 4, 'medium': 8, 'low': 24}
+WARNING_PERCENT = 75
+
+
+def schedule_open_tickets(apps, schema_editor):
+    """
+    Compute the SLA deadlines of the open tickets. Deadlines already passed
+    are recorded as breached so the first sweep doesn't notify the backlog.
+    """
+    now = timezone.now()
+    Ticket = apps.get_model('tickets', 'Ticket')
+    tickets = Ticket.objects.filter(status__in=['new', 'assigned', 'in_progress', 'pending'])
+    last_id = 0
+    while True:
+        batch = list(tickets.filter(id__gt=last_id).order_by('id').only('id', 'created_at', 'priority')[:500])
+        if not batch:
+            return
+        for ticket in batch:
+            hours = RESOLUTION_HOURS.get(ticket.priority, 24)
+            ticket.sla_due_at = ticket.created_at + timedelta(hours=hours)
+            ticket.sla_warn_at = ticket.created_at + timedelta(hours=hours * WARNING_PERCENT / 100)
+            ticket.sla_breached_at = ticket.sla_due_at if ticket.sla_due_at <= now else None
+        Ticket.objects.bulk_update(batch, ['sla_due_at', 'sla_warn_at', 'sla_breached_at'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_servicefeature_alter_service_options_and_more'),
+        ('tickets', '0006_hot_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SLAPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('urgent', 'Urgent')], max_length=20)),
+                ('resolution_hours', models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1)])),
+                ('warning_percent', models.PositiveSmallIntegerField(default=75, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(100)])),
+            ],
+            options={
+                'verbose_name': 'SLA policy',
+                'verbose_name_plural': 'SLA policies',
+                'ordering': ['priority', 'service'],
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_breached_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_warn_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', 'sla_warn_at'], name='tickets_assignee_sla_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('sla_breached_at__isnull', True)), fields=['sla_due_at'], name='tickets_sla_pending_idx'),
+        ),
+        migrations.AddField(
+            model_name='slapolicy',
+            name='service',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sla_policies', to='services.service'),
+        ),
+        migrations.AddConstraint(
+            model_name='slapolicy',
+            constraint=models.UniqueConstraint(fields=('priority', 'service'), name='tickets_sla_service_policy_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='slapolicy',
+            constraint=models.UniqueConstraint(condition=models.Q(('service__isnull', True)), fields=('priority',), name='tickets_sla_priority_policy_unique'),
+        ),
+        migrations.RunPython(schedule_open_tickets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 23:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_ticket_status_events'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('export', models.CharField(choices=[('tickets', 'Tickets'), ('comments', 'Comments'), ('invoices', 'Invoices'), ('payments', 'Payments'), ('refunds', 'Refunds')], max_length=20)),
+                ('export_format', models.CharField(choices=[('csv', 'CSV'), ('jsonl', 'JSON lines')], default='csv', max_length=5)),
+                ('compress', models.BooleanField(default=False)),
+                ('query', models.CharField(blank=True, max_length=2000)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('file', models.FileField(blank=True, upload_to='exports/')),
+                ('cursor', models.JSONField(blank=True, null=True)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('rows_written', models.PositiveIntegerField(default=0)),
+                ('bytes_written', models.PositiveBigIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['requested_by', 'created_at'], name='tickets_export_user_idx'), models.Index(fields=['status', 'heartbeat_at'], name='tickets_export_status_idx')],
+            },
+        ),
+    ]
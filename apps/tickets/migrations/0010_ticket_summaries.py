@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-19 00:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_email_verification_sent_at_and_more'),
+        ('tickets', '0009_export_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ticket_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('new_count', models.PositiveIntegerField(default=0)),
+                ('assigned_count', models.PositiveIntegerField(default=0)),
+                ('in_progress_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('resolved_count', models.PositiveIntegerField(default=0)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('open_created_seconds', models.BigIntegerField(default=0)),
+                ('last_activity_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'ticket summaries',
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.0 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_ticket_summaries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketMetricsRollupLock',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateTimeField(unique=True)),
+            ],
+        ),
+    ]
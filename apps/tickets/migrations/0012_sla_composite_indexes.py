@@ -0,0 +1,28 @@
+# Generated by Django 5.0 on 2026-10-19 00:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_servicefeature_alter_service_options_and_more'),
+        ('tickets', '0011_rollup_locks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='tickets_sla_pending_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['sla_breached_at', 'sla_due_at'], name='tickets_sla_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['status', 'sla_warn_at'], name='tickets_status_sla_idx'),
+        ),
+    ]
@@ -1,10 +1,13 @@
-from django.db import models
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from apps.accounts.models import User
+from apps.core.tracking import TrackedFieldsMixin
 from apps.services.models import Service
 from django.utils import timezone
+from datetime import timedelta
 
-class Ticket(models.Model):
+class Ticket(TrackedFieldsMixin, models.Model):
     class Status(models.TextChoices):
         NEW = 'new', _('New')
         ASSIGNED = 'assigned', _('Assigned')
@@ -50,7 +53,8 @@ class Ticket(models.Model):
         default=Priority.MEDIUM
     )
     due_date = models.DateTimeField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set on instantiation rather than on insert, the SLA deadlines are computed from it before saving
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     updated_at = models.DateTimeField(auto_now=True)
     last_updated = models.DateTimeField(auto_now=True)
     resolved_at = models.DateTimeField(null=True, blank=True)
@@ -61,18 +65,182 @@ class Ticket(models.Model):
     device_model = models.CharField(max_length=100, blank=True)
     contact_method = models.CharField(max_length=20, blank=True, null=True)
     preferred_contact_time = models.DateTimeField(blank=True, null=True)
+    # Denormalized from the first qualifying comment, see TicketComment.record_first_response
+    first_response_at = models.DateTimeField(null=True, blank=True)
+    first_response_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='first_responded_tickets'
+    )
+    first_staff_response_at = models.DateTimeField(null=True, blank=True)
+    # Computed from the SLA policy on create and on priority or service changes, see schedule_sla
+    sla_due_at = models.DateTimeField(null=True, blank=True)
+    sla_warn_at = models.DateTimeField(null=True, blank=True)
+    # Only ever written by the breach sweep, see apps.tickets.tasks.check_sla_breaches
+    sla_breached_at = models.DateTimeField(null=True, blank=True)
+    # When the ticket entered its current status, see TicketStatusEvent
+    status_changed_at = models.DateTimeField(null=True, blank=True)
+
+    OPEN_STATUSES = (Status.NEW, Status.ASSIGNED, Status.IN_PROGRESS, Status.PENDING)
+
+    # Only ever written by TicketComment.record_first_response
+    RESPONSE_FIELDS = ('first_response_at', 'first_response_by', 'first_staff_response_at')
+
+    # The SLA deadlines depend on these, SLA_FIELDS are derived from them
+    SLA_INPUTS = ('priority', 'service_id')
+    SLA_FIELDS = ('sla_due_at', 'sla_warn_at', 'sla_breached_at')
+    # Written together with the status
+    STATUS_FIELDS = ('status_changed_at', 'resolved_at')
+
+    tracked_fields = (
+        'status', 'priority', 'service_id', 'assigned_to_id', 'created_by_id', 'resolved_at', 'status_changed_at'
+    )
+
+    # The user making the current change, recorded on its status event
+    changed_by = None
+
+    def sla_inputs_changed(self):
+        """Whether the SLA deadlines need computing, i.e. the ticket is new or its priority or service changed"""
+        return any(self.has_changed(name) for name in self.SLA_INPUTS)
+
+    def schedule_sla(self, targets=None):
+        """Compute the SLA deadlines from the creation time and clear a recorded breach"""
+        self.sla_due_at, self.sla_warn_at = SLAPolicy.deadlines(self.created_at, self.priority, self.service_id, targets)
+        self.sla_breached_at = None
+
+    def _status_event(self, now):
+        # Record the transition and when the ticket entered its new status
+        previous_since = self.loaded_value('status_changed_at')
+        event = TicketStatusEvent(
+            ticket=self,
+            from_status='' if self._state.adding else self.loaded_value('status', ''),
+            to_status=self.status,
+            changed_by_id=self.changed_by.pk if self.changed_by else (self.created_by_id if self._state.adding else None),
+            created_at=self.created_at if self._state.adding else now,
+            status_seconds=int((now - previous_since).total_seconds()) if previous_since else None
+        )
+        self.status_changed_at = event.created_at
+        if self.status == self.Status.RESOLVED and not self.resolved_at:
+            self.resolved_at = now
+        return event
 
     def save(self, *args, **kwargs):
+        now = timezone.now()
         if self.pk:
-            self.last_updated = timezone.now()
-        super().save(*args, **kwargs)
+            self.last_updated = now
+        update_fields = kwargs.get('update_fields')
+        extra_fields = set()
+        reschedule = self.sla_inputs_changed() and (
+            update_fields is None or {'priority', 'service', 'service_id'} & set(update_fields)
+        )
+        if reschedule:
+            self.schedule_sla()
+            extra_fields.update(self.SLA_FIELDS)
+        event = None
+        if self.has_changed('status') and (update_fields is None or 'status' in update_fields):
+            event = self._status_event(now)
+            extra_fields.update(self.STATUS_FIELDS)
+        if update_fields is not None and extra_fields:
+            kwargs['update_fields'] = {*update_fields, *extra_fields}
+        if not self._state.adding and update_fields is None and not kwargs.get('force_insert'):
+            # Don't let a stale instance overwrite a response or breach recorded since it was loaded
+            skipped = self.RESPONSE_FIELDS if reschedule else self.RESPONSE_FIELDS + ('sla_breached_at',)
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in skipped
+            ]
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if event is not None:
+                event.save()
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['assigned_to', 'status'], name='tickets_assignee_status_idx'),
+            models.Index(fields=['created_by', 'status'], name='tickets_creator_status_idx'),
+            models.Index(fields=['status', 'due_date'], name='tickets_status_due_idx'),
+            models.Index(fields=['resolved_at'], name='tickets_resolved_idx'),
+            models.Index(fields=['created_at', 'first_response_at'], name='tickets_created_response_idx'),
+            models.Index(fields=['assigned_to', 'first_staff_response_at'], name='tickets_assignee_response_idx'),
+            models.Index(fields=['assigned_to', 'sla_warn_at'], name='tickets_assignee_sla_idx'),
+            # Plain composites, MySQL skips partial indexes: the breach sweep
+            # (unbreached, due) and the unscoped at-risk list
+            models.Index(fields=['sla_breached_at', 'sla_due_at'], name='tickets_sla_pending_idx'),
+            models.Index(fields=['status', 'sla_warn_at'], name='tickets_status_sla_idx'),
+        ]
 
     def __str__(self):
         return f"Ticket #{self.id} - {self.title}"
 
+class SLAPolicy(models.Model):
+    """
+    Resolution target for tickets of one priority, optionally limited to one
+    service. A service's policy takes precedence over the priority's general
+    one, priorities without any policy use ``DEFAULT_RESOLUTION_HOURS``.
+    Tickets are at risk once ``warning_percent`` of the target has passed.
+    """
+    DEFAULT_RESOLUTION_HOURS = {
+        Ticket.Priority.URGENT: 2,
+        Ticket.Priority.HIGH: 4,
+        Ticket.Priority.MEDIUM: 8,
+        Ticket.Priority.LOW: 24,
+    }
+    DEFAULT_WARNING_PERCENT = 75
+
+    priority = models.CharField(max_length=20, choices=Ticket.Priority.choices)
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sla_policies'
+    )
+    resolution_hours = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    warning_percent = models.PositiveSmallIntegerField(
+        default=DEFAULT_WARNING_PERCENT,
+        validators=[MinValueValidator(1), MaxValueValidator(100)]
+    )
+
+    class Meta:
+        ordering = ['priority', 'service']
+        verbose_name = _('SLA policy')
+        verbose_name_plural = _('SLA policies')
+        constraints = [
+            models.UniqueConstraint(fields=['priority', 'service'], name='tickets_sla_service_policy_unique'),
+            models.UniqueConstraint(
+                fields=['priority'],
+                condition=models.Q(service__isnull=True),
+                name='tickets_sla_priority_policy_unique'
+            ),
+        ]
+
+    def __str__(self):
+        scope = self.service.name if self.service_id else _('all services')
+        return f"{self.get_priority_display()} ({scope}): {self.resolution_hours}h"
+
+    @classmethod
+    def targets_for(cls, priority, service_id=None):
+        """Return ``(resolution_hours, warning_percent)`` for tickets of ``priority`` and ``service_id``"""
+        policy = cls.objects.filter(
+            models.Q(service_id=service_id) | models.Q(service__isnull=True),
+            priority=priority
+        ).order_by(models.F('service').asc(nulls_last=True)).first()
+        if policy is not None:
+            return policy.resolution_hours, policy.warning_percent
+        return cls.DEFAULT_RESOLUTION_HOURS.get(priority, 24), cls.DEFAULT_WARNING_PERCENT
+
+    @classmethod
+    def deadlines(cls, start, priority, service_id=None, targets=None):
+        """
+        Return the ``(due, warn)`` times of a ticket created at ``start``.
+        ``targets`` are the already looked up ``targets_for`` the ticket.
+        """
+        hours, warning_percent = targets or cls.targets_for(priority, service_id)
+        return start + timedelta(hours=hours), start + timedelta(hours=hours * warning_percent / 100)
+
 class TicketComment(models.Model):
     ticket = models.ForeignKey(
         Ticket,
@@ -88,8 +256,50 @@ class TicketComment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     is_internal = models.BooleanField(default=False)  # للملاحظات الداخلية للفنيين
 
+    STAFF_ROLES = ('admin', 'technician')
+
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['ticket', 'created_at'], name='tickets_comment_ticket_idx'),
+            models.Index(fields=['author', 'created_at'], name='tickets_comment_author_idx'),
+        ]
+
+    @property
+    def is_response(self):
+        """Whether this comment counts as a response (written by someone other than the ticket creator)"""
+        return self.author_id != self.ticket.created_by_id
+
+    @property
+    def is_staff_response(self):
+        """Whether this comment is a response written by a staff member"""
+        return self.is_response and (self.author.is_staff or self.author.role in self.STAFF_ROLES)
+
+    def record_first_response(self):
+        """
+        Store this comment on its ticket as the first (staff) response if it is
+        earlier than the one already recorded.
+
+        Uses conditional UPDATEs so concurrent comments cannot overwrite an
+        earlier response. Returns True if the ticket was changed.
+        """
+        if not self.is_response:
+            return False
+        
+        tickets = Ticket.objects.filter(pk=self.ticket_id)
+        updated = tickets.filter(
+            models.Q(first_response_at__isnull=True) | models.Q(first_response_at__gt=self.created_at)
+        ).update(first_response_at=self.created_at, first_response_by=self.author_id)
+        
+        if self.is_staff_response:
+            updated += tickets.filter(
+                models.Q(first_staff_response_at__isnull=True) | models.Q(first_staff_response_at__gt=self.created_at)
+            ).update(first_staff_response_at=self.created_at)
+        
+        if updated:
+            # Keep the cached ticket instance in line with the row
+            self.ticket.refresh_from_db(fields=self.ticket.RESPONSE_FIELDS)
+        return updated > 0
 
 class TicketAttachment(models.Model):
     ticket = models.ForeignKey(
@@ -107,4 +317,223 @@ class TicketAttachment(models.Model):
     description = models.CharField(max_length=255, blank=True)
 
     def __str__(self):
-        return f"Attachment for {self.ticket.title}"
\ No newline at end of file
+        return f"Attachment for {self.ticket.title}"
+
+class TicketStatusEvent(models.Model):
+    """
+    One status transition of a ticket, appended by ``Ticket.save`` and the
+    bulk operations whenever the status changes and never updated.
+    ``from_status`` is empty for the creation of a ticket and
+    ``status_seconds`` holds the time spent in ``from_status``, so
+    resolution times, reopen rates and time in status are plain aggregates,
+    see ``apps.tickets.metrics``.
+    """
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name='status_events'
+    )
+    from_status = models.CharField(max_length=20, choices=Ticket.Status.choices, blank=True)
+    to_status = models.CharField(max_length=20, choices=Ticket.Status.choices)
+    changed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_at = models.DateTimeField(default=timezone.now)
+    # Unknown for tickets that entered from_status before the history was recorded
+    status_seconds = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['ticket', 'created_at'], name='tickets_event_ticket_idx'),
+            models.Index(fields=['created_at', 'to_status'], name='tickets_event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"Ticket #{self.ticket_id}: {self.from_status or '-'} -> {self.to_status}"
+
+class TicketMetricsRollup(models.Model):
+    """
+    Pre-aggregated ticket metrics for one time bucket and one combination of
+    status, priority, service and technician.
+
+    Creation and first-response measures are bucketed by the ticket's
+    ``created_at``, resolution measures by its ``resolved_at``. Rows are
+    rebuilt from the tickets table by ``apps.tickets.metrics``.
+    """
+    class Granularity(models.TextChoices):
+        HOUR = 'hour', _('Hour')
+        DAY = 'day', _('Day')
+
+    granularity = models.CharField(max_length=4, choices=Granularity.choices)
+    bucket_start = models.DateTimeField()
+    status = models.CharField(max_length=20, choices=Ticket.Status.choices)
+    priority = models.CharField(max_length=20, choices=Ticket.Priority.choices)
+    service = models.ForeignKey(
+        Service,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    technician = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    created_count = models.PositiveIntegerField(default=0)
+    resolved_count = models.PositiveIntegerField(default=0)
+    first_response_count = models.PositiveIntegerField(default=0)
+    first_response_seconds = models.BigIntegerField(default=0)
+    resolution_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['granularity', 'bucket_start']
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start'], name='tickets_rollup_bucket_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_granularity_display()} {self.bucket_start:%Y-%m-%d %H:%M} - {self.status}/{self.priority}"
+
+class TicketMetricsRollupLock(models.Model):
+    """
+    One row per day of rollups, locked while the hourly and daily rows of
+    that day are rebuilt so concurrent rebuilds of a day run one after the
+    other instead of overwriting each other with stale counts.
+    """
+    day = models.DateTimeField(unique=True)
+
+    def __str__(self):
+        return f"{self.day:%Y-%m-%d}"
+
+class TicketSummary(models.Model):
+    """
+    Counts of the tickets a user created, one row per user. Kept current by
+    the ticket signals, see ``apps.tickets.summaries``, so the customer
+    pages read one row instead of counting the tickets table.
+
+    ``open_created_seconds`` is the sum of the creation times (as Unix
+    timestamps) of the open tickets, their average age follows from it and
+    ``open_count`` without visiting them.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ticket_summary'
+    )
+    new_count = models.PositiveIntegerField(default=0)
+    assigned_count = models.PositiveIntegerField(default=0)
+    in_progress_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    resolved_count = models.PositiveIntegerField(default=0)
+    closed_count = models.PositiveIntegerField(default=0)
+    open_created_seconds = models.BigIntegerField(default=0)
+    # The last ticket creation or status change
+    last_activity_at = models.DateTimeField(null=True, blank=True)
+
+    COUNT_FIELDS = {status: f'{status}_count' for status in Ticket.Status.values}
+
+    class Meta:
+        verbose_name_plural = 'ticket summaries'
+
+    def __str__(self):
+        return f"Tickets of {self.user_id}: {self.total_count}"
+
+    def count(self, status):
+        return getattr(self, self.COUNT_FIELDS[status])
+
+    @property
+    def total_count(self):
+        return sum(self.count(status) for status in self.COUNT_FIELDS)
+
+    @property
+    def open_count(self):
+        return sum(self.count(status) for status in Ticket.OPEN_STATUSES)
+
+    @property
+    def done_count(self):
+        """Resolved and closed tickets"""
+        return self.total_count - self.open_count
+
+    def average_open_age(self, now=None):
+        """Average age of the open tickets"""
+        if not self.open_count:
+            return timedelta(0)
+        now = now or timezone.now()
+        return timedelta(seconds=now.timestamp() - self.open_created_seconds / self.open_count)
+
+class ExportJob(models.Model):
+    """
+    A background export of tickets, comments, invoices, payments or refunds,
+    with the fields, scoping and filters of the API ``export`` action for
+    ``requested_by``. ``apps.tickets.tasks.run_export_job`` writes the file
+    chunk by chunk and records after each one the keyset ``cursor`` of its
+    last row with the rows and bytes written, so a job stopped with its
+    worker resumes after the last recorded chunk.
+    """
+    class Export(models.TextChoices):
+        TICKETS = 'tickets', _('Tickets')
+        COMMENTS = 'comments', _('Comments')
+        INVOICES = 'invoices', _('Invoices')
+        PAYMENTS = 'payments', _('Payments')
+        REFUNDS = 'refunds', _('Refunds')
+
+    class Format(models.TextChoices):
+        CSV = 'csv', _('CSV')
+        JSONL = 'jsonl', _('JSON lines')
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        RUNNING = 'running', _('Running')
+        COMPLETED = 'completed', _('Completed')
+        FAILED = 'failed', _('Failed')
+
+    requested_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='export_jobs'
+    )
+    export = models.CharField(max_length=20, choices=Export.choices)
+    export_format = models.CharField(max_length=5, choices=Format.choices, default=Format.CSV)
+    compress = models.BooleanField(default=False)
+    # Filters and ordering as the query string of the API export, e.g. status=paid&ordering=amount
+    query = models.CharField(max_length=2000, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
+    file = models.FileField(upload_to='exports/', blank=True)
+    cursor = models.JSONField(null=True, blank=True)
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_written = models.PositiveIntegerField(default=0)
+    bytes_written = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Set while running and after each chunk, a stale heartbeat means the worker stopped
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['requested_by', 'created_at'], name='tickets_export_user_idx'),
+            models.Index(fields=['status', 'heartbeat_at'], name='tickets_export_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_export_display()} export #{self.id} ({self.get_status_display()})"
+
+    @property
+    def progress(self):
+        """Percentage of the rows written, None until the rows are counted"""
+        if self.status == self.Status.COMPLETED:
+            return 100
+        if self.total_rows is None:
+            return None
+        return min(100, round(self.rows_written * 100 / self.total_rows)) if self.total_rows else 100
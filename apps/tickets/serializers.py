@@ -1,6 +1,11 @@
 from rest_framework import serializers
-from .models import Ticket, TicketComment, TicketAttachment
+from django.utils.translation import gettext_lazy as _
+from .bulk import ASSIGN, CHANGE_STATUS, MAX_BULK_TICKETS, OPERATIONS
+from .models import ExportJob, Ticket, TicketComment, TicketAttachment
+from apps.accounts.models import User
 from apps.accounts.serializers import UserSerializer
+from apps.core.export import export_view
+from apps.core.fieldsets import SparseFieldsetMixin
 
 class TicketAttachmentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,7 +22,7 @@ class TicketCommentSerializer(serializers.ModelSerializer):
                  'content', 'created_at', 'is_internal')
         read_only_fields = ('author',)
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     priority_display = serializers.CharField(source='get_priority_display', read_only=True)
     created_by_details = UserSerializer(source='created_by', read_only=True)
@@ -28,7 +33,33 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = '__all__'
-        read_only_fields = ('created_by', 'created_at', 'updated_at', 'resolved_at')
+        read_only_fields = (
+            'created_by', 'created_at', 'updated_at', 'resolved_at',
+            'first_response_at', 'first_response_by', 'first_staff_response_at',
+            'sla_due_at', 'sla_warn_at', 'sla_breached_at', 'status_changed_at'
+        )
+
+class TicketListSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """
+    Compact ticket representation for list endpoints, nested users, comments
+    and attachments are only included with ``?expand=``.
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    priority_display = serializers.CharField(source='get_priority_display', read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = (
+            'id', 'title', 'status', 'status_display', 'priority', 'priority_display',
+            'category', 'created_by', 'assigned_to', 'due_date', 'created_at', 'updated_at'
+        )
+        read_only_fields = fields
+        expandable_fields = {
+            'created_by_details': (UserSerializer, {'source': 'created_by', 'read_only': True}),
+            'assigned_to_details': (UserSerializer, {'source': 'assigned_to', 'read_only': True}),
+            'comments': (TicketCommentSerializer, {'many': True, 'read_only': True}),
+            'attachments': (TicketAttachmentSerializer, {'many': True, 'read_only': True}),
+        }
 
 class TicketCreateSerializer(serializers.ModelSerializer):
     attachments = serializers.ListField(
@@ -53,4 +84,45 @@ class TicketCreateSerializer(serializers.ModelSerializer):
                 uploaded_by=validated_data['created_by']
             )
         
-        return ticket
\ No newline at end of file
+        return ticket
+
+class TicketBulkActionSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=MAX_BULK_TICKETS
+    )
+    operation = serializers.ChoiceField(choices=OPERATIONS)
+    technician_id = serializers.PrimaryKeyRelatedField(
+        source='technician',
+        queryset=User.objects.filter(role='technician'),
+        required=False
+    )
+    status = serializers.ChoiceField(choices=Ticket.Status.choices, required=False)
+
+    def validate(self, data):
+        if data['operation'] == ASSIGN and not data.get('technician'):
+            raise serializers.ValidationError({'technician_id': _('A technician is required to assign tickets')})
+        if data['operation'] == CHANGE_STATUS and not data.get('status'):
+            raise serializers.ValidationError({'status': _('A status is required to change the status')})
+        return data
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.IntegerField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = ExportJob
+        fields = (
+            'id', 'export', 'export_format', 'compress', 'query', 'status', 'progress',
+            'total_rows', 'rows_written', 'error', 'created_at', 'started_at', 'completed_at'
+        )
+        read_only_fields = (
+            'status', 'total_rows', 'rows_written', 'error', 'created_at', 'started_at', 'completed_at'
+        )
+
+    def validate(self, data):
+        # Filters are checked now rather than failing in the worker
+        view = export_view(data['export'], self.context['request'].user, data.get('query', ''))
+        view.export_queryset()
+        return data
+
@@ -1,8 +1,12 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_save, pre_save, post_delete
 from django.dispatch import receiver
-from django.utils import timezone
-from .models import Ticket, TicketComment, TicketAttachment
-from .tasks import send_ticket_notification
+from .bulk import tickets_bulk_updated
+from django.db import transaction
+from .models import SLAPolicy, Ticket, TicketComment, TicketAttachment
+from .metrics import refresh_ticket_rollups, refresh_rollups_for
+from .summaries import rebuild_summaries, record_ticket_deleted, record_ticket_saved
+from .tasks import reschedule_sla_deadlines, send_ticket_notification
+from apps.core.cache import TICKETS, invalidate_on_commit
 import os
 
 @receiver(post_save, sender=Ticket)
@@ -15,52 +19,68 @@ def ticket_post_save(sender, instance, created, **kwargs):
         # Ticket creation logic
         pass
     else:
-        # Check if status has changed
+        # The tracked values are still the ones from before this save
         update_fields = kwargs.get('update_fields')
-        if update_fields is not None and 'status' in update_fields:
-            old_status = kwargs.get('old_status')
-            if old_status != instance.status:
-                # Status changed, send notifications
-                if instance.assigned_to:
-                    # Notify the assigned technician
-                    try:
-                        send_ticket_notification.delay(
-                            user_id=instance.assigned_to.id,
-                            ticket_id=instance.id,
-                            notification_type='status_update'
-                        )
-                    except:
-                        # Task may fail if Celery is not running
-                        pass
-                
-                # Notify the ticket creator
+        if instance.has_changed('status') and (update_fields is None or 'status' in update_fields):
+            # Status changed, send notifications
+            if instance.assigned_to_id:
+                # Notify the assigned technician
                 try:
                     send_ticket_notification.delay(
-                        user_id=instance.created_by.id,
+                        user_id=instance.assigned_to_id,
                         ticket_id=instance.id,
                         notification_type='status_update'
                     )
                 except:
                     # Task may fail if Celery is not running
                     pass
-                
-                # If resolved, set resolved_at timestamp
-                if instance.status == Ticket.Status.RESOLVED and not instance.resolved_at:
-                    instance.resolved_at = timezone.now()
-                    instance.save(update_fields=['resolved_at'])
+            
+            # Notify the ticket creator
+            try:
+                send_ticket_notification.delay(
+                    user_id=instance.created_by_id,
+                    ticket_id=instance.id,
+                    notification_type='status_update'
+                )
+            except:
+                # Task may fail if Celery is not running
+                pass
 
-@receiver(pre_save, sender=Ticket)
-def ticket_pre_save(sender, instance, **kwargs):
+    # Keep the metrics rollups for the affected hour/day buckets current,
+    # including the bucket of the previous resolution time
+    refresh_ticket_rollups(instance, previous_resolved_at=instance.loaded_value('resolved_at'))
+    record_ticket_saved(instance, created, kwargs.get('update_fields'))
+    invalidate_on_commit(TICKETS)
+
+@receiver(post_delete, sender=Ticket)
+def ticket_post_delete(sender, instance, **kwargs):
     """
-    Handle pre-save operations for tickets
+    Remove a deleted ticket from the metrics rollups and its creator's summary
     """
-    # Store the old status if this is an existing ticket
-    if instance.pk:
-        try:
-            old_instance = Ticket.objects.get(pk=instance.pk)
-            kwargs['old_status'] = old_instance.status
-        except Ticket.DoesNotExist:
-            pass
+    refresh_ticket_rollups(instance)
+    record_ticket_deleted(instance)
+    invalidate_on_commit(TICKETS)
+
+@receiver(tickets_bulk_updated, sender=Ticket)
+def tickets_bulk_post_update(sender, tickets, updated_at, **kwargs):
+    """
+    Refresh the metrics rollups, summaries and caches once for a bulk ticket update
+    """
+    moments = [updated_at]
+    for ticket in tickets:
+        moments.extend((ticket['created_at'], ticket['resolved_at']))
+    refresh_rollups_for(*moments)
+    rebuild_summaries({ticket['created_by_id'] for ticket in tickets})
+    invalidate_on_commit(TICKETS)
+
+@receiver(post_save, sender=SLAPolicy)
+@receiver(post_delete, sender=SLAPolicy)
+def sla_policy_changed(sender, instance, **kwargs):
+    """
+    Reschedule the open tickets a changed policy covers, all services of its
+    priority for a general policy
+    """
+    transaction.on_commit(lambda: reschedule_sla_deadlines.delay(instance.priority, instance.service_id))
 
 @receiver(post_save, sender=TicketComment)
 def ticket_comment_post_save(sender, instance, created, **kwargs):
@@ -68,6 +88,11 @@ def ticket_comment_post_save(sender, instance, created, **kwargs):
     Handle post-save operations for ticket comments
     """
     if created:
+        # Only the first response changes the ticket's first-response metrics
+        if instance.record_first_response():
+            refresh_rollups_for(instance.ticket.created_at)
+        invalidate_on_commit(TICKETS)
+
         # New comment created, send notifications
         
         # Skip notification for internal comments if the author is the one who created the ticket
@@ -0,0 +1,96 @@
+"""
+Ticket SLA deadlines.
+
+Tickets store when their SLA is due (``sla_due_at``) and when they become at
+risk (``sla_warn_at``), computed from the matching ``SLAPolicy`` when they
+are created and whenever their priority or service changes. Dashboards and
+the breach sweep then read indexed ranges instead of recomputing every open
+ticket's age::
+
+    at_risk(tickets)   # open tickets past their warning time
+    breached(tickets)  # open tickets past their deadline
+
+Breaches are notified once by ``check_sla_breaches``, which records them in
+``sla_breached_at``. Changing a policy reschedules the open tickets it
+covers through ``reschedule_sla_deadlines``.
+"""
+from django.utils import timezone
+
+from .models import SLAPolicy, Ticket
+
+RESCHEDULE_BATCH_SIZE = 500
+
+
+def open_tickets(queryset=None):
+    queryset = Ticket.objects.all() if queryset is None else queryset
+    return queryset.filter(status__in=Ticket.OPEN_STATUSES)
+
+
+def at_risk(queryset=None, now=None):
+    """Open tickets past their SLA warning time, breached ones included"""
+    return open_tickets(queryset).filter(sla_warn_at__lte=now or timezone.now())
+
+
+def breached(queryset=None, now=None):
+    """Open tickets past their SLA deadline"""
+    return open_tickets(queryset).filter(sla_due_at__lte=now or timezone.now())
+
+
+def sla_alerts(queryset, now=None):
+    """Return the dashboard alerts for the at-risk tickets of ``queryset``, breaches first"""
+    now = now or timezone.now()
+    alerts = []
+    for ticket in at_risk(queryset, now).order_by('sla_due_at').only('id', 'title', 'created_at', 'sla_due_at'):
+        hours_open = int((now - ticket.created_at).total_seconds() // 3600)
+        sla_hours = int((ticket.sla_due_at - ticket.created_at).total_seconds() // 3600)
+        is_breached = ticket.sla_due_at <= now
+        alerts.append({
+            'ticket_id': ticket.id,
+            'title': ticket.title,
+            'severity': 'high' if is_breached else 'medium',
+            'message': (
+                f"SLA {'breached' if is_breached else 'at risk'}: Ticket has been open for "
+                f"{hours_open} hours (SLA: {sla_hours} hours)"
+            ),
+        })
+    alerts.sort(key=lambda alert: 0 if alert['severity'] == 'high' else 1)
+    return alerts
+
+
+def reschedule(priority=None, service_id=None, batch_size=RESCHEDULE_BATCH_SIZE):
+    """
+    Recompute the SLA deadlines of the open tickets a policy for ``priority``
+    and ``service_id`` covers (all open tickets without arguments). Returns
+    the number of rescheduled tickets.
+    """
+    tickets = open_tickets()
+    if priority is not None:
+        tickets = tickets.filter(priority=priority)
+    if service_id is not None:
+        tickets = tickets.filter(service_id=service_id)
+
+    rescheduled = 0
+    last_id = 0
+    targets = {}
+    while True:
+        batch = list(
+            tickets.filter(id__gt=last_id).order_by('id')
+            .only('id', 'created_at', 'priority', 'service_id', *Ticket.SLA_FIELDS)[:batch_size]
+        )
+        if not batch:
+            return rescheduled
+        changed = []
+        for ticket in batch:
+            previous = tuple(getattr(ticket, name) for name in Ticket.SLA_FIELDS)
+            key = (ticket.priority, ticket.service_id)
+            if key not in targets:
+                targets[key] = SLAPolicy.targets_for(*key)
+            ticket.schedule_sla(targets[key])
+            if ticket.sla_due_at == previous[0]:
+                # An unchanged deadline keeps its recorded breach
+                ticket.sla_breached_at = previous[2]
+            if tuple(getattr(ticket, name) for name in Ticket.SLA_FIELDS) != previous:
+                changed.append(ticket)
+        Ticket.objects.bulk_update(changed, Ticket.SLA_FIELDS)
+        rescheduled += len(changed)
+        last_id = batch[-1].id
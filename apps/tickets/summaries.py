@@ -0,0 +1,151 @@
+"""
+Per-user ticket summaries.
+
+``TicketSummary`` holds the status counts of the tickets a user created. The
+ticket signals move one ticket between counters with a single UPDATE when it
+is created, changes status or owner, or is deleted, bulk operations and
+imports rebuild the summaries of the users they touched from the tickets
+table. ``rebuild_ticket_summaries`` recomputes them all and reports the ones
+that drifted.
+"""
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Count, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Ticket, TicketSummary
+
+COUNT_FIELDS = TicketSummary.COUNT_FIELDS
+# The fields the signals maintain, last_activity_at is not moved back when tickets go
+CHECKED_FIELDS = (*COUNT_FIELDS.values(), 'open_created_seconds')
+SUMMARY_FIELDS = (*CHECKED_FIELDS, 'last_activity_at')
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def _timestamp(moment):
+    return int(moment.timestamp())
+
+
+def _ticket_deltas(status, created_at, sign):
+    # What one ticket adds to (sign 1) or removes from (sign -1) its owner's summary
+    deltas = {}
+    if status in COUNT_FIELDS:
+        deltas[COUNT_FIELDS[status]] = sign
+    if status in Ticket.OPEN_STATUSES:
+        deltas['open_created_seconds'] = sign * _timestamp(created_at)
+    return deltas
+
+
+def _apply(user_id, deltas, activity_at=None, create_missing=True):
+    values = {field: F(field) + value for field, value in deltas.items() if value}
+    if activity_at is not None:
+        values['last_activity_at'] = Coalesce(Greatest('last_activity_at', Value(activity_at)), Value(activity_at))
+    if not values:
+        return
+    if not TicketSummary.objects.filter(user_id=user_id).update(**values) and create_missing:
+        # Users whose summary was never built, the tickets table already has this change
+        rebuild_summaries([user_id])
+
+
+def record_ticket_saved(ticket, created, update_fields=None):
+    """Move a saved ticket between the summary counters, from ``post_save``"""
+    activity_at = ticket.status_changed_at or ticket.created_at
+    if created:
+        _apply(ticket.created_by_id, _ticket_deltas(ticket.status, ticket.created_at, 1), activity_at)
+        return
+
+    # The tracked values are still the ones from before this save
+    previous = (ticket.loaded_value('created_by_id', ticket.created_by_id), ticket.loaded_value('status', ticket.status))
+    current = (
+        ticket.created_by_id if update_fields is None or {'created_by', 'created_by_id'} & set(update_fields)
+        else previous[0],
+        ticket.status if update_fields is None or 'status' in update_fields else previous[1],
+    )
+    if current == previous:
+        return
+    changes = defaultdict(lambda: defaultdict(int))
+    for (user_id, status), sign in ((previous, -1), (current, 1)):
+        for field, value in _ticket_deltas(status, ticket.created_at, sign).items():
+            changes[user_id][field] += value
+    for user_id, deltas in changes.items():
+        _apply(user_id, deltas, activity_at if user_id == current[0] else None)
+
+
+def record_ticket_deleted(ticket):
+    """Remove a deleted ticket from its owner's summary, from ``post_delete``"""
+    # The summary may be going with a deleted user, don't build it again
+    _apply(ticket.created_by_id, _ticket_deltas(ticket.status, ticket.created_at, -1), create_missing=False)
+
+
+def compute_summaries(user_ids=None):
+    """
+    Count the tickets of ``user_ids`` (by default every user with tickets or
+    a summary) and return ``{user id: unsaved TicketSummary}``
+    """
+    tickets = Ticket.objects.order_by()
+    if user_ids is None:
+        summaries = {
+            user_id: TicketSummary(user_id=user_id)
+            for user_id in TicketSummary.objects.values_list('user_id', flat=True)
+        }
+    else:
+        user_ids = set(user_ids)
+        tickets = tickets.filter(created_by_id__in=user_ids)
+        summaries = {user_id: TicketSummary(user_id=user_id) for user_id in user_ids}
+
+    counts = tickets.values('created_by_id', 'status').annotate(
+        count=Count('id'), created=Max('created_at'), changed=Max('status_changed_at')
+    )
+    for row in counts:
+        summary = summaries.setdefault(row['created_by_id'], TicketSummary(user_id=row['created_by_id']))
+        if row['status'] in COUNT_FIELDS:
+            setattr(summary, COUNT_FIELDS[row['status']], row['count'])
+        summary.last_activity_at = max(
+            moment for moment in (row['created'], row['changed'], summary.last_activity_at) if moment
+        )
+    open_tickets = tickets.filter(status__in=Ticket.OPEN_STATUSES).values_list('created_by_id', 'created_at')
+    for user_id, created_at in open_tickets.iterator(chunk_size=REBUILD_BATCH_SIZE):
+        summaries[user_id].open_created_seconds += _timestamp(created_at)
+    return summaries
+
+
+def save_summaries(summaries):
+    """Insert or overwrite ``summaries``"""
+    TicketSummary.objects.bulk_create(
+        summaries,
+        batch_size=REBUILD_BATCH_SIZE,
+        update_conflicts=True,
+        # MySQL upserts on any unique key and refuses a target
+        unique_fields=['user'] if connection.features.supports_update_conflicts_with_target else None,
+        update_fields=SUMMARY_FIELDS
+    )
+
+
+def rebuild_summaries(user_ids=None):
+    """Recompute and save the summaries of ``user_ids``, of every user by default"""
+    summaries = list(compute_summaries(user_ids).values())
+    save_summaries(summaries)
+    return summaries
+
+
+def summary_for(user):
+    """The ticket summary of ``user``, built on first use"""
+    try:
+        return user.ticket_summary
+    except TicketSummary.DoesNotExist:
+        summary, = rebuild_summaries([user.pk])
+        user.ticket_summary = summary
+        return summary
+
+
+def stale_summaries(computed):
+    """The user ids whose saved summary differs from ``computed`` or is missing"""
+    saved = TicketSummary.objects.in_bulk(list(computed))
+    return [
+        user_id for user_id, summary in computed.items()
+        if user_id not in saved or any(
+            getattr(saved[user_id], field) != getattr(summary, field) for field in CHECKED_FIELDS
+        )
+    ]
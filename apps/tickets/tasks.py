@@ -1,11 +1,162 @@
 from celery import shared_task
-from django.core.mail import send_mail
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
 from django.utils import timezone
-from datetime import timedelta
-from .models import Ticket
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import islice
+import gzip
+import logging
+import os
+import time
+import uuid
+from .models import ExportJob, Ticket
 from apps.accounts.models import User
+from apps.core import timeseries
+from apps.core.export import encode_rows, export_view, keyset_chunks
+from . import sla
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_TEMPLATES = {
+    'assigned': 'tickets/email/ticket_assigned.html',
+    'status_update': 'tickets/email/status_update.html',
+    'new_comment': 'tickets/email/new_comment.html',
+    'overdue': 'tickets/email/ticket_overdue.html',
+    'reminder': 'tickets/email/ticket_reminder.html',
+    'sla_breach': 'tickets/email/sla_breached.html'
+}
+
+# Section headings of the digest email, in display order
+DIGEST_SECTIONS = {
+    'sla_breach': 'SLA breaches',
+    'overdue': 'Overdue tickets',
+    'assigned': 'Newly assigned to you',
+    'reminder': 'Tickets needing attention',
+    'status_update': 'Status updates',
+    'new_comment': 'New comments',
+}
+DIGEST_TEMPLATE = 'tickets/email/notification_digest.html'
+
+# Tickets claimed and notified per transaction by the periodic sweeps
+SWEEP_CHUNK_SIZE = 500
+
+# Rows written per chunk of an export job, and the time without a chunk after which its worker counts as stopped
+EXPORT_JOB_CHUNK_SIZE = 5000
+EXPORT_JOB_STALE_AFTER = timedelta(minutes=10)
+
+def notification_subject(ticket, notification_type):
+    subjects = {
+        'assigned': 'New Ticket Assigned',
+        'status_update': f'Ticket #{ticket.id} Status Update',
+        'new_comment': f'New Comment on Ticket #{ticket.id}',
+        'overdue': f'Ticket #{ticket.id} is Overdue',
+        'reminder': f'Reminder: Ticket #{ticket.id} Needs Attention',
+        'sla_breach': f'Ticket #{ticket.id} has Breached its SLA'
+    }
+    return subjects.get(notification_type)
+
+def build_ticket_notification(user, ticket, notification_type):
+    """
+    Return the notification email for ``user`` about ``ticket``, or None for
+    an unknown notification type.
+    """
+    template = NOTIFICATION_TEMPLATES.get(notification_type)
+    subject = notification_subject(ticket, notification_type)
+    if not template or not subject:
+        return None
+    
+    html_message = render_to_string(template, {
+        'user': user,
+        'ticket': ticket
+    })
+    message = EmailMultiAlternatives(
+        subject,
+        '',
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email]
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+def group_notifications(notifications):
+    """
+    Group ``[user_id, ticket_id, notification_type]`` notifications into
+    ``{user_id: [(ticket_id, notification_type), ...]}``, dropping duplicates.
+    """
+    digests = {}
+    for user_id, ticket_id, notification_type in notifications:
+        items = digests.setdefault(user_id, [])
+        if (ticket_id, notification_type) not in items:
+            items.append((ticket_id, notification_type))
+    return digests
+
+def build_notification_digest(user, items):
+    """
+    Return one email for all of a recipient's ``(ticket, notification_type)``
+    items. A single item is sent as the regular notification.
+    """
+    if len(items) == 1:
+        return build_ticket_notification(user, *items[0])
+    
+    sections = [
+        {
+            'title': title,
+            'tickets': [ticket for ticket, item_type in items if item_type == notification_type]
+        }
+        for notification_type, title in DIGEST_SECTIONS.items()
+    ]
+    html_message = render_to_string(DIGEST_TEMPLATE, {
+        'user': user,
+        'sections': [section for section in sections if section['tickets']],
+        'count': len(items)
+    })
+    message = EmailMultiAlternatives(
+        f'{len(items)} ticket updates',
+        '',
+        settings.DEFAULT_FROM_EMAIL,
+        [user.email]
+    )
+    message.attach_alternative(html_message, 'text/html')
+    return message
+
+def deliver_notifications(notifications):
+    """
+    Send ``[user_id, ticket_id, notification_type]`` notifications as one
+    digest per recipient. Users and tickets are loaded in two queries, each
+    digest is rendered once and all of them go over one mail connection.
+    Returns the run metrics.
+    """
+    started = time.monotonic()
+    digests = group_notifications(notifications)
+    users = User.objects.in_bulk(list(digests))
+    tickets = Ticket.objects.select_related('created_by', 'assigned_to').in_bulk(
+        {ticket_id for items in digests.values() for ticket_id, _ in items}
+    )
+    
+    messages = []
+    for user_id, items in digests.items():
+        user = users.get(user_id)
+        items = [
+            (tickets[ticket_id], notification_type) for ticket_id, notification_type in items
+            if ticket_id in tickets and notification_type in NOTIFICATION_TEMPLATES
+        ]
+        if user is not None and user.email and items:
+            messages.append(build_notification_digest(user, items))
+    
+    sent = get_connection(fail_silently=False).send_messages(messages) if messages else 0
+    metrics = {
+        'notifications': len(notifications),
+        'recipients': len(messages),
+        'messages': sent or 0,
+        'seconds': round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Delivered ticket notifications: {metrics}")
+    return metrics
 
 @shared_task
 def send_ticket_notification(user_id, ticket_id, notification_type):
@@ -16,47 +167,63 @@ def send_ticket_notification(user_id, ticket_id, notification_type):
         user = User.objects.get(id=user_id)
         ticket = Ticket.objects.get(id=ticket_id)
         
-        templates = {
-            'assigned': 'tickets/email/ticket_assigned.html',
-            'status_update': 'tickets/email/status_update.html',
-            'new_comment': 'tickets/email/new_comment.html',
-            'overdue': 'tickets/email/ticket_overdue.html',
-            'reminder': 'tickets/email/ticket_reminder.html'
-        }
-        
-        subjects = {
-            'assigned': 'New Ticket Assigned',
-            'status_update': f'Ticket #{ticket.id} Status Update',
-            'new_comment': f'New Comment on Ticket #{ticket.id}',
-            'overdue': f'Ticket #{ticket.id} is Overdue',
-            'reminder': f'Reminder: Ticket #{ticket.id} Needs Attention'
-        }
-        
-        template = templates.get(notification_type)
-        subject = subjects.get(notification_type)
-        
-        if not template or not subject:
+        message = build_ticket_notification(user, ticket, notification_type)
+        if message is None:
             return f'Invalid notification type: {notification_type}'
-            
-        html_message = render_to_string(template, {
-            'user': user,
-            'ticket': ticket
-        })
         
-        send_mail(
-            subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email],
-            html_message=html_message,
-            fail_silently=False,
-        )
+        message.send(fail_silently=False)
         return f'Notification sent to {user.email}'
     except (User.DoesNotExist, Ticket.DoesNotExist) as e:
         return f'Error: {str(e)}'
     except Exception as e:
         return f'Failed to send notification: {str(e)}'
 
+def claimed_chunks(queryset, flag, chunk_size=SWEEP_CHUNK_SIZE, claimed=True, unclaimed=False):
+    """
+    Yield the ``(id, assigned_to_id)`` rows of ``queryset`` in chunks, each
+    claimed by setting ``flag`` from ``unclaimed`` to ``claimed`` in its own
+    short transaction. Rows locked by a concurrent sweep are skipped and rows
+    it has claimed no longer match, so no ticket is handed out twice.
+    """
+    ids = queryset.filter(**{flag: unclaimed}).values_list('id', flat=True).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(ids, chunk_size)):
+        with transaction.atomic():
+            rows = list(Ticket.objects.select_for_update(skip_locked=True).filter(
+                id__in=chunk, **{flag: unclaimed}
+            ).values_list('id', 'assigned_to_id'))
+            Ticket.objects.filter(id__in=[ticket_id for ticket_id, _ in rows]).update(**{flag: claimed})
+        if rows:
+            yield rows
+
+def sweep_tickets(queryset, flag, notifications_for, chunk_size=SWEEP_CHUNK_SIZE, claimed=True, unclaimed=False):
+    """
+    Claim the tickets of ``queryset`` chunk by chunk through ``flag`` and
+    deliver ``notifications_for(rows)`` for each chunk. The flag is set with
+    one UPDATE per chunk, without saving the tickets. Returns the run metrics.
+    """
+    started = time.monotonic()
+    totals = {'tickets': 0, 'notifications': 0, 'recipients': 0, 'messages': 0}
+    for rows in claimed_chunks(queryset, flag, chunk_size, claimed, unclaimed):
+        try:
+            metrics = deliver_notifications(notifications_for(rows))
+        except Exception:
+            # Release the claim so the next sweep retries these tickets
+            Ticket.objects.filter(id__in=[ticket_id for ticket_id, _ in rows]).update(**{flag: unclaimed})
+            raise
+        totals['tickets'] += len(rows)
+        for key in ('notifications', 'recipients', 'messages'):
+            totals[key] += metrics[key]
+    totals['seconds'] = round(time.monotonic() - started, 3)
+    return totals
+
+@shared_task
+def send_ticket_notifications(notifications):
+    """
+    Send a batch of ``[user_id, ticket_id, notification_type]`` notifications
+    as per-recipient digests, returns the run metrics.
+    """
+    return deliver_notifications(notifications)
+
 @shared_task
 def check_overdue_tickets():
     """
@@ -64,33 +231,21 @@ def check_overdue_tickets():
     This task runs daily.
     """
     overdue_tickets = Ticket.objects.filter(
-        status__in=['open', 'in_progress'],
-        due_date__lt=timezone.now(),
-        overdue_notification_sent=False
+        status__in=Ticket.OPEN_STATUSES,
+        due_date__lt=timezone.now()
     )
+    admin_ids = list(User.objects.filter(role=User.Roles.ADMIN).values_list('id', flat=True))
     
-    for ticket in overdue_tickets:
-        # Notify assigned technician
-        if ticket.assigned_to:
-            send_ticket_notification.delay(
-                ticket.assigned_to.id,
-                ticket.id,
-                'overdue'
-            )
-        
-        # Notify admin
-        admins = User.objects.filter(role=User.Roles.ADMIN)
-        for admin in admins:
-            send_ticket_notification.delay(
-                admin.id,
-                ticket.id,
-                'overdue'
-            )
-        
-        ticket.overdue_notification_sent = True
-        ticket.save()
+    def notifications_for(rows):
+        # Notify the assigned technician and every admin
+        notifications = []
+        for ticket_id, assigned_to_id in rows:
+            if assigned_to_id:
+                notifications.append([assigned_to_id, ticket_id, 'overdue'])
+            notifications.extend([admin_id, ticket_id, 'overdue'] for admin_id in admin_ids)
+        return notifications
     
-    return f'Processed {len(overdue_tickets)} overdue tickets'
+    return sweep_tickets(overdue_tickets, 'overdue_notification_sent', notifications_for)
 
 @shared_task
 def send_ticket_reminders():
@@ -100,24 +255,46 @@ def send_ticket_reminders():
     """
     two_days_ago = timezone.now() - timedelta(days=2)
     stale_tickets = Ticket.objects.filter(
-        status__in=['open', 'in_progress'],
-        last_updated__lt=two_days_ago,
-        reminder_sent=False
+        status__in=Ticket.OPEN_STATUSES,
+        last_updated__lt=two_days_ago
     )
     
-    for ticket in stale_tickets:
-        # Notify assigned technician
-        if ticket.assigned_to:
-            send_ticket_notification.delay(
-                ticket.assigned_to.id,
-                ticket.id,
-                'reminder'
-            )
-        
-        ticket.reminder_sent = True
-        ticket.save()
+    # Notify the assigned technicians, one digest each. The flag is set with
+    # update(), saving the tickets would reset last_updated
+    return sweep_tickets(stale_tickets, 'reminder_sent', lambda rows: [
+        [assigned_to_id, ticket_id, 'reminder']
+        for ticket_id, assigned_to_id in rows if assigned_to_id
+    ])
+
+@shared_task
+def check_sla_breaches():
+    """
+    Notify the assigned technicians and the admins of SLA breaches, once per
+    breach. This task runs every five minutes.
+    """
+    now = timezone.now()
+    admin_ids = list(User.objects.filter(role=User.Roles.ADMIN).values_list('id', flat=True))
+    
+    def notifications_for(rows):
+        notifications = []
+        for ticket_id, assigned_to_id in rows:
+            if assigned_to_id:
+                notifications.append([assigned_to_id, ticket_id, 'sla_breach'])
+            notifications.extend([admin_id, ticket_id, 'sla_breach'] for admin_id in admin_ids)
+        return notifications
     
-    return f'Sent reminders for {len(stale_tickets)} tickets'
+    # Claiming records the breach time, tickets_sla_pending_idx covers unbreached deadlines
+    return sweep_tickets(
+        sla.breached(now=now), 'sla_breached_at', notifications_for, claimed=now, unclaimed=None
+    )
+
+@shared_task
+def reschedule_sla_deadlines(priority=None, service_id=None):
+    """
+    Recompute the SLA deadlines of the open tickets covered by a changed
+    policy.
+    """
+    return f'Rescheduled {sla.reschedule(priority, service_id)} tickets'
 
 @shared_task
 def send_weekly_ticket_summary():
@@ -126,34 +303,170 @@ def send_weekly_ticket_summary():
     This task runs every Monday at 9:00 AM.
     """
     week_ago = timezone.now() - timedelta(days=7)
-    new_tickets = Ticket.objects.filter(created_at__gte=week_ago).count()
+    # Per-day breakdown of the last 7 days in one grouped query
+    daily_created = timeseries.bucketed_counts(
+        Ticket.objects.all(), 'created_at', week_ago.date() + timedelta(days=1), timezone.now()
+    )
+    new_tickets = sum(count for _, count in daily_created)
     closed_tickets = Ticket.objects.filter(
         status='closed',
         updated_at__gte=week_ago
     ).count()
     overdue_tickets = Ticket.objects.filter(
-        status__in=['open', 'in_progress'],
+        status__in=Ticket.OPEN_STATUSES,
         due_date__lt=timezone.now()
     ).count()
     
     context = {
         'period': 'weekly',
         'new_tickets': new_tickets,
+        'daily_created': [
+            {'label': timeseries.bucket_label(day, timeseries.DAY), 'count': count}
+            for day, count in daily_created
+        ],
         'closed_tickets': closed_tickets,
         'overdue_tickets': overdue_tickets
     }
     
-    html_message = render_to_string('tickets/email/ticket_summary.html', context)
-    
+    messages = []
     admins = User.objects.filter(role=User.Roles.ADMIN)
     for admin in admins:
-        send_mail(
+        # The template greets the recipient, so render it per admin
+        html_message = render_to_string('tickets/email/ticket_summary.html', {**context, 'user': admin})
+        message = EmailMultiAlternatives(
             'Weekly Ticket Summary',
             '',
             settings.DEFAULT_FROM_EMAIL,
-            [admin.email],
-            html_message=html_message,
-            fail_silently=False,
+            [admin.email]
         )
+        message.attach_alternative(html_message, 'text/html')
+        messages.append(message)
+    
+    # One connection for all admins
+    if messages:
+        get_connection(fail_silently=False).send_messages(messages)
     
-    return f'Sent weekly summary to {admins.count()} admins'
+    return f'Sent weekly summary to {len(messages)} admins'
+
+def claim_export_job(job_id):
+    """
+    Mark an export job as running in this worker. False when it is finished
+    or another worker has written a chunk of it recently.
+    """
+    now = timezone.now()
+    return ExportJob.objects.filter(
+        Q(status=ExportJob.Status.PENDING)
+        | Q(status=ExportJob.Status.RUNNING, heartbeat_at__isnull=True)
+        | Q(status=ExportJob.Status.RUNNING, heartbeat_at__lt=now - EXPORT_JOB_STALE_AFTER),
+        id=job_id
+    ).update(status=ExportJob.Status.RUNNING, heartbeat_at=now) == 1
+
+def cursor_value(value):
+    # Kept at full precision, DjangoJSONEncoder drops the microseconds the keyset needs
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def write_export_job(job, chunk_size=None):
+    """
+    Append the rows after ``job.cursor`` to the job's file, saving the
+    progress after each chunk. Bytes written after the last saved chunk by a
+    stopped worker are truncated first. Compressed chunks are separate gzip
+    members, which concatenated still form one valid gzip file.
+    """
+    chunk_size = chunk_size or EXPORT_JOB_CHUNK_SIZE
+    view = export_view(job.export, job.requested_by, job.query)
+    queryset, ordering = view.export_queryset()
+    fields = view.export_fields
+    if job.total_rows is None:
+        job.total_rows = queryset.count()
+    if not job.file:
+        suffix = '.gz' if job.compress else ''
+        # Unguessable, the media directory may be served publicly
+        job.file.name = f'exports/{uuid.uuid4().hex}/{job.export}-{job.id}.{job.export_format}{suffix}'
+    if job.started_at is None:
+        job.started_at = timezone.now()
+    job.save(update_fields=['total_rows', 'file', 'started_at'])
+
+    path = job.file.path
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'r+b' if os.path.exists(path) else 'w+b') as file:
+        file.truncate(job.bytes_written)
+        file.seek(job.bytes_written)
+
+        def write(text):
+            data = text.encode()
+            if job.compress:
+                data = gzip.compress(data)
+            file.write(data)
+            return len(data)
+
+        if job.bytes_written == 0 and job.export_format == ExportJob.Format.CSV:
+            job.bytes_written = write(encode_rows([fields], fields, job.export_format))
+        for rows, position in keyset_chunks(queryset, fields, ordering, chunk_size, job.cursor):
+            job.bytes_written += write(encode_rows(rows, fields, job.export_format))
+            file.flush()
+            os.fsync(file.fileno())
+            job.rows_written += len(rows)
+            job.cursor = [cursor_value(value) for value in position]
+            job.heartbeat_at = timezone.now()
+            job.save(update_fields=['bytes_written', 'rows_written', 'cursor', 'heartbeat_at'])
+
+    job.status = ExportJob.Status.COMPLETED
+    job.completed_at = timezone.now()
+    job.heartbeat_at = None
+    job.save(update_fields=['bytes_written', 'status', 'completed_at', 'heartbeat_at'])
+
+def notify_export_job(job):
+    """Email the requester of a finished or failed export job"""
+    user = job.requested_by
+    html_message = render_to_string('tickets/email/export_ready.html', {
+        'user': user,
+        'job': job,
+        'download_url': settings.SITE_URL + reverse('tickets:export-job-download', args=[job.id])
+    })
+    subject = f'Export #{job.id} is Ready' if job.status == ExportJob.Status.COMPLETED else f'Export #{job.id} Failed'
+    message = EmailMultiAlternatives(subject, '', settings.DEFAULT_FROM_EMAIL, [user.email])
+    message.attach_alternative(html_message, 'text/html')
+    message.send(fail_silently=False)
+
+@shared_task(acks_late=True)
+def run_export_job(job_id):
+    """
+    Write the file of an export job, resuming after its last saved chunk,
+    and email the requester when it is done.
+    """
+    if not claim_export_job(job_id):
+        return f'Export job {job_id} is finished or running in another worker'
+    job = ExportJob.objects.select_related('requested_by').get(id=job_id)
+    try:
+        write_export_job(job)
+    except Exception as e:
+        logger.exception(f"Export job {job_id} failed")
+        job.status = ExportJob.Status.FAILED
+        job.error = str(e)
+        job.heartbeat_at = None
+        job.save(update_fields=['status', 'error', 'heartbeat_at'])
+
+    try:
+        notify_export_job(job)
+    except Exception as e:
+        logger.error(f"Error notifying the requester of export job {job_id}: {str(e)}")
+    return f'Export job {job_id} {job.status}: {job.rows_written} rows'
+
+@shared_task
+def resume_export_jobs():
+    """
+    Queue again the export jobs whose worker stopped: pending ones never
+    started and running ones without a chunk written for a while.
+    """
+    stale = timezone.now() - EXPORT_JOB_STALE_AFTER
+    job_ids = list(ExportJob.objects.filter(
+        Q(status=ExportJob.Status.PENDING, created_at__lt=stale)
+        | Q(status=ExportJob.Status.RUNNING, heartbeat_at__lt=stale)
+    ).values_list('id', flat=True))
+    for job_id in job_ids:
+        run_export_job.delay(job_id)
+    return f'Resumed {len(job_ids)} export jobs'
@@ -1,12 +1,34 @@
+from django.db.models import Q
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from .models import Ticket, TicketComment, TicketAttachment
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils import timezone
+from datetime import timedelta
+from unittest import mock
+from .models import (
+    ExportJob, SLAPolicy, Ticket, TicketComment, TicketAttachment, TicketMetricsRollup, TicketMetricsRollupLock,
+    TicketStatusEvent, TicketSummary
+)
+from . import metrics, sla, tasks
+from .metrics import (
+    rollup_totals, daily_rollup_counts, status_counts, team_metrics, truncate_day,
+    reopen_rate, resolution_hours, time_in_status
+)
+from .summaries import compute_summaries, stale_summaries
+from apps.core.query_plans import full_scans
 from apps.accounts.models import User
+from apps.services.models import Service
 import tempfile
 from PIL import Image
+import gzip
 import io
+import json
 
 class TicketModelTest(TestCase):
     """Tests for the Ticket model"""
@@ -93,6 +115,59 @@ class TicketCommentTest(TestCase):
         self.assertEqual(self.comment.content, 'Test Comment')
         self.assertFalse(self.comment.is_internal)
 
+    def test_first_response_recorded(self):
+        """Test only the first comment by someone other than the creator is recorded as the response"""
+        self.ticket.refresh_from_db()
+        self.assertIsNone(self.ticket.first_response_at)
+        
+        technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        response = TicketComment.objects.create(
+            ticket=self.ticket,
+            author=technician,
+            content='First response'
+        )
+        TicketComment.objects.create(
+            ticket=self.ticket,
+            author=technician,
+            content='Second response'
+        )
+        
+        # A stale instance must not clear the recorded response
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        Ticket.objects.filter(pk=self.ticket.pk).update(first_response_at=None)
+        TicketComment.objects.filter(pk=response.pk).get().record_first_response()
+        stale.title = 'Renamed'
+        stale.save()
+        
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.first_response_at, response.created_at)
+        self.assertEqual(self.ticket.first_response_by, technician)
+        self.assertEqual(self.ticket.first_staff_response_at, response.created_at)
+        self.assertEqual(self.ticket.title, 'Renamed')
+    
+    def test_backfill_first_response(self):
+        """Test the backfill command fills the first response fields from existing comments"""
+        admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='admin'
+        )
+        response = TicketComment.objects.create(ticket=self.ticket, author=admin, content='Reply')
+        Ticket.objects.update(first_response_at=None, first_response_by=None, first_staff_response_at=None)
+        
+        call_command('backfill_first_response', batch_size=1, stdout=io.StringIO())
+        
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.first_response_at, response.created_at)
+        self.assertEqual(self.ticket.first_response_by, admin)
+        self.assertEqual(self.ticket.first_staff_response_at, response.created_at)
+
 class TicketAPITest(TestCase):
     """Tests for the Ticket API"""
     
@@ -220,3 +295,907 @@ class TicketAPITest(TestCase):
         self.assertEqual(comment.ticket, self.ticket1)
         self.assertEqual(comment.content, 'Test Comment')
         self.assertFalse(comment.is_internal)
+
+
+class TicketMetricsRollupTest(TestCase):
+    """Tests for the ticket metrics rollups"""
+    
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.ticket = Ticket.objects.create(
+            title='Rollup Ticket',
+            description='Rollup Ticket Description',
+            created_by=self.customer,
+            assigned_to=self.technician,
+            priority=Ticket.Priority.HIGH
+        )
+    
+    def test_ticket_creation_updates_rollups(self):
+        """Test that creating a ticket is reflected in the hourly and daily rollups"""
+        for granularity in TicketMetricsRollup.Granularity.values:
+            totals = rollup_totals(start=self.ticket.created_at.date(), granularity=granularity)
+            self.assertEqual(totals['created_count'], 1)
+        self.assertEqual(status_counts(), {'new': 1})
+    
+    def test_rebuilds_count_after_taking_the_day_lock(self):
+        """Test a rebuild counts the tickets saved while it waited for the day's lock"""
+        lock_rollup_days = metrics.lock_rollup_days
+        
+        def lock_while_another_save_commits(start, end):
+            # Saved through the queryset, its own rebuild doesn't run
+            if not Ticket.objects.filter(title='Concurrent').exists():
+                Ticket.objects.bulk_create([Ticket(
+                    title='Concurrent', description='Concurrent', created_by=self.customer,
+                    created_at=self.ticket.created_at
+                )])
+            lock_rollup_days(start, end)
+        
+        with mock.patch.object(metrics, 'lock_rollup_days', side_effect=lock_while_another_save_commits):
+            metrics.refresh_ticket_rollups(self.ticket)
+        for granularity in TicketMetricsRollup.Granularity.values:
+            totals = rollup_totals(start=self.ticket.created_at.date(), granularity=granularity)
+            self.assertEqual(totals['created_count'], 2)
+        self.assertEqual(
+            list(TicketMetricsRollupLock.objects.values_list('day', flat=True)), [truncate_day(self.ticket.created_at)]
+        )
+    
+    def test_comment_and_resolution_update_rollups(self):
+        """Test first response and resolution measures are maintained incrementally"""
+        TicketComment.objects.create(
+            ticket=self.ticket,
+            author=self.technician,
+            content='Looking into it'
+        )
+        self.ticket.status = Ticket.Status.RESOLVED
+        self.ticket.resolved_at = timezone.now()
+        self.ticket.save()
+        
+        totals = rollup_totals(status='resolved', technician=self.technician)
+        self.assertEqual(totals['created_count'], 1)
+        self.assertEqual(totals['resolved_count'], 1)
+        self.assertEqual(totals['first_response_count'], 1)
+        self.assertEqual(status_counts(), {'resolved': 1})
+        
+        today = timezone.now().date()
+        self.assertEqual(daily_rollup_counts(today, today)[today], {'created': 1, 'resolved': 1})
+    
+    def test_team_metrics(self):
+        """Test team metrics are computed for every technician in one query"""
+        User.objects.create_user(
+            username='idle',
+            email='idle@example.com',
+            password='password123',
+            role='technician'
+        )
+        TicketComment.objects.create(ticket=self.ticket, author=self.technician, content='On it')
+        self.ticket.status = Ticket.Status.RESOLVED
+        self.ticket.save()
+        
+        with self.assertNumQueries(1):
+            metrics = team_metrics()
+        
+        self.assertEqual([row['technician'].username for row in metrics], ['technician', 'idle'])
+        self.assertEqual(metrics[0]['assigned'], 1)
+        self.assertEqual(metrics[0]['resolved'], 1)
+        self.assertEqual(metrics[0]['performance_level'], 'excellent')
+        self.assertEqual(metrics[1]['assigned'], 0)
+        self.assertEqual(metrics[1]['performance_level'], 'below-average')
+        
+        # Tickets outside the period are not counted
+        Ticket.objects.filter(pk=self.ticket.pk).update(created_at=timezone.now() - timedelta(days=10))
+        self.assertEqual(team_metrics('week')[0]['assigned'], 0)
+    
+    def test_backfill_command(self):
+        """Test the backfill command rebuilds rollups for tickets changed outside the ORM save path"""
+        two_days_ago = timezone.now() - timedelta(days=2)
+        Ticket.objects.filter(pk=self.ticket.pk).update(created_at=two_days_ago)
+        
+        call_command('backfill_ticket_rollups', stdout=io.StringIO())
+        
+        counts = daily_rollup_counts(two_days_ago.date(), timezone.now().date())
+        self.assertEqual(counts, {two_days_ago.date(): {'created': 1, 'resolved': 0}})
+
+
+class TicketQueryPlanTest(TestCase):
+    """Query plan regression tests for the hot ticket and comment querysets"""
+    
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        cls.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        now = timezone.now()
+        statuses = Ticket.Status.values
+        # bulk_create skips the signals, only the plans matter here
+        tickets = Ticket.objects.bulk_create([
+            Ticket(
+                title=f'Ticket {i}',
+                description='Seeded ticket',
+                created_by=cls.customer,
+                assigned_to=cls.technician if i % 3 else None,
+                status=statuses[i % len(statuses)],
+                due_date=now + timedelta(days=i % 10 - 5),
+                resolved_at=now - timedelta(hours=i) if i % 4 == 0 else None
+            )
+            for i in range(300)
+        ])
+        TicketComment.objects.bulk_create([
+            TicketComment(ticket=ticket, author=cls.technician, content='Seeded comment')
+            for ticket in tickets[::2]
+        ])
+    
+    def assertNoFullScan(self, queryset):
+        self.assertEqual(full_scans(queryset), [], f'Full scan in plan for:\n{queryset.query}')
+    
+    def test_dashboard_querysets(self):
+        """Test the dashboard and task filters use indexes"""
+        now = timezone.now()
+        today = truncate_day(now)
+        week_ago = now - timedelta(days=7)
+        open_tickets = Ticket.objects.filter(status__in=Ticket.OPEN_STATUSES)
+        
+        self.assertNoFullScan(open_tickets)
+        self.assertNoFullScan(open_tickets.filter(created_at__gte=week_ago))
+        self.assertNoFullScan(open_tickets.filter(due_date__lt=now))
+        self.assertNoFullScan(Ticket.objects.filter(created_at__gte=today, created_at__lt=today + timedelta(days=1)))
+        self.assertNoFullScan(Ticket.objects.filter(
+            status='resolved',
+            resolved_at__gte=today,
+            resolved_at__lt=today + timedelta(days=1)
+        ))
+        self.assertNoFullScan(Ticket.objects.filter(status='closed', updated_at__gte=week_ago))
+        self.assertNoFullScan(Ticket.objects.filter(
+            status__in=['new', 'in_progress'],
+            due_date__lt=now,
+            overdue_notification_sent=False
+        ))
+        self.assertNoFullScan(sla.breached(now=now).filter(sla_breached_at=None))
+        self.assertNoFullScan(sla.at_risk(Ticket.objects.filter(assigned_to=self.technician), now))
+        self.assertNoFullScan(sla.at_risk(now=now))
+    
+    def test_technician_and_profile_querysets(self):
+        """Test the per-user ticket filters use indexes"""
+        now = timezone.now()
+        assigned = Ticket.objects.filter(assigned_to=self.technician)
+        
+        self.assertNoFullScan(assigned.order_by('-created_at'))
+        self.assertNoFullScan(assigned.filter(created_at__gte=now - timedelta(days=30)))
+        self.assertNoFullScan(assigned.filter(status='resolved', updated_at__gte=truncate_day(now)))
+        self.assertNoFullScan(Ticket.objects.filter(created_by=self.customer, status__in=['resolved', 'closed']))
+    
+    def test_viewset_querysets(self):
+        """Test the querysets behind the ticket and comment API use indexes"""
+        ticket = Ticket.objects.first()
+        
+        self.assertNoFullScan(Ticket.objects.filter(created_by=self.customer))
+        self.assertNoFullScan(Ticket.objects.filter(Q(assigned_to=self.technician) | Q(assigned_to=None)))
+        self.assertNoFullScan(TicketComment.objects.filter(ticket=ticket).order_by('created_at'))
+        self.assertNoFullScan(TicketComment.objects.filter(author=self.technician))
+        self.assertNoFullScan(TicketComment.objects.filter(ticket__assigned_to=self.technician))
+        self.assertNoFullScan(TicketComment.objects.filter(ticket__created_by=self.customer, is_internal=False))
+
+
+class TicketAPIQueryCountTest(TestCase):
+    """Tests that the ticket API query count does not grow with the page size"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='admin',
+            is_staff=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+    
+    def create_tickets(self, count):
+        for i in range(count):
+            customer = User.objects.create_user(
+                username=f'customer{User.objects.count()}',
+                email=f'customer{User.objects.count()}@example.com',
+                password='password123',
+                role='customer'
+            )
+            technician = User.objects.create_user(
+                username=f'technician{User.objects.count()}',
+                email=f'technician{User.objects.count()}@example.com',
+                password='password123',
+                role='technician'
+            )
+            ticket = Ticket.objects.create(
+                title=f'Ticket {i}',
+                description='Ticket description',
+                created_by=customer,
+                assigned_to=technician
+            )
+            TicketComment.objects.create(ticket=ticket, author=technician, content='Looking into it')
+            TicketComment.objects.create(ticket=ticket, author=customer, content='Thanks')
+            TicketAttachment.objects.create(ticket=ticket, file='ticket_attachments/log.txt', uploaded_by=customer)
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(queries)
+    
+    def assertConstantQueries(self, url):
+        self.create_tickets(2)
+        small = self.count_queries(url)
+        self.create_tickets(6)
+        self.assertEqual(self.count_queries(url), small)
+    
+    def test_ticket_list(self):
+        """Test expanded users, comments and attachments are eager loaded"""
+        self.assertConstantQueries(
+            '/api/tickets/tickets/?expand=created_by_details,assigned_to_details,comments,attachments'
+        )
+    
+    def test_ticket_detail(self):
+        """Test the full ticket detail loads its relations with a fixed number of queries"""
+        self.create_tickets(1)
+        ticket = Ticket.objects.get()
+        small = self.count_queries(f'/api/tickets/tickets/{ticket.id}/')
+        for i in range(5):
+            TicketComment.objects.create(ticket=ticket, author=self.admin, content=f'Comment {i}')
+        self.assertEqual(self.count_queries(f'/api/tickets/tickets/{ticket.id}/'), small)
+    
+    def test_compact_list_and_sparse_fields(self):
+        """Test lists are compact unless nested data is requested"""
+        self.create_tickets(3)
+        
+        with CaptureQueriesContext(connection) as compact_queries:
+            compact = self.client.get('/api/tickets/tickets/').json()['results'][0]
+        # Just the page, no count and nothing per ticket
+        self.assertEqual(len(compact_queries), 1)
+        self.assertNotIn('comments', compact)
+        self.assertNotIn('description', compact)
+        self.assertEqual(compact['status_display'], 'New')
+        
+        expanded = self.client.get('/api/tickets/tickets/?expand=comments').json()['results'][0]
+        self.assertEqual(len(expanded['comments']), 2)
+        self.assertNotIn('attachments', expanded)
+        
+        sparse = self.client.get('/api/tickets/tickets/?fields=id,title&expand=attachments').json()['results'][0]
+        self.assertEqual(set(sparse), {'id', 'title', 'attachments'})
+        
+        detail = self.client.get(f"/api/tickets/tickets/{compact['id']}/").json()
+        self.assertIn('description', detail)
+        self.assertEqual(len(detail['comments']), 2)
+    
+    def test_comment_list(self):
+        """Test comment authors are eager loaded"""
+        self.assertConstantQueries('/api/tickets/comments/')
+
+
+class TicketBulkActionTest(TestCase):
+    """Tests for the bulk ticket operations endpoint"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='admin',
+            is_staff=True
+        )
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.tickets = [
+            Ticket.objects.create(title=f'Ticket {i}', description='Ticket', created_by=self.customer)
+            for i in range(3)
+        ]
+        Ticket.objects.filter(pk=self.tickets[2].pk).update(
+            assigned_to=self.technician, status=Ticket.Status.ASSIGNED
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = '/api/tickets/tickets/bulk/'
+    
+    def test_bulk_assign(self):
+        """Test tickets are assigned with one UPDATE, audited and notified in one batch"""
+        ids = [ticket.id for ticket in self.tickets]
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.url, {
+                    'ids': ids,
+                    'operation': 'assign',
+                    'technician_id': self.technician.id
+                }, format='json')
+            updates = [query for query in queries if query['sql'].startswith('UPDATE "tickets_ticket"')]
+            self.assertEqual(len(updates), 1)
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], ids[:2])
+        self.assertEqual(response.data['skipped'], ids[2:])
+        self.assertEqual(
+            Ticket.objects.filter(assigned_to=self.technician, status=Ticket.Status.ASSIGNED).count(), 3
+        )
+        self.assertEqual(TicketComment.objects.filter(is_internal=True, author=self.admin).count(), 2)
+        # The technician is told about the assignments and the customer about the status changes,
+        # one digest each
+        self.assertEqual(sorted((message.to[0], message.subject) for message in mail.outbox), [
+            ('customer@example.com', '2 ticket updates'),
+            ('technician@example.com', '2 ticket updates')
+        ])
+        # Audit notes are not responses
+        self.assertIsNone(Ticket.objects.get(pk=ids[0]).first_response_at)
+    
+    def test_bulk_resolve_and_close(self):
+        """Test resolving sets the resolution time and updates the rollups"""
+        ids = [ticket.id for ticket in self.tickets]
+        response = self.client.post(self.url, {
+            'ids': ids, 'operation': 'change_status', 'status': 'resolved'
+        }, format='json')
+        self.assertEqual(response.data['updated'], ids)
+        self.assertFalse(Ticket.objects.filter(resolved_at__isnull=True).exists())
+        self.assertEqual(rollup_totals()['resolved_count'], 3)
+        
+        response = self.client.post(self.url, {'ids': ids, 'operation': 'close'}, format='json')
+        self.assertEqual(Ticket.objects.filter(status=Ticket.Status.CLOSED).count(), 3)
+    
+    def test_bulk_validation_and_permissions(self):
+        """Test missing arguments are rejected and customers cannot use bulk operations"""
+        response = self.client.post(self.url, {'ids': [self.tickets[0].id], 'operation': 'assign'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('technician_id', response.data)
+        
+        self.client.force_authenticate(user=self.customer)
+        response = self.client.post(self.url, {'ids': [self.tickets[0].id], 'operation': 'close'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class TicketNotificationDigestTest(TestCase):
+    """Tests for the batched notification delivery"""
+    
+    def setUp(self):
+        self.admins = [
+            User.objects.create_user(
+                username=f'admin{i}',
+                email=f'admin{i}@example.com',
+                password='password123',
+                role='admin'
+            )
+            for i in range(2)
+        ]
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.tickets = [
+            Ticket.objects.create(title=f'Ticket {i}', description='Ticket', created_by=self.customer)
+            for i in range(3)
+        ]
+        Ticket.objects.filter(pk__in=[ticket.pk for ticket in self.tickets]).update(
+            assigned_to=self.technician,
+            status=Ticket.Status.IN_PROGRESS,
+            due_date=timezone.now() - timedelta(days=1)
+        )
+    
+    def test_overdue_tickets_are_digested(self):
+        """Test overdue notifications are sent as one digest per recipient over one connection"""
+        from .tasks import check_overdue_tickets
+        mail.outbox = []
+        
+        with CaptureQueriesContext(connection) as queries:
+            result = check_overdue_tickets()
+        
+        # Admins, candidate ids, the claim and its UPDATE, users and tickets for the digests
+        statements = [query['sql'] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(len(statements), 6)
+        self.assertEqual(result['tickets'], 3)
+        self.assertEqual(result['notifications'], 9)
+        self.assertEqual((result['recipients'], result['messages']), (3, 3))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            'admin0@example.com', 'admin1@example.com', 'technician@example.com'
+        ])
+        digest = mail.outbox[0].alternatives[0][0]
+        self.assertIn('Overdue tickets', digest)
+        for ticket in self.tickets:
+            self.assertIn(ticket.title, digest)
+        self.assertFalse(Ticket.objects.filter(overdue_notification_sent=False).exists())
+        
+        # Flagged tickets are not notified again
+        mail.outbox = []
+        self.assertEqual(check_overdue_tickets()['messages'], 0)
+        self.assertEqual(mail.outbox, [])
+    
+    def test_single_notification_is_not_digested(self):
+        """Test a recipient with one notification gets the regular email"""
+        from .tasks import deliver_notifications
+        mail.outbox = []
+        
+        result = deliver_notifications([
+            [self.technician.id, self.tickets[0].id, 'assigned'],
+            [self.technician.id, self.tickets[0].id, 'assigned'],
+        ])
+        
+        self.assertEqual((result['recipients'], result['messages']), (1, 1))
+        self.assertEqual(mail.outbox[0].subject, 'New Ticket Assigned')
+    
+    def test_sweep_claims_chunks(self):
+        """Test sweeps flag tickets chunk by chunk and release the claim when sending fails"""
+        from . import tasks
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(last_updated=timezone.now() - timedelta(days=3))
+        Ticket.objects.filter(pk__in=[ticket.pk for ticket in self.tickets[1:]]).update(
+            last_updated=timezone.now() - timedelta(days=3), reminder_sent=True
+        )
+        stale = Ticket.objects.filter(last_updated__lt=timezone.now() - timedelta(days=2))
+        
+        with mock.patch.object(tasks, 'deliver_notifications', side_effect=ConnectionError):
+            with self.assertRaises(ConnectionError):
+                tasks.sweep_tickets(stale, 'reminder_sent', lambda rows: [])
+        self.assertFalse(Ticket.objects.get(pk=self.tickets[0].pk).reminder_sent)
+        
+        Ticket.objects.update(reminder_sent=False)
+        chunks = list(tasks.claimed_chunks(stale, 'reminder_sent', chunk_size=2))
+        self.assertEqual([len(rows) for rows in chunks], [2, 1])
+        self.assertFalse(Ticket.objects.filter(reminder_sent=False).exists())
+        # Claimed tickets are not handed out again
+        self.assertEqual(list(tasks.claimed_chunks(stale, 'reminder_sent')), [])
+        
+        Ticket.objects.update(reminder_sent=False)
+        mail.outbox = []
+        result = tasks.send_ticket_reminders()
+        self.assertEqual((result['tickets'], result['messages']), (3, 1))
+        self.assertEqual(mail.outbox[0].to, ['technician@example.com'])
+
+
+class SLATest(TestCase):
+    """Tests for the precomputed SLA deadlines and the breach sweep"""
+    
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='admin'
+        )
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.service = Service.objects.create(name='Repair', description='Repair')
+    
+    def create_ticket(self, **kwargs):
+        return Ticket.objects.create(title='Ticket', description='Ticket', created_by=self.customer, **kwargs)
+    
+    def test_deadlines_are_read_only(self):
+        """Test clients cannot move the SLA deadlines or clear a breach through the API"""
+        ticket = self.create_ticket(priority=Ticket.Priority.HIGH)
+        Ticket.objects.filter(pk=ticket.pk).update(sla_breached_at=ticket.sla_due_at)
+        ticket.refresh_from_db()
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+        response = client.patch(f'/api/tickets/tickets/{ticket.id}/', {
+            'title': 'Renamed',
+            'sla_due_at': (ticket.sla_due_at + timedelta(days=30)).isoformat(),
+            'sla_warn_at': (ticket.sla_warn_at + timedelta(days=30)).isoformat(),
+            'sla_breached_at': None,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        saved = Ticket.objects.get(pk=ticket.pk)
+        self.assertEqual(saved.title, 'Renamed')
+        self.assertEqual(
+            (saved.sla_due_at, saved.sla_warn_at, saved.sla_breached_at),
+            (ticket.sla_due_at, ticket.sla_warn_at, ticket.sla_breached_at)
+        )
+    
+    def test_deadlines_follow_the_policy(self):
+        """Test deadlines are computed on create and priority changes from the matching policy"""
+        ticket = self.create_ticket(priority=Ticket.Priority.HIGH)
+        self.assertEqual(ticket.sla_due_at - ticket.created_at, timedelta(hours=4))
+        self.assertEqual(ticket.sla_warn_at - ticket.created_at, timedelta(hours=3))
+        
+        SLAPolicy.objects.create(priority=Ticket.Priority.LOW, resolution_hours=48, warning_percent=50)
+        SLAPolicy.objects.create(priority=Ticket.Priority.LOW, service=self.service, resolution_hours=10)
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.priority = Ticket.Priority.LOW
+        ticket.save()
+        self.assertEqual(ticket.sla_due_at - ticket.created_at, timedelta(hours=48))
+        self.assertEqual(ticket.sla_warn_at - ticket.created_at, timedelta(hours=24))
+        
+        ticket.service = self.service
+        ticket.save(update_fields=['service'])
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.sla_due_at - ticket.created_at, timedelta(hours=10))
+        
+        # Other changes don't look the policy up again
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            ticket.save()
+        self.assertFalse([query for query in queries if 'tickets_slapolicy' in query['sql']])
+    
+    def test_policy_changes_reschedule_open_tickets(self):
+        """Test saving a policy reschedules the open tickets it covers"""
+        ticket = self.create_ticket(priority=Ticket.Priority.MEDIUM)
+        closed = self.create_ticket(priority=Ticket.Priority.MEDIUM, status=Ticket.Status.CLOSED)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            SLAPolicy.objects.create(priority=Ticket.Priority.MEDIUM, resolution_hours=20)
+        
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.sla_due_at - ticket.created_at, timedelta(hours=20))
+        self.assertEqual(Ticket.objects.get(pk=closed.pk).sla_due_at - closed.created_at, timedelta(hours=8))
+    
+    def test_breaches_are_notified_once(self):
+        """Test the sweep notifies each breach once and the dashboard alerts read the deadlines"""
+        now = timezone.now()
+        breached = self.create_ticket(priority=Ticket.Priority.HIGH, assigned_to=self.technician)
+        at_risk = self.create_ticket(priority=Ticket.Priority.LOW, assigned_to=self.technician)
+        self.create_ticket(priority=Ticket.Priority.LOW, assigned_to=self.technician)
+        Ticket.objects.filter(pk=breached.pk).update(created_at=now - timedelta(hours=5))
+        Ticket.objects.filter(pk=at_risk.pk).update(created_at=now - timedelta(hours=20))
+        sla.reschedule()
+        
+        mail.outbox = []
+        from .tasks import check_sla_breaches
+        result = check_sla_breaches()
+        self.assertEqual((result['tickets'], result['messages']), (1, 2))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            'admin@example.com', 'technician@example.com'
+        ])
+        self.assertIsNotNone(Ticket.objects.get(pk=breached.pk).sla_breached_at)
+        self.assertEqual(check_sla_breaches()['tickets'], 0)
+        
+        alerts = sla.sla_alerts(Ticket.objects.filter(assigned_to=self.technician))
+        self.assertEqual([(alert['ticket_id'], alert['severity']) for alert in alerts], [
+            (breached.id, 'high'), (at_risk.id, 'medium')
+        ])
+        self.assertIn('SLA: 4 hours', alerts[0]['message'])
+
+
+class TicketStatusHistoryTest(TestCase):
+    """Tests for the tracked ticket fields and the status event history"""
+    
+    def setUp(self):
+        self.technician = User.objects.create_user(
+            username='technician',
+            email='technician@example.com',
+            password='password123',
+            role='technician'
+        )
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.ticket = Ticket.objects.create(
+            title='Ticket', description='Ticket', created_by=self.customer, assigned_to=self.technician
+        )
+    
+    def test_changes_are_tracked_without_queries(self):
+        """Test saving detects status changes from the loaded values and notifies only on changes"""
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        ticket.title = 'Renamed'
+        mail.outbox = []
+        with CaptureQueriesContext(connection) as queries:
+            ticket.save()
+        # No lookup of the previous row
+        self.assertFalse([
+            query for query in queries
+            if query['sql'].startswith('SELECT') and 'WHERE "tickets_ticket"."id" =' in query['sql']
+        ])
+        self.assertEqual(mail.outbox, [])
+        
+        ticket.status = Ticket.Status.IN_PROGRESS
+        self.assertEqual(ticket.changed_fields(), {'status': Ticket.Status.NEW})
+        ticket.changed_by = self.technician
+        ticket.save()
+        self.assertFalse(ticket.has_changed('status'))
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), [
+            'customer@example.com', 'technician@example.com'
+        ])
+        
+        event = ticket.status_events.last()
+        self.assertEqual((event.from_status, event.to_status, event.changed_by), ('new', 'in_progress', self.technician))
+        self.assertIsNotNone(event.status_seconds)
+        self.assertEqual(ticket.status_changed_at, event.created_at)
+    
+    def test_status_changed_at_is_read_only(self):
+        """Test clients cannot set when the ticket entered its status, the time in status is measured from it"""
+        entered = Ticket.objects.get(pk=self.ticket.pk).status_changed_at
+        client = APIClient()
+        client.force_authenticate(user=self.customer)
+        response = client.patch(f'/api/tickets/tickets/{self.ticket.id}/', {
+            'title': 'Renamed', 'status_changed_at': (entered - timedelta(days=30)).isoformat()
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).status_changed_at, entered)
+        
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        ticket.status = Ticket.Status.IN_PROGRESS
+        ticket.save()
+        self.assertLess(ticket.status_events.last().status_seconds, 60)
+    
+    def test_history_reports(self):
+        """Test resolution time, reopen rate and time in status are aggregated from the events"""
+        ticket = Ticket.objects.get(pk=self.ticket.pk)
+        ticket.status = Ticket.Status.RESOLVED
+        ticket.save()
+        self.assertIsNotNone(ticket.resolved_at)
+        ticket.status = Ticket.Status.IN_PROGRESS
+        ticket.save()
+        other = Ticket.objects.create(title='Other', description='Other', created_by=self.customer)
+        other.status = Ticket.Status.CLOSED
+        other.save()
+        
+        self.assertEqual(
+            list(TicketStatusEvent.objects.filter(ticket=self.ticket).values_list('from_status', 'to_status')),
+            [('', 'new'), ('new', 'resolved'), ('resolved', 'in_progress')]
+        )
+        self.assertEqual(reopen_rate(), 50.0)
+        self.assertEqual(resolution_hours(), 0)
+        self.assertEqual(set(time_in_status()), {'new', 'resolved'})
+    
+    def test_bulk_operations_record_events(self):
+        """Test bulk status changes append one event per changed ticket"""
+        from .bulk import CLOSE, apply_bulk_operation
+        admin = User.objects.create_user(
+            username='admin', email='admin@example.com', password='password123', role='admin'
+        )
+        apply_bulk_operation(Ticket.objects.all(), CLOSE, admin)
+        
+        event = TicketStatusEvent.objects.get(to_status=Ticket.Status.CLOSED)
+        self.assertEqual((event.ticket_id, event.from_status, event.changed_by), (self.ticket.id, 'new', admin))
+        self.assertEqual(Ticket.objects.get(pk=self.ticket.pk).status_changed_at, event.created_at)
+
+
+class ExportJobTest(TestCase):
+    """Tests for the background export jobs"""
+    
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        media = self.settings(MEDIA_ROOT=self.media.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        other = User.objects.create_user(username='other', email='other@example.com', password='password123')
+        created_at = timezone.now().replace(microsecond=123456)
+        for i in range(7):
+            Ticket.objects.create(
+                title=f'Ticket {i}', description='Ticket', created_by=self.customer, priority='high' if i % 3 else 'low',
+                created_at=created_at - timedelta(minutes=i // 2)
+            )
+        Ticket.objects.create(title='Not mine', description='Ticket', created_by=other, priority='high')
+        self.expected = list(
+            Ticket.objects.filter(created_by=self.customer, priority='high').order_by('-created_at', '-id').values_list('id', flat=True)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.customer)
+    
+    def read(self, job):
+        with job.file.open('rb') as file:
+            data = file.read()
+        text = (gzip.decompress(data) if job.compress else data).decode()
+        return [json.loads(line)['id'] for line in text.splitlines()]
+    
+    def test_job_is_created_run_and_downloaded(self):
+        """Test a job exports the requester's filtered rows, records its progress and emails them"""
+        mail.outbox = []
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/tickets/export-jobs/', {
+                'export': 'tickets', 'export_format': 'jsonl', 'compress': True, 'query': 'priority=high'
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        
+        job = ExportJob.objects.get(id=response.data['id'])
+        self.assertEqual(job.status, ExportJob.Status.COMPLETED)
+        self.assertEqual((job.total_rows, job.rows_written, job.progress), (len(self.expected), len(self.expected), 100))
+        self.assertEqual(self.read(job), self.expected)
+        self.assertEqual(mail.outbox[-1].to, ['customer@example.com'])
+        self.assertIn(f'/api/tickets/export-jobs/{job.id}/download/', mail.outbox[-1].alternatives[0][0])
+        
+        response = self.client.get(f'/api/tickets/export-jobs/{job.id}/download/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), job.file.open('rb').read())
+        
+        other = User.objects.get(username='other')
+        self.client.force_authenticate(user=other)
+        response = self.client.get(f'/api/tickets/export-jobs/{job.id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_interrupted_job_resumes_after_the_last_chunk(self):
+        """Test a job stopped with its worker continues without repeating or losing rows"""
+        job = ExportJob.objects.create(
+            requested_by=self.customer, export='tickets', export_format='jsonl', compress=True, query='priority=high'
+        )
+        
+        keyset_chunks = tasks.keyset_chunks
+        
+        def stopped_after_a_chunk(*args, **kwargs):
+            chunks = keyset_chunks(*args, **kwargs)
+            yield next(chunks)
+            raise SystemExit  # The worker is killed
+        
+        with mock.patch.object(tasks, 'EXPORT_JOB_CHUNK_SIZE', 2), \
+                mock.patch.object(tasks, 'keyset_chunks', stopped_after_a_chunk), self.assertRaises(SystemExit):
+            tasks.run_export_job(job.id)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_written, job.progress), (ExportJob.Status.RUNNING, 2, 50))
+        
+        # Half a chunk written after the last saved one
+        with open(job.file.path, 'ab') as file:
+            file.write(b'partial')
+        
+        self.assertIn('running in another worker', tasks.run_export_job(job.id))
+        self.assertIn('Resumed 0', tasks.resume_export_jobs())
+        
+        ExportJob.objects.filter(id=job.id).update(heartbeat_at=timezone.now() - tasks.EXPORT_JOB_STALE_AFTER * 2)
+        with mock.patch.object(tasks, 'EXPORT_JOB_CHUNK_SIZE', 2):
+            self.assertIn('Resumed 1', tasks.resume_export_jobs())
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.Status.COMPLETED)
+        self.assertEqual(self.read(job), self.expected)
+    
+    def test_invalid_filters_are_rejected(self):
+        """Test a job with filters the API rejects is not created"""
+        response = self.client.post('/api/tickets/export-jobs/', {
+            'export': 'invoices', 'query': 'status=unknown'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(ExportJob.objects.exists())
+
+
+
+class TicketSummaryTest(TestCase):
+    """Tests for the per-user ticket summaries"""
+    
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username='customer',
+            email='customer@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='password123',
+            role='customer'
+        )
+        self.admin = User.objects.create_user(
+            username='admin',
+            email='admin@example.com',
+            password='password123',
+            role='admin',
+            is_staff=True
+        )
+        self.tickets = [
+            Ticket.objects.create(title=f'Ticket {i}', description='Ticket', created_by=self.customer)
+            for i in range(4)
+        ]
+    
+    def assertSummaryCurrent(self):
+        computed = compute_summaries()
+        self.assertEqual(stale_summaries(computed), [])
+        return computed
+    
+    def test_summary_follows_ticket_changes(self):
+        """Test creating, re-statusing, moving and deleting tickets keep the counters in step"""
+        summary = TicketSummary.objects.get(user=self.customer)
+        self.assertEqual((summary.new_count, summary.open_count, summary.total_count), (4, 4, 4))
+        
+        ticket = Ticket.objects.get(pk=self.tickets[0].pk)
+        ticket.status = Ticket.Status.RESOLVED
+        ticket.save()
+        ticket = Ticket.objects.get(pk=self.tickets[1].pk)
+        ticket.status = Ticket.Status.IN_PROGRESS
+        ticket.created_by = self.other
+        ticket.save()
+        # Not saved, nothing moves
+        ticket.status = Ticket.Status.CLOSED
+        ticket.save(update_fields=['title'])
+        Ticket.objects.get(pk=self.tickets[2].pk).delete()
+        
+        summary.refresh_from_db()
+        self.assertEqual((summary.new_count, summary.resolved_count, summary.done_count), (1, 1, 1))
+        self.assertEqual(summary.last_activity_at, Ticket.objects.get(pk=self.tickets[0].pk).status_changed_at)
+        self.assertEqual(TicketSummary.objects.get(user=self.other).in_progress_count, 1)
+        self.assertSummaryCurrent()
+        
+        # Average age of the open ticket, from the stored sum only
+        now = self.tickets[3].created_at + timedelta(days=3)
+        self.assertAlmostEqual(summary.average_open_age(now).total_seconds(), timedelta(days=3).total_seconds(), delta=1)
+    
+    def test_bulk_operations_and_rebuild(self):
+        """Test bulk updates rebuild the summaries and the command reports and fixes drift"""
+        client = APIClient()
+        client.force_authenticate(user=self.admin)
+        response = client.post('/api/tickets/tickets/bulk/', {
+            'ids': [ticket.id for ticket in self.tickets[:2]], 'operation': 'close'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(TicketSummary.objects.get(user=self.customer).closed_count, 2)
+        self.assertSummaryCurrent()
+        
+        # Changes made behind the signals' back
+        Ticket.objects.filter(pk=self.tickets[2].pk).update(status=Ticket.Status.PENDING)
+        output = io.StringIO()
+        with self.assertRaisesMessage(CommandError, '1 of 1 summaries are out of date'):
+            call_command('rebuild_ticket_summaries', check=True, stdout=output)
+        self.assertIn(f'user {self.customer.id}', output.getvalue())
+        
+        call_command('rebuild_ticket_summaries', stdout=io.StringIO())
+        self.assertEqual(TicketSummary.objects.get(user=self.customer).pending_count, 1)
+        self.assertSummaryCurrent()
+    
+    def test_pages_read_the_summary(self):
+        """Test the tickets and profile pages take their counts from the summary, built on first use"""
+        TicketSummary.objects.all().delete()
+        Ticket.objects.filter(pk=self.tickets[0].pk).update(status=Ticket.Status.RESOLVED)
+        self.client.force_login(self.customer)
+        
+        response = self.client.get(reverse('core:tickets'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.context['total_tickets'], response.context['resolved_tickets_count']), (4, 1))
+        self.assertEqual(response.context['new_tickets_count'], 3)
+        self.assertTrue(TicketSummary.objects.filter(user=self.customer).exists())
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:profile'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [response.context[name] for name in ('total_tickets', 'resolved_tickets', 'open_tickets', 'resolution_rate')],
+            [4, 1, 3, 25.0]
+        )
+        self.assertEqual(response.context['avg_ticket_age_days'], 0)
+        # No per-status counts of the tickets table
+        self.assertFalse([query for query in queries if 'COUNT(' in query['sql'] and '"tickets_ticket"' in query['sql']])
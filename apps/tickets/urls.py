@@ -9,6 +9,7 @@ app_name = 'tickets'
 router = DefaultRouter()
 router.register(r'tickets', views.TicketViewSet, basename='ticket')
 router.register(r'comments', views.TicketCommentViewSet, basename='comment')
+router.register(r'export-jobs', views.ExportJobViewSet, basename='export-job')
 
 # Nested router for attachments
 tickets_router = NestedSimpleRouter(router, r'tickets', lookup='ticket')
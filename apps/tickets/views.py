@@ -1,15 +1,24 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Q
+from django.http import FileResponse
+from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from .models import Ticket, TicketComment, TicketAttachment
+from .models import ExportJob, Ticket, TicketComment, TicketAttachment
+from .bulk import apply_bulk_operation
+from .tasks import run_export_job
 from .serializers import (
-    TicketSerializer, TicketCreateSerializer,
-    TicketCommentSerializer, TicketAttachmentSerializer
+    TicketSerializer, TicketListSerializer, TicketCreateSerializer, TicketBulkActionSerializer,
+    TicketCommentSerializer, TicketAttachmentSerializer, ExportJobSerializer
 )
 from apps.accounts.permissions import IsTechnician
+from apps.core.export import ExportViewMixin
+from apps.core.fieldsets import SparseFieldsetViewMixin
+from apps.core.pagination import KeysetPagination
+from apps.core.prefetch import EagerLoadingMixin
 from apps.accounts.models import User
 
 class IsTicketOwnerOrStaff(permissions.BasePermission):
@@ -24,16 +33,35 @@ class IsTicketOwnerOrStaff(permissions.BasePermission):
         # Otherwise, only ticket creator can access it
         return obj.created_by == request.user
 
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(ExportViewMixin, SparseFieldsetViewMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows tickets to be viewed or edited.
     
     Regular users can only see tickets they created.
     Technicians can see tickets assigned to them or unassigned tickets.
     Admins can see all tickets.
+    
+    Lists use a compact representation, ``?expand=comments,attachments``
+    adds nested data and ``?fields=id,title`` limits the returned fields.
+    ``export/`` streams every visible ticket as CSV or JSON lines.
     """
     serializer_class = TicketSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'status': ['exact'],
+        'priority': ['exact'],
+        'service': ['exact'],
+        'assigned_to': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    export_fields = (
+        'id', 'title', 'status', 'priority', 'category', 'service_id', 'service__name',
+        'created_by_id', 'created_by__email', 'assigned_to_id', 'assigned_to__email',
+        'created_at', 'resolved_at', 'first_response_at', 'sla_due_at', 'sla_breached_at', 'due_date',
+    )
 
     def get_queryset(self):
         user = self.request.user
@@ -48,11 +76,44 @@ class TicketViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action == 'create':
             return TicketCreateSerializer
+        if self.action in ('list', 'by_status'):
+            return TicketListSerializer
         return TicketSerializer
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    def perform_update(self, serializer):
+        serializer.instance.changed_by = self.request.user
+        serializer.save()
+
+    @extend_schema(
+        description="Assign, change the status of or close many tickets in one transaction",
+        request=TicketBulkActionSerializer,
+        responses={200: {'type': 'object', 'properties': {
+            'updated': {'type': 'array', 'items': {'type': 'integer'}},
+            'skipped': {'type': 'array', 'items': {'type': 'integer'}}
+        }}}
+    )
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser | IsTechnician])
+    def bulk(self, request):
+        serializer = TicketBulkActionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        
+        # Tickets the user cannot see are skipped like unchanged ones
+        updated = apply_bulk_operation(
+            self.get_queryset().filter(id__in=data['ids']),
+            data['operation'],
+            request.user,
+            technician=data.get('technician'),
+            status=data.get('status')
+        )
+        return Response({
+            'updated': updated,
+            'skipped': sorted(set(data['ids']) - set(updated))
+        })
+
     @extend_schema(
         description="Assign a ticket to a technician",
         request={'application/json': {'properties': {'technician_id': {'type': 'integer'}}}},
@@ -108,7 +169,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         parameters=[
             OpenApiParameter(name="status", description="Ticket status", required=True, type=str)
         ],
-        responses={200: TicketSerializer(many=True)}
+        responses={200: TicketListSerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
     def by_status(self, request):
@@ -119,7 +180,7 @@ class TicketViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
-        tickets = self.get_queryset().filter(status=status_param)
+        tickets = self.eager_load(self.get_queryset().filter(status=status_param))
         page = self.paginate_queryset(tickets)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -128,7 +189,7 @@ class TicketViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(tickets, many=True)
         return Response(serializer.data)
 
-class TicketCommentViewSet(viewsets.ModelViewSet):
+class TicketCommentViewSet(ExportViewMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows ticket comments to be viewed or edited.
     
@@ -138,6 +199,14 @@ class TicketCommentViewSet(viewsets.ModelViewSet):
     """
     serializer_class = TicketCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = {
+        'ticket': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
+    pagination_class = KeysetPagination
+    keyset_ordering = ('created_at', 'id')
+    export_fields = ('id', 'ticket_id', 'author_id', 'author__email', 'is_internal', 'created_at', 'content')
 
     def get_queryset(self):
         user = self.request.user
@@ -155,7 +224,7 @@ class TicketCommentViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
-class TicketAttachmentViewSet(viewsets.ModelViewSet):
+class TicketAttachmentViewSet(EagerLoadingMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows ticket attachments to be viewed or edited.
     """
@@ -170,4 +239,40 @@ class TicketAttachmentViewSet(viewsets.ModelViewSet):
         serializer.save(
             uploaded_by=self.request.user,
             ticket_id=self.kwargs.get('ticket_pk')
-        )
\ No newline at end of file
+        )
+
+class ExportJobViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    API endpoint to run exports too large for the ``export/`` actions in the
+    background and follow their progress.
+
+    Users see their own jobs only. A job exports what its requester sees
+    through the API, ``query`` holds the filters as a query string, and the
+    requester is emailed when it is done.
+    """
+    serializer_class = ExportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+
+    def get_queryset(self):
+        return ExportJob.objects.filter(requested_by=self.request.user)
+
+    def perform_create(self, serializer):
+        job = serializer.save(requested_by=self.request.user)
+        transaction.on_commit(lambda: run_export_job.delay(job.id))
+
+    @extend_schema(
+        description="Download the file of a completed export job",
+        responses={200: {'type': 'string', 'format': 'binary'}}
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ExportJob.Status.COMPLETED:
+            return Response(
+                {'error': f'The export is {job.get_status_display().lower()}'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.file.name.rsplit('/', 1)[-1])
+
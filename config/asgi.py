@@ -2,6 +2,9 @@
 ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server so the async views run on the event loop, e.g.
+
+    gunicorn config.asgi:application -k uvicorn.workers.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -75,6 +76,10 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# The dashboard, FAQ, knowledge base and services pages are async views, see apps.core.async_views
+ASGI_APPLICATION = 'config.asgi.application'
+# Threads, each keeping its own database connection, that run the concurrent queries of async views, per worker process
+ASYNC_GATHER_CONNECTIONS = int(os.getenv('ASYNC_GATHER_CONNECTIONS', 8))
 
 # إعدادات قاعدة البيانات
 DATABASES = {
@@ -147,6 +152,36 @@ DEFAULT_FROM_EMAIL = f'Support System <{EMAIL_HOST_USER}>'
 SITE_NAME = 'Support System'
 SITE_URL = 'http://127.0.0.1:8000'  # Change this in production
 
+# Cache configuration: per-process LRU in front of Redis (see apps.core.cache_backends)
+REDIS_CACHE_URL = os.getenv('REDIS_CACHE_URL', 'redis://localhost:6379/1')
+CACHES = {
+    'default': {
+        'BACKEND': 'apps.core.cache_backends.TieredCache',
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'LOCAL_CACHE': 'local',
+            'REMOTE_CACHE': 'redis',
+            'LOCAL_TIMEOUT': int(os.getenv('LOCAL_CACHE_TIMEOUT', 10)),
+        },
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'support-system',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_CACHE_URL,
+        'KEY_PREFIX': 'support',
+    },
+}
+if DEBUG:
+    # In-process Redis stand-in, like the Celery result backend below
+    import fakeredis
+    CACHES['redis']['OPTIONS'] = {'connection_class': fakeredis.FakeConnection}
+
 # Celery Configuration
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
@@ -172,6 +207,17 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
+# Largest ?page_size= accepted by apps.core.pagination.KeysetPagination
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 100))
+
+# Request profiling, see apps.core.profiling. Off by default in production, enable it to investigate
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', str(DEBUG)) == 'True'
+# Server-Timing headers expose query counts, only send them in development by default
+PROFILING_SERVER_TIMING = os.getenv('PROFILING_SERVER_TIMING', str(DEBUG)) == 'True'
+PROFILING_SLOW_REQUEST_MS = int(os.getenv('PROFILING_SLOW_REQUEST_MS', 1000))
+# A query fingerprint run this many times in one request counts as an N+1 loop
+PROFILING_DUPLICATE_QUERIES = int(os.getenv('PROFILING_DUPLICATE_QUERIES', 3))
+PROFILING_WINDOW_MINUTES = int(os.getenv('PROFILING_WINDOW_MINUTES', 60))
 
 # DRF Spectacular settings for API documentation
 SPECTACULAR_SETTINGS = {